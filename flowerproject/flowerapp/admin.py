@@ -32,7 +32,7 @@ class CustomerAdmin(admin.ModelAdmin):
 
 @admin.register(models.Order)
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ['id', 'customer', 'status', 'total_amount', 'created_at']
+    list_display = ['id', 'customer', 'status', 'item_summary', 'total_amount', 'created_at']
     list_filter = ['status']
     search_fields = ['customer__user__username']
     readonly_fields = ['created_at', 'order_date']
@@ -40,8 +40,8 @@ class OrderAdmin(admin.ModelAdmin):
 
 @admin.register(models.OrderItem)
 class OrderItemAdmin(admin.ModelAdmin):
-    list_display = ['order', 'flower', 'quantity', 'unit_price']
-    search_fields = ['flower__name']
+    list_display = ['order', 'flower_name', 'quantity', 'unit_price']
+    search_fields = ['flower_name']
 
 
 @admin.register(models.Profile)
@@ -0,0 +1,107 @@
+"""
+Catalog response cache, versioned: every key embeds the catalog version, and
+a write bumps it after commit.
+
+Redis being down must not take the catalog (or a committed checkout) with
+it: reads then build uncached under a throwaway version — which also keeps
+ETags from validating — and a failed bump is logged.
+"""
+import logging
+import time
+from urllib.parse import urlencode
+
+import redis
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION_KEY = 'catalog:version'
+
+# query params that change the flower list response
+LIST_CACHE_PARAMS = (
+    'category', 'price', 'page', 'page_size',
+    'pagination', 'cursor', 'ordering', 'count', 'facets',
+    'fields', 'exclude',
+)
+
+
+def get_catalog_version():
+    """Current catalog version. Every cache key below embeds it."""
+    try:
+        version = cache.get(CATALOG_VERSION_KEY)
+        if version is None:
+            # seed from the clock so a lost counter never reuses an old version
+            cache.add(CATALOG_VERSION_KEY, int(time.time() * 1000), timeout=None)
+            version = cache.get(CATALOG_VERSION_KEY)
+    except redis.RedisError:
+        logger.warning('Catalog cache unavailable, serving uncached', exc_info=True)
+        # never a real version (those are milliseconds): no hit, no 304
+        return time.time_ns()
+    return version
+
+
+def bump_catalog_version():
+    """
+    Invalidate every cached catalog response in one step, here and on the CDN.
+    Call this AFTER commit (transaction.on_commit), otherwise a reader
+    can cache the old rows under the new version. Never raises: the write
+    it follows is already committed.
+    """
+    purge_cdn()
+    try:
+        try:
+            return cache.incr(CATALOG_VERSION_KEY)
+        except ValueError:
+            # key evicted / never set
+            get_catalog_version()
+            return cache.incr(CATALOG_VERSION_KEY)
+    except redis.RedisError:
+        # entries under the old version live out CATALOG_CACHE_TIMEOUT
+        logger.exception('Could not bump the catalog version')
+        return None
+
+
+def purge_cdn(keys=('catalog',)):
+    """
+    Queue a CDN purge of the pages tagged with these surrogate keys (every
+    catalog page carries `catalog`). No-op without CATALOG_CDN_PURGE_URL;
+    never raises.
+    """
+    if not settings.CATALOG_CDN_PURGE_URL:
+        return
+    from .tasks import purge_catalog_cdn
+    try:
+        purge_catalog_cdn.delay(list(keys))
+    except Exception:
+        # pages live out CATALOG_CDN_MAX_AGE
+        logger.exception('Could not queue the CDN purge of %s', keys)
+
+
+SEARCH_CACHE_PARAMS = ('q', 'category', 'price', 'page', 'page_size', 'fields', 'exclude')
+FACET_CACHE_PARAMS = ('category', 'price')
+
+
+def flower_list_key(params, names=LIST_CACHE_PARAMS, kind='list'):
+    query = urlencode([(name, params.get(name, '')) for name in names])
+    return f'catalog:v{get_catalog_version()}:{kind}:{query}'
+
+
+def flower_detail_key(pk, fields=()):
+    return f'catalog:v{get_catalog_version()}:flower:{pk}:{",".join(fields)}'
+
+
+def get_or_build(key, builder):
+    """Read-through: return the cached value or build, store and return it."""
+    try:
+        value = cache.get(key)
+    except redis.RedisError:
+        logger.warning('Catalog cache unavailable, building %s uncached', key, exc_info=True)
+        return builder()
+    if value is None:
+        value = builder()
+        try:
+            cache.set(key, value, timeout=settings.CATALOG_CACHE_TIMEOUT)
+        except redis.RedisError:
+            logger.warning('Could not cache %s', key, exc_info=True)
+    return value
@@ -0,0 +1,201 @@
+"""
+Bulk flower import / update from CSV or JSON Lines.
+
+The input is read line by line, validated a batch at a time and written with
+bulk_create / bulk_update — no per-row save(), so no per-row signals. Each
+batch is its own transaction and ends with ONE catalog cache bump and ONE
+stock broadcast. Rows with an `id` update that flower, rows without create one.
+"""
+import csv
+import json
+from itertools import islice
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+
+from flowerapp import models
+from .catalog_cache import bump_catalog_version
+from .tasks import notify_stock_updates
+
+DEFAULT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+# columns accepted in the file (category = category id)
+IMPORT_FIELDS = (
+    'name', 'description', 'price', 'stock', 'image', 'category',
+    'light_requirement', 'water_frequency', 'temperature',
+)
+REQUIRED_ON_CREATE = ('name', 'description')
+
+
+def iter_rows(lines, input_format):
+    """
+    Yield (line_no, row_dict_or_None, error) from an iterable of byte lines —
+    an UploadedFile, the raw request stream or an open file all work.
+    """
+    text = (
+        line.decode('utf-8-sig') if isinstance(line, bytes) else line
+        for line in lines
+    )
+    if input_format == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+
+    for line_no, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_no, None, {'row': [f'Invalid JSON: {exc}']}
+            continue
+        if not isinstance(row, dict):
+            yield line_no, None, {'row': ['Expected a JSON object']}
+            continue
+        yield line_no, row, None
+
+
+def _clean_row(row, existing, category_ids):
+    """Return (flower_id, cleaned_values, errors) for one input row."""
+    errors  = {}
+    cleaned = {}
+
+    flower_id = row.get('id')
+    if flower_id in ('', None):
+        flower_id = None
+    else:
+        try:
+            flower_id = int(flower_id)
+        except (TypeError, ValueError):
+            return None, {}, {'id': ['A valid integer is required.']}
+        if flower_id not in existing:
+            return flower_id, {}, {'id': [f'Flower {flower_id} does not exist.']}
+
+    for name in IMPORT_FIELDS:
+        # missing column / empty CSV cell → leave as is (or model default)
+        if name not in row or row[name] == '':
+            continue
+        value = row[name]
+
+        if name == 'category':
+            if value is None:
+                cleaned['category_id'] = None
+                continue
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                errors[name] = ['A valid category id is required.']
+                continue
+            if value not in category_ids:
+                errors[name] = [f'Category {value} does not exist.']
+                continue
+            cleaned['category_id'] = value
+            continue
+
+        if name == 'image':
+            # storage path / URL of an already uploaded image
+            if value is not None and len(str(value)) > 100:
+                errors[name] = ['Ensure this value has at most 100 characters.']
+                continue
+            cleaned[name] = value
+            continue
+
+        field = models.Flower._meta.get_field(name)
+        try:
+            cleaned[name] = field.clean(value, None)
+        except DjangoValidationError as exc:
+            errors[name] = exc.messages
+
+    if flower_id is not None and 'stock' in cleaned:
+        # flower_reserved_within_stock — `existing` is locked, so this holds
+        held = existing[flower_id].reserved_stock
+        if cleaned['stock'] < held:
+            errors['stock'] = [f'{held} are held by unpaid orders.']
+
+    if flower_id is None:
+        for name in REQUIRED_ON_CREATE:
+            if name not in cleaned and name not in errors:
+                errors[name] = ['This field is required.']
+
+    return flower_id, cleaned, errors
+
+
+def _apply_batch(batch, report):
+    """Validate and write one batch inside one transaction."""
+    ids = set()
+    categories = set()
+    for _, row, _ in batch:
+        if row is None:
+            continue
+        if row.get('id') not in ('', None):
+            try:
+                ids.add(int(row['id']))
+            except (TypeError, ValueError):
+                pass
+        if row.get('category') not in ('', None):
+            try:
+                categories.add(int(row['category']))
+            except (TypeError, ValueError):
+                pass
+
+    with transaction.atomic():
+        # lock the rows we update so concurrent checkouts don't lose writes
+        existing = models.Flower.objects.select_for_update().in_bulk(ids)
+        category_ids = set(
+            models.Category.objects.filter(id__in=categories).values_list('id', flat=True)
+        )
+
+        creates = []
+        updates = {}
+        update_fields = set()
+        for line_no, row, error in batch:
+            if error is None:
+                flower_id, cleaned, error = _clean_row(row, existing, category_ids)
+            if error:
+                report['failed'] += 1
+                if len(report['errors']) < MAX_REPORTED_ERRORS:
+                    report['errors'].append({'line': line_no, 'errors': error})
+                continue
+
+            if flower_id is None:
+                creates.append(models.Flower(**cleaned))
+                continue
+            flower = existing[flower_id]
+            for name, value in cleaned.items():
+                setattr(flower, name, value)
+            update_fields.update(cleaned)
+            updates[flower_id] = flower
+
+        if creates:
+            models.Flower.objects.bulk_create(creates)
+        if updates and update_fields:
+            models.Flower.objects.bulk_update(list(updates.values()), sorted(update_fields))
+
+        report['created'] += len(creates)
+        report['updated'] += len(updates)
+        report['batches'] += 1
+
+        changed = creates + list(updates.values())
+        if changed:
+            # ✅ one invalidation + one broadcast per batch, not per row
+            transaction.on_commit(bump_catalog_version)
+            if 'stock' in update_fields or creates:
+                stock_rows = [
+                    {'id': f.id, 'name': f.name, 'stock': f.stock}
+                    for f in changed
+                ]
+                transaction.on_commit(lambda: notify_stock_updates(stock_rows))
+
+
+def import_flowers(lines, input_format='jsonl', batch_size=DEFAULT_BATCH_SIZE):
+    """Stream-import flowers. Returns a report with per-row errors."""
+    report = {'created': 0, 'updated': 0, 'failed': 0, 'batches': 0, 'errors': []}
+    rows = iter_rows(lines, input_format)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        _apply_batch(batch, report)
+    return report
@@ -0,0 +1,216 @@
+"""
+Asynchronous checkout (POST /api/v1/buy-now/?mode=async).
+
+The request thread only validates, inserts a `queued` Order carrying the
+basket in checkout_request and returns 202. Orders are placed by the
+process_checkouts task on the dedicated `checkout` Celery queue, a batch at a
+time: the batch's flowers are locked once in id order, orders are accepted
+first come first served against that stock, and the whole batch is deducted
+with ONE guarded UPDATE. A hot flower is locked once per batch instead of once
+per buyer.
+
+Baskets are validated before they are queued (parse_basket), and read back
+before the batch touches the database: an order whose stored request can't
+be read is marked `failed` on its own instead of rolling back the batch.
+"""
+import logging
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+
+from flowerapp import models
+from . import flashsale, outbox
+from .catalog_cache import bump_catalog_version
+from .snapshots import basket_summary, order_items
+from .stock import InsufficientStock, deduct_locked, lock_flowers, stock_levels
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 200
+
+CONTACT_FIELDS = ('address', 'phone', 'city', 'pincode')
+
+# Flower.id is an AutoField — anything bigger can't exist and overflows the lookup
+MAX_FLOWER_ID = 2 ** 31 - 1
+
+
+def _positive_int(value, limit=None):
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f'{value!r} is not a positive integer')
+    if isinstance(value, str) and not value.strip().isdigit():
+        raise ValueError(f'{value!r} is not a positive integer')
+    value = int(value)
+    if value <= 0 or (limit and value > limit):
+        raise ValueError(f'{value!r} is out of range')
+    return value
+
+
+def parse_basket(flower_ids):
+    """
+    Posted `flowers` (one flower id per unit) → Counter {flower_id: qty}.
+    Raises ValueError unless it is a list of positive integer ids.
+    """
+    if not isinstance(flower_ids, list):
+        raise ValueError('flowers must be a list of flower ids')
+    return Counter(_positive_int(fl_id, MAX_FLOWER_ID) for fl_id in flower_ids)
+
+
+def _stored_basket(request):
+    """{flower_id: qty} back from checkout_request. Raises ValueError if unreadable."""
+    try:
+        pairs = request['flowers']
+        contact = request['contact']
+        basket = {
+            _positive_int(fl_id, MAX_FLOWER_ID): _positive_int(qty)
+            for fl_id, qty in pairs
+        }
+    except (TypeError, KeyError) as exc:
+        raise ValueError(f'malformed checkout request: {exc!r}')
+    if not basket or len(basket) != len(pairs) or not isinstance(contact, dict):
+        raise ValueError('malformed checkout request')
+    return basket
+
+
+def checkout_request(flower_counts, contact, flash_taken):
+    """What the worker needs to place the order later — JSON only."""
+    return {
+        'flowers':     sorted(flower_counts.items()),
+        'contact':     {name: contact.get(name) or '' for name in CONTACT_FIELDS},
+        'flash_taken': sorted(flash_taken.items()),
+    }
+
+
+def _apply_contact(customer, contact):
+    """Same customer updates the synchronous BuyNow path makes."""
+    if contact.get('address'): customer.address      = contact['address']
+    if contact.get('phone'):   customer.phone_number = contact['phone']
+    if contact.get('city'):    customer.city         = contact['city']
+    if contact.get('pincode'):
+        customer.pincode  = contact['pincode']
+        customer.district = 'Alappuzha'
+        customer.state    = 'Kerala'
+
+
+def process_batch(batch_size=BATCH_SIZE):
+    """Place up to batch_size queued orders in one transaction. Returns how many."""
+    with transaction.atomic():
+        # skip_locked: several checkout workers can drain side by side
+        orders = list(
+            models.Order.objects.select_for_update(skip_locked=True, of=('self',))
+            .select_related('customer')
+            .filter(status='queued')
+            .order_by('id')[:batch_size]
+        )
+        if not orders:
+            return 0
+
+        # read every basket before touching stock — one bad request must not
+        # roll back (and so re-queue) everyone else's
+        now     = timezone.now()
+        baskets = {}
+        failed  = []
+        for order in orders:
+            try:
+                baskets[order.id] = _stored_basket(order.checkout_request)
+            except ValueError as exc:
+                logger.warning('Async checkout %s failed: %s', order.id, exc)
+                order.status = 'failed'
+                order.checkout_request = {
+                    **(order.checkout_request if isinstance(order.checkout_request, dict) else {}),
+                    'result': {'error': 'Invalid checkout request'},
+                }
+                order.updated_at = now
+                failed.append(order)
+
+        locked    = lock_flowers({fl_id for basket in baskets.values() for fl_id in basket})
+        available = {
+            fl_id: max(row['stock'] - row['reserved_stock'], 0)
+            for fl_id, row in locked.items()
+        }
+
+        accepted  = []
+        rejected  = []
+        demand    = Counter()
+        customers = {}
+        for order in orders:
+            if order.id not in baskets:
+                continue
+            basket = baskets[order.id]
+            _apply_contact(order.customer, order.checkout_request['contact'])
+            customers[order.customer.id] = order.customer
+            order.updated_at = now
+
+            if any(fl_id not in locked for fl_id in basket):
+                result = {'error': 'Flower not found'}
+            else:
+                shortages = [
+                    {
+                        'flower_id':   fl_id,
+                        'flower_name': locked[fl_id]['name'],
+                        'requested':   qty,
+                        'available':   available[fl_id],
+                    }
+                    for fl_id, qty in sorted(basket.items())
+                    if available[fl_id] < qty
+                ]
+                result = InsufficientStock(shortages).as_response_data() if shortages else None
+
+            if result:
+                order.status = 'rejected'
+                order.checkout_request = {**order.checkout_request, 'result': result}
+                rejected.append(order)
+                continue
+
+            # first come, first served within the batch
+            for fl_id, qty in basket.items():
+                available[fl_id] -= qty
+                demand[fl_id]    += qty
+            order.status       = 'confirmed'
+            order.total_amount = sum(locked[fl_id]['price'] * qty for fl_id, qty in basket.items())
+            summary            = basket_summary(basket, locked)
+            order.item_count   = summary['item_count']
+            order.item_summary = summary['item_summary']
+            accepted.append(order)
+
+        if demand:
+            # ✅ one guarded UPDATE for the whole batch
+            deduct_locked(demand, locked)
+            models.OrderItem.objects.bulk_create([
+                item
+                for order in accepted
+                for item in order_items(order, baskets[order.id], locked)
+            ])
+            models.CartItem.objects.filter(
+                cart__customer_id__in={order.customer_id for order in accepted}
+            ).delete()
+
+        models.Order.objects.bulk_update(
+            orders,
+            ['status', 'total_amount', 'item_count', 'item_summary', 'checkout_request', 'updated_at'],
+        )
+        models.Customer.objects.bulk_update(
+            customers.values(),
+            ['address', 'phone_number', 'city', 'pincode', 'district', 'state'],
+        )
+
+        events = []
+        if demand:
+            # levels RETURNed by the UPDATE — no re-read for the notifications
+            events += outbox.stock_events(stock_levels({fl_id: locked[fl_id] for fl_id in demand}))
+            transaction.on_commit(bump_catalog_version)
+        events += outbox.order_confirmed_events([order.id for order in accepted])
+        # customer may be following ws/orders/<id>/
+        events += [
+            ('order_status_push', {'order_id': order.id, 'status': order.status})
+            for order in orders
+        ]
+        outbox.publish(events)
+        for order in rejected + failed:
+            try:
+                taken = dict(order.checkout_request.get('flash_taken') or [])
+            except (TypeError, ValueError):
+                continue
+            transaction.on_commit(lambda taken=taken: flashsale.give_back(taken))
+
+    return len(orders)
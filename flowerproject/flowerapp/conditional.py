@@ -0,0 +1,59 @@
+import hashlib
+
+from django.conf import settings
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework.response import Response
+
+
+def make_etag(*parts):
+    """Strong ETag from cheap version values — no need to render the body."""
+    raw    = ':'.join(str(part) for part in parts)
+    digest = hashlib.sha1(raw.encode('utf-8')).hexdigest()[:32]
+    return quote_etag(digest)
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    Return a 304 Response when the client's copy is still current, else None.
+    If-None-Match wins over If-Modified-Since (RFC 9110 13.2.2).
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        if '*' in etags or etag in etags:
+            return with_validators(Response(status=304), etag, last_modified)
+        return None
+
+    if_modified_since = request.META.get('HTTP_IF_MODIFIED_SINCE')
+    if last_modified and if_modified_since:
+        since = parse_http_date_safe(if_modified_since)
+        if since is not None and int(last_modified.timestamp()) <= since:
+            return with_validators(Response(status=304), etag, last_modified)
+    return None
+
+
+def with_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+def catalog_cache_headers(response, flower_ids=()):
+    """
+    Public catalog responses: short browser TTL, longer CDN TTL.
+    Surrogate-Key names every flower on the page, identically on 200 and 304;
+    bump_catalog_version purges the `catalog` key. With no purge endpoint
+    configured the CDN gets s-maxage=0 and revalidates with the ETag instead.
+    """
+    cdn_max_age = settings.CATALOG_CDN_MAX_AGE if settings.CATALOG_CDN_PURGE_URL else 0
+    response['Cache-Control'] = f'public, max-age={settings.CATALOG_MAX_AGE}, s-maxage={cdn_max_age}'
+    keys = ['catalog'] + [f'flower-{flower_id}' for flower_id in flower_ids]
+    response['Surrogate-Key'] = ' '.join(keys)
+    return response
+
+
+def private_cache_headers(response):
+    # per-user data: the browser may keep it but must revalidate every time
+    response['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,208 @@
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, Exists, F, OuterRef, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from flowerapp import models
+
+
+def filter_flowers(flowers, params):
+    """Apply the catalog ?category= and ?price=min-max filters."""
+    category_id = params.get("category")
+    price_range = params.get('price')
+    if price_range:
+        try:
+            min_price, max_price = price_range.split("-")
+            min_price = int(min_price)
+            max_price = int(max_price)
+
+            if max_price:
+                flowers = flowers.filter(price__gte=min_price, price__lte=max_price)
+            else:
+                flowers = flowers.filter(price__gte=min_price)
+        except ValueError:
+            pass
+
+    if category_id:
+        flowers = flowers.filter(category_id=category_id)
+    return flowers
+
+
+# same values as the price <select> on the catalog page
+PRICE_BANDS = (
+    ('0-100',     0,    100),
+    ('101-500',   101,  500),
+    ('501-1000',  501,  1000),
+    ('1001-5000', 1001, 5000),
+)
+
+
+def flower_facets(flowers):
+    """
+    Per-category counts, price band histogram and in-stock count in ONE
+    grouped query: GROUP BY category with filtered COUNTs per band.
+    Band totals are summed from the category rows.
+    """
+    band_counts = {
+        f'band_{i}': Count('id', filter=Q(price__gte=low, price__lte=high))
+        for i, (_, low, high) in enumerate(PRICE_BANDS)
+    }
+    rows = (
+        flowers.order_by()
+        .values('category_id', 'category__name')
+        .annotate(
+            total=Count('id'),
+            in_stock=Count('id', filter=Q(stock__gt=F('reserved_stock'))),
+            **band_counts,
+        )
+    )
+
+    categories = []
+    bands      = [0] * len(PRICE_BANDS)
+    total      = in_stock = 0
+    for row in rows:
+        total    += row['total']
+        in_stock += row['in_stock']
+        for i in range(len(PRICE_BANDS)):
+            bands[i] += row[f'band_{i}']
+        if row['category_id'] is not None:
+            categories.append({
+                'id':    row['category_id'],
+                'name':  row['category__name'],
+                'count': row['total'],
+            })
+
+    categories.sort(key=lambda c: c['name'])
+    return {
+        'total':      total,
+        'in_stock':   in_stock,
+        'categories': categories,
+        'price_bands': [
+            {'value': value, 'min': low, 'max': high, 'count': bands[i]}
+            for i, (value, low, high) in enumerate(PRICE_BANDS)
+        ],
+    }
+
+
+# below this pg_trgm has no trigram to look up and the index can't help
+MIN_SEARCH_LENGTH = 3
+
+# ?q= customer matches fetched up front; past this the match is broad enough
+# that scanning orders newest first finds a page quickly anyway
+MAX_CUSTOMER_MATCHES = 1000
+
+
+def _search_customers(q):
+    """
+    Customer ids matching ?q= on username, phone or pincode, or None when
+    there are too many to list. Two queries so each side uses its own
+    trigram index instead of an OR across the auth_user join.
+    """
+    by_user = models.Customer.objects.filter(
+        user__username__icontains=q
+    ).values_list('id', flat=True)[:MAX_CUSTOMER_MATCHES + 1]
+    by_contact = models.Customer.objects.filter(
+        Q(phone_number__icontains=q) | Q(pincode__icontains=q)
+    ).values_list('id', flat=True)[:MAX_CUSTOMER_MATCHES + 1]
+
+    ids = set(by_user) | set(by_contact)
+    return ids if len(ids) <= MAX_CUSTOMER_MATCHES else None
+
+
+def _day_start(value, days=0):
+    """Local midnight of `value` (YYYY-MM-DD) plus `days`; None if it isn't a date."""
+    try:
+        day = parse_date(value or '')
+    except ValueError:
+        return None
+    if day is None:
+        return None
+    return timezone.make_aware(datetime.combine(day + timedelta(days=days), time.min))
+
+
+def filter_admin_orders(orders, params):
+    """
+    Apply the admin order list filters. Text filters are case-insensitive
+    substring matches (icontains → UPPER(col) LIKE), each served by a
+    pg_trgm GIN index on UPPER(col). ?flower_name= is an EXISTS over the
+    order's items, so rows never multiply and no DISTINCT is needed; it
+    matches the name snapshotted on the item, as the order shows it.
+    """
+    customer    = params.get('customer')
+    phone       = params.get('phone')
+    pincode     = params.get('pincode')
+    razorpay_id = params.get('razorpay_id')
+    flower_name = params.get('flower_name')
+    q           = (params.get('q') or '').strip()
+
+    filters = Q()
+
+    if customer:
+        filters &= Q(customer__user__username__icontains=customer)
+
+    if phone:
+        filters &= Q(customer__phone_number__icontains=phone)
+
+    if pincode:
+        filters &= Q(customer__pincode__icontains=pincode)
+
+    if razorpay_id:
+        filters &= (
+            Q(razorpay_order_id__icontains=razorpay_id)
+            | Q(razorpay_payment_id__icontains=razorpay_id)
+        )
+
+    # plain comparisons on the columns themselves, so order_status_date_id_idx /
+    # order_created_id_idx serve them: statuses are stored lower case, and the
+    # local dates become created_at bounds (__date casts every row)
+    if params.get('status'):
+        filters &= Q(status=params['status'].lower())
+
+    date_from = _day_start(params.get('date_from'))
+    if date_from:
+        filters &= Q(created_at__gte=date_from)
+
+    date_to = _day_start(params.get('date_to'), days=1)
+    if date_to:
+        filters &= Q(created_at__lt=date_to)
+
+    if params.get('total_min'):
+        filters &= Q(total_amount__gte=params['total_min'])
+
+    if params.get('total_max'):
+        filters &= Q(total_amount__lte=params['total_max'])
+
+    if q:
+        # one search box: customer, phone, pincode, Razorpay ids, order number
+        customer_ids = _search_customers(q)
+        if customer_ids is None:
+            by_customer = Q(customer__in=models.Customer.objects.filter(
+                Q(user__username__icontains=q)
+                | Q(phone_number__icontains=q)
+                | Q(pincode__icontains=q)
+            ))
+        else:
+            # literal id list → an index scan on customer_id, OR-able with
+            # the Razorpay trigram indexes in one bitmap scan
+            by_customer = Q(customer_id__in=customer_ids)
+
+        search = (
+            by_customer
+            | Q(razorpay_order_id__icontains=q)
+            | Q(razorpay_payment_id__icontains=q)
+        )
+        if q.isdigit():
+            search |= Q(id=int(q))
+        filters &= search
+
+    orders = orders.filter(filters)
+
+    if flower_name:
+        orders = orders.filter(Exists(
+            models.OrderItem.objects.filter(
+                order_id=OuterRef('pk'),
+                flower_name__icontains=flower_name,
+            )
+        ))
+    return orders
@@ -0,0 +1,199 @@
+"""
+Flash-sale gate for checkout.
+
+For flowers with flash_sale=True, sellable stock is mirrored into Redis and
+taken with one Lua script (all-or-nothing for the basket) before checkout
+reaches Postgres. Buyers who lose get an immediate 409 instead of queueing on
+the flower's row lock. Winners still go through the normal guarded UPDATE, so
+Postgres stays the source of truth: a stale Redis count can only let a few
+extra buyers through to that guard, never oversell.
+
+A failed checkout gives its units back. The reconcile_flash_sale_stock beat
+task resets Redis from the database to clear any drift.
+"""
+import logging
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+
+from flowerapp import models
+
+logger = logging.getLogger(__name__)
+
+FLASH_FLOWERS_KEY = 'flash:flowers'
+
+
+def stock_key(flower_id):
+    return f'flash:stock:{flower_id}'
+
+
+# KEYS: flash set, then one stock key per basket flower
+# ARGV: flower_id, qty pairs in the same order
+# → {'ok', id, qty, ...} taken | {'short', id, left, ...} | {'missing', id, ...}
+TAKE_SCRIPT = """
+local taken, short, missing = {}, {}, {}
+for i = 2, #KEYS do
+    local id  = ARGV[2 * i - 3]
+    local qty = tonumber(ARGV[2 * i - 2])
+    if redis.call('SISMEMBER', KEYS[1], id) == 1 then
+        local left = redis.call('GET', KEYS[i])
+        if not left then
+            missing[#missing + 1] = id
+        elseif tonumber(left) < qty then
+            short[#short + 1] = id
+            short[#short + 1] = left
+        else
+            taken[#taken + 1] = i
+        end
+    end
+end
+if #missing > 0 then
+    table.insert(missing, 1, 'missing')
+    return missing
+end
+if #short > 0 then
+    table.insert(short, 1, 'short')
+    return short
+end
+local result = {'ok'}
+for _, i in ipairs(taken) do
+    redis.call('DECRBY', KEYS[i], ARGV[2 * i - 2])
+    result[#result + 1] = ARGV[2 * i - 3]
+    result[#result + 1] = ARGV[2 * i - 2]
+end
+return result
+"""
+
+# KEYS: stock keys, ARGV: qtys — only keys still mirrored get stock back
+GIVE_BACK_SCRIPT = """
+for i = 1, #KEYS do
+    if redis.call('EXISTS', KEYS[i]) == 1 then
+        redis.call('INCRBY', KEYS[i], ARGV[i])
+    end
+end
+return #KEYS
+"""
+
+
+class SoldOut(Exception):
+    """Raised when a flash-sale flower in the basket can't cover its quantity."""
+
+    def __init__(self, shortages):
+        self.shortages = shortages
+        super().__init__('Sold out!')
+
+    def as_response_data(self):
+        return {'error': str(self), 'sold_out': self.shortages}
+
+
+@lru_cache(maxsize=None)
+def get_redis():
+    return redis.Redis.from_url(settings.REDIS_URL)
+
+
+@lru_cache(maxsize=None)
+def _scripts():
+    client = get_redis()
+    return client.register_script(TAKE_SCRIPT), client.register_script(GIVE_BACK_SCRIPT)
+
+
+def _decode(values):
+    return [v.decode() if isinstance(v, bytes) else v for v in values]
+
+
+def _pairs(values):
+    return [(int(values[i]), int(values[i + 1])) for i in range(0, len(values), 2)]
+
+
+def take(flower_counts):
+    """
+    Take the flash-sale part of {flower_id: qty} in Redis.
+    Returns {flower_id: qty} taken (empty when nothing in the basket is on
+    flash sale, or Redis is down — the DB guard still applies then).
+    Raises SoldOut listing every short flower.
+    """
+    items = sorted(flower_counts.items())
+    keys  = [FLASH_FLOWERS_KEY] + [stock_key(fl_id) for fl_id, _ in items]
+    args  = [value for item in items for value in item]
+    take_script, _ = _scripts()
+
+    try:
+        for _attempt in range(2):
+            status, *rest = _decode(take_script(keys=keys, args=args))
+            if status != 'missing':
+                break
+            # flagged but not mirrored yet (Redis restart / just enabled)
+            sync_flowers([int(fl_id) for fl_id in rest])
+        else:
+            return {}
+    except redis.RedisError:
+        logger.exception('Flash-sale gate unavailable, falling back to the DB guard')
+        return {}
+
+    if status == 'short':
+        raise SoldOut([
+            {'flower_id': fl_id, 'requested': flower_counts[fl_id], 'available': max(left, 0)}
+            for fl_id, left in _pairs(rest)
+        ])
+    return dict(_pairs(rest))
+
+
+def give_back(taken):
+    """Return units taken by a checkout that didn't go through."""
+    if not taken:
+        return
+    items = sorted(taken.items())
+    _, give_back_script = _scripts()
+    try:
+        give_back_script(
+            keys=[stock_key(fl_id) for fl_id, _ in items],
+            args=[qty for _, qty in items],
+        )
+    except redis.RedisError:
+        # reconcile_flash_sale_stock will catch up
+        logger.exception('Could not give back flash-sale stock %s', taken)
+
+
+def _available(row):
+    return max(row['stock'] - row['reserved_stock'], 0)
+
+
+def sync_flowers(flower_ids):
+    """Mirror these flowers' flag and available stock from the DB into Redis."""
+    rows = models.Flower.objects.filter(id__in=flower_ids).values(
+        'id', 'flash_sale', 'stock', 'reserved_stock'
+    )
+    seen = set()
+    pipe = get_redis().pipeline()
+    for row in rows:
+        seen.add(row['id'])
+        if row['flash_sale']:
+            pipe.set(stock_key(row['id']), _available(row))
+            pipe.sadd(FLASH_FLOWERS_KEY, row['id'])
+        else:
+            pipe.srem(FLASH_FLOWERS_KEY, row['id'])
+            pipe.delete(stock_key(row['id']))
+    for flower_id in set(flower_ids) - seen:  # deleted flowers
+        pipe.srem(FLASH_FLOWERS_KEY, flower_id)
+        pipe.delete(stock_key(flower_id))
+    pipe.execute()
+
+
+def sync_flowers_safely(flower_ids):
+    try:
+        sync_flowers(flower_ids)
+    except redis.RedisError:
+        logger.exception('Could not sync flash-sale stock for %s', flower_ids)
+
+
+def reconcile():
+    """
+    Reset every mirrored count to the DB's available stock and drop flowers
+    that left the sale. Returns the number of flash-sale flowers.
+    """
+    client  = get_redis()
+    flagged = set(models.Flower.objects.filter(flash_sale=True).values_list('id', flat=True))
+    stale   = {int(fl_id) for fl_id in client.smembers(FLASH_FLOWERS_KEY)} - flagged
+    sync_flowers(flagged | stale)
+    return len(flagged)
@@ -0,0 +1,79 @@
+"""
+Idempotency keys for checkout, answered from Redis.
+
+The first request claims `idem:<user>:<key>` with SET NX (cache.add) and, once
+it succeeds, stores its response there. Retries get that stored response
+without touching Postgres; a retry that arrives while the first is still
+running gets 409. The (customer, idempotency_key) unique constraint on Order
+is the durable backstop when the cache entry is gone — and the only guard
+while Redis is unreachable: requests then run straight through to it.
+"""
+import logging
+
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+IN_PROGRESS = 'in-progress'
+
+
+def _key(user_id, idempotency_key):
+    return f'idem:{user_id}:{idempotency_key}'
+
+
+def run_once(user_id, idempotency_key, handler):
+    """
+    Call handler() at most once per (user, key) and replay its 2xx response.
+    Non-2xx responses and exceptions free the key so the client can retry.
+    """
+    key = _key(user_id, idempotency_key)
+    try:
+        stored = cache.get(key)
+        if isinstance(stored, dict):
+            return Response(stored['data'], status=stored['status'])
+
+        # claim expires on its own if this worker dies mid-request
+        if stored == IN_PROGRESS or not cache.add(
+            key, IN_PROGRESS, settings.IDEMPOTENCY_CLAIM_TIMEOUT
+        ):
+            stored = cache.get(key)
+            if isinstance(stored, dict):
+                return Response(stored['data'], status=stored['status'])
+            return Response(
+                {'error': 'A request with this idempotency key is already in progress'},
+                status=409
+            )
+    except redis.RedisError:
+        # handlers look the key up in Postgres and catch the unique violation
+        logger.warning('Idempotency cache unavailable, relying on the order constraint', exc_info=True)
+        return handler()
+
+    try:
+        response = handler()
+    except Exception:
+        _release(key)
+        raise
+
+    if 200 <= response.status_code < 300:
+        try:
+            cache.set(
+                key,
+                {'status': response.status_code, 'data': response.data},
+                settings.IDEMPOTENCY_TTL
+            )
+        except redis.RedisError:
+            logger.warning('Could not store idempotent response for %s', key, exc_info=True)
+    else:
+        _release(key)
+    return response
+
+
+def _release(key):
+    try:
+        cache.delete(key)
+    except redis.RedisError:
+        # the claim times out on its own (IDEMPOTENCY_CLAIM_TIMEOUT)
+        logger.warning('Could not release idempotency claim %s', key, exc_info=True)
@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from flowerapp import models
+from flowerapp.snapshots import summary
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill order item snapshots (flower name / image) and order item "
+        "summaries for orders placed before they existed. Safe to re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Orders per transaction (default: {DEFAULT_BATCH_SIZE})",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        last_id = 0
+        orders_done = items_done = 0
+
+        while True:
+            # id cursor: orders without items (rejected / queued) stay at 0
+            # and must not be picked up again
+            order_ids = list(
+                models.Order.objects.filter(item_count=0, id__gt=last_id)
+                .order_by("id").values_list("id", flat=True)[:batch_size]
+            )
+            if not order_ids:
+                break
+            last_id = order_ids[-1]
+
+            with transaction.atomic():
+                orders, items = self._backfill(order_ids)
+            orders_done += orders
+            items_done  += items
+
+        self.stdout.write(
+            self.style.SUCCESS(f"{orders_done} orders summarised, {items_done} items snapshotted.")
+        )
+
+    def _backfill(self, order_ids):
+        items = list(
+            models.OrderItem.objects.filter(order_id__in=order_ids)
+            .select_related("flower").order_by("id")
+        )
+
+        stale = []
+        lines = {}
+        for item in items:
+            if not item.flower_name and item.flower is not None:
+                item.flower_name  = item.flower.name
+                item.flower_image = item.flower.image.name or ""
+                stale.append(item)
+            lines.setdefault(item.order_id, []).append((item.flower_name, item.quantity))
+        models.OrderItem.objects.bulk_update(stale, ["flower_name", "flower_image"])
+
+        now = timezone.now()
+        orders = [
+            models.Order(id=order_id, updated_at=now, **summary(order_lines))
+            for order_id, order_lines in lines.items()
+        ]
+        models.Order.objects.bulk_update(orders, ["item_count", "item_summary", "updated_at"])
+        return len(orders), len(stale)
@@ -0,0 +1,309 @@
+import json
+import multiprocessing
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Sum
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from flowerapp import flashsale, models, payments
+from flowerapp.checkout import process_batch
+
+ENDPOINTS = {
+    # name → (url name, query string, extra payload)
+    "buy-now":        ("buy-now", "", {}),
+    "buy-now-async":  ("buy-now", "?mode=async", {}),
+    "create-payment": ("create-payment", "", {"amount": 1}),
+}
+
+BENCH_PINCODE = "688524"
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _checkout(spec):
+    """One checkout request. Module level so process pools can pickle it."""
+    user   = User.objects.get(id=spec["user_id"])
+    client = APIClient()
+    client.force_authenticate(user)
+
+    start    = time.perf_counter()
+    response = client.post(spec["path"], spec["payload"], format="json")
+    elapsed  = time.perf_counter() - start
+
+    error = None
+    if response.status_code >= 500:
+        error = response.content[:200].decode("utf-8", "replace")
+    return {"status": response.status_code, "latency": elapsed, "error": error}
+
+
+def _close_connection(_=None):
+    connection.close()
+
+
+class LockSampler(threading.Thread):
+    """Samples pg_stat_activity for backends waiting on a lock."""
+
+    def __init__(self, interval):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples  = []
+        self.stopped  = threading.Event()
+
+    def run(self):
+        try:
+            with connection.cursor() as cursor:
+                while not self.stopped.is_set():
+                    cursor.execute(
+                        "SELECT count(*) FROM pg_stat_activity "
+                        "WHERE datname = current_database() AND wait_event_type = 'Lock'"
+                    )
+                    self.samples.append(cursor.fetchone()[0])
+                    time.sleep(self.interval)
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        return {
+            "lock_wait_seconds_est": round(sum(self.samples) * self.interval, 3),
+            "max_lock_waiters":      max(self.samples, default=0),
+            "lock_samples":          len(self.samples),
+        }
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark concurrent checkouts against the configured (Postgres) database: "
+        "seeds flowers + customers, fires checkouts with hot-flower skew and prints "
+        "JSON with throughput, latency percentiles, deadlocks, lock waits and oversell. "
+        "Needs Redis (idempotency cache) like the app itself; payments use the fake gateway."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="buy-now")
+        parser.add_argument("--flowers", type=int, default=20, help="Flowers to seed (default: 20)")
+        parser.add_argument("--customers", type=int, default=50, help="Customers to seed (default: 50)")
+        parser.add_argument("--stock", type=int, default=100, help="Initial stock per flower (default: 100)")
+        parser.add_argument("--requests", type=int, default=500, help="Checkouts to fire (default: 500)")
+        parser.add_argument("--concurrency", type=int, default=16, help="Parallel buyers (default: 16)")
+        parser.add_argument("--workers", choices=["threads", "processes"], default="threads")
+        parser.add_argument("--basket-size", type=int, default=3, help="Distinct flowers per basket (default: 3)")
+        parser.add_argument("--max-qty", type=int, default=2, help="Max quantity per flower (default: 2)")
+        parser.add_argument("--hot-flowers", type=int, default=1, help="How many flowers are 'hot' (default: 1)")
+        parser.add_argument(
+            "--hot-share", type=float, default=0.8,
+            help="Chance each basket slot picks a hot flower (default: 0.8)",
+        )
+        parser.add_argument("--flash-sale", action="store_true", help="Put the hot flowers on flash sale")
+        parser.add_argument("--sample-interval", type=float, default=0.01, help="Lock sampling period, s")
+        parser.add_argument("--seed", type=int, default=None, help="Random seed (reproducible baskets)")
+        parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+        parser.add_argument("--keep", action="store_true", help="Keep the seeded rows")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("bench_checkout needs PostgreSQL (row locks, pg_stat_* views).")
+        if options["hot_flowers"] > options["flowers"] or options["basket_size"] > options["flowers"]:
+            raise CommandError("--hot-flowers and --basket-size must not exceed --flowers.")
+
+        rng    = random.Random(options["seed"])
+        run_id = uuid.uuid4().hex[:8]
+        self.stderr.write(f"bench {run_id}: seeding…")
+        flower_ids, user_ids = self._seed(run_id, options)
+
+        try:
+            with override_settings(PAYMENT_GATEWAY="flowerapp.payments.FakeRazorpayGateway"):
+                payments.get_gateway.cache_clear()
+                report = self._run(run_id, rng, flower_ids, user_ids, options)
+        finally:
+            payments.get_gateway.cache_clear()
+            if not options["keep"]:
+                self._cleanup(flower_ids, user_ids)
+
+        output = json.dumps(report, indent=2, default=str)
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                fh.write(output + "\n")
+            self.stderr.write(self.style.SUCCESS(f"report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    # -------- setup / teardown --------
+
+    def _seed(self, run_id, options):
+        flowers = models.Flower.objects.bulk_create([
+            models.Flower(
+                name=f"bench-{run_id}-{i}",
+                description="checkout benchmark",
+                price=Decimal("100.00"),
+                stock=options["stock"],
+                flash_sale=options["flash_sale"] and i < options["hot_flowers"],
+            )
+            for i in range(options["flowers"])
+        ])
+        flower_ids = [flower.id for flower in flowers]
+        if options["flash_sale"]:
+            flashsale.sync_flowers_safely(flower_ids)
+
+        users = User.objects.bulk_create([
+            User(username=f"bench_{run_id}_{i}", email=f"bench_{run_id}_{i}@example.com")
+            for i in range(options["customers"])
+        ])
+        models.Customer.objects.bulk_create([
+            models.Customer(user=user, address="bench", pincode=BENCH_PINCODE)
+            for user in users
+        ])
+        return flower_ids, [user.id for user in users]
+
+    def _cleanup(self, flower_ids, user_ids):
+        # users cascade to customers → orders → items / holds / refunds
+        User.objects.filter(id__in=user_ids).delete()
+        models.Flower.objects.filter(id__in=flower_ids).delete()
+        flashsale.sync_flowers_safely(flower_ids)
+
+    # -------- run --------
+
+    def _basket(self, rng, flower_ids, options):
+        hot, cold = flower_ids[:options["hot_flowers"]], flower_ids[options["hot_flowers"]:]
+        picked = set()
+        while len(picked) < options["basket_size"]:
+            pool = hot if (rng.random() < options["hot_share"] or not cold) else cold
+            picked.add(rng.choice(pool))
+        basket = []
+        for flower_id in sorted(picked):
+            basket.extend([flower_id] * rng.randint(1, options["max_qty"]))
+        return basket
+
+    def _run(self, run_id, rng, flower_ids, user_ids, options):
+        url_name, query, extra = ENDPOINTS[options["endpoint"]]
+        path  = reverse(url_name) + query
+        specs = [
+            {
+                "path":    path,
+                "user_id": rng.choice(user_ids),
+                "payload": {
+                    "flowers":         self._basket(rng, flower_ids, options),
+                    "idempotency_key": f"bench-{run_id}-{n}",
+                    "pincode":         BENCH_PINCODE,
+                    "address":         "bench",
+                    **extra,
+                },
+            }
+            for n in range(options["requests"])
+        ]
+
+        deadlocks_before = self._deadlocks()
+        sampler = LockSampler(options["sample_interval"])
+        sampler.start()
+
+        self.stderr.write(
+            f"bench {run_id}: {len(specs)} × {options['endpoint']} "
+            f"with {options['concurrency']} {options['workers']}…"
+        )
+        start = time.perf_counter()
+        if options["workers"] == "processes":
+            connections.close_all()  # children must not share the parent's socket
+            # fork: children inherit the fake-gateway settings override
+            context = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(max_workers=options["concurrency"], mp_context=context) as pool:
+                results = list(pool.map(_checkout, specs, chunksize=4))
+        else:
+            with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+                results = list(pool.map(_checkout, specs))
+                list(pool.map(_close_connection, range(options["concurrency"])))
+        wall = time.perf_counter() - start
+
+        drain = None
+        if options["endpoint"] == "buy-now-async":
+            drain_start = time.perf_counter()
+            while process_batch():
+                pass
+            drain = round(time.perf_counter() - drain_start, 3)
+
+        locks = sampler.stop()
+        time.sleep(0.5)  # let pg_stat_database catch up
+        deadlocks = self._deadlocks() - deadlocks_before
+
+        latencies = sorted(r["latency"] * 1000 for r in results)
+        statuses  = {}
+        for result in results:
+            statuses[str(result["status"])] = statuses.get(str(result["status"]), 0) + 1
+        errors = [r["error"] for r in results if r["error"]][:10]
+
+        return {
+            "run_id": run_id,
+            "config": {
+                key: options[key] for key in (
+                    "endpoint", "flowers", "customers", "stock", "requests",
+                    "concurrency", "workers", "basket_size", "max_qty",
+                    "hot_flowers", "hot_share", "flash_sale", "seed",
+                )
+            },
+            "wall_seconds":   round(wall, 3),
+            "throughput_rps": round(len(results) / wall, 2) if wall else None,
+            "latency_ms": {
+                "p50":  _round(_percentile(latencies, 50)),
+                "p95":  _round(_percentile(latencies, 95)),
+                "p99":  _round(_percentile(latencies, 99)),
+                "max":  _round(latencies[-1] if latencies else None),
+                "mean": _round(sum(latencies) / len(latencies) if latencies else None),
+            },
+            "statuses":             statuses,
+            "async_drain_seconds":  drain,
+            "deadlocks":            deadlocks,
+            "deadlock_errors":      sum(1 for r in results if r["error"] and "deadlock" in r["error"]),
+            **locks,
+            **self._stock_check(flower_ids, options["stock"]),
+            "sample_errors":        errors,
+        }
+
+    def _deadlocks(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_stat_clear_snapshot()")
+            cursor.execute(
+                "SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()"
+            )
+            return cursor.fetchone()[0]
+
+    def _stock_check(self, flower_ids, initial):
+        """
+        Oversell: units promised to orders beyond a flower's initial stock.
+        Drift: flowers whose stock + holds don't match what orders took.
+        """
+        promised = dict(
+            models.OrderItem.objects.filter(
+                flower_id__in=flower_ids,
+                order__status__in=("confirmed", "payment_pending"),
+            ).values_list("flower_id").annotate(qty=Sum("quantity")).order_by()
+        )
+        oversold = drifted = 0
+        for flower in models.Flower.objects.filter(id__in=flower_ids):
+            taken = (initial - flower.stock) + flower.reserved_stock
+            qty   = promised.get(flower.id, 0)
+            oversold += max(qty - initial, 0)
+            drifted  += int(taken != qty)
+        return {
+            "units_sold":      sum(promised.values()),
+            "oversell_units":  oversold,
+            "drifted_flowers": drifted,
+        }
+
+
+def _round(value):
+    return None if value is None else round(value, 2)
@@ -0,0 +1,125 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Prefetch
+from rest_framework.renderers import JSONRenderer
+
+from flowerapp import models, projections, serializers
+
+
+class Command(BaseCommand):
+    help = (
+        "Check that the values() projections render byte-identical JSON to the "
+        "DRF serializers, then benchmark both on the current database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=200,
+            help="Rows per list, like the admin order page_size=200 (default: 200)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Timed runs per variant (default: 20)",
+        )
+        parser.add_argument(
+            "--skip-bench",
+            action="store_true",
+            help="Only run the parity check.",
+        )
+
+    def handle(self, *args, **options):
+        limit  = max(1, options["limit"])
+        repeat = max(1, options["repeat"])
+
+        cases = [
+            ("flowers", *self._flower_case(limit)),
+            ("orders",  *self._order_case(limit)),
+            ("carts",   *self._cart_case(limit)),
+        ]
+
+        renderer = JSONRenderer()
+        for name, via_serializer, via_projection in cases:
+            expected = renderer.render(via_serializer())
+            actual   = renderer.render(via_projection())
+            if expected != actual:
+                raise CommandError(
+                    f"{name}: projection output differs from the serializer\n"
+                    f"serializer: {expected[:500]!r}\nprojection: {actual[:500]!r}"
+                )
+            self.stdout.write(self.style.SUCCESS(f"{name}: parity OK"))
+
+        if options["skip_bench"]:
+            return
+
+        for name, via_serializer, via_projection in cases:
+            slow = self._time(via_serializer, repeat)
+            fast = self._time(via_projection, repeat)
+            self.stdout.write(
+                f"{name:<8} serializer {slow * 1000:8.2f} ms   "
+                f"projection {fast * 1000:8.2f} ms   "
+                f"speedup {slow / fast if fast else float('inf'):5.1f}x"
+            )
+
+    # -------- cases: (serializer path, projection path) --------
+
+    def _flower_case(self, limit):
+        def via_serializer():
+            flowers = models.Flower.objects.select_related("category").order_by("id")[:limit]
+            return serializers.FlowerSerializer(flowers, many=True).data
+
+        def via_projection():
+            rows = models.Flower.objects.order_by("id").values(*projections.FLOWER_VALUES)[:limit]
+            return projections.flower_rows(rows)
+
+        return via_serializer, via_projection
+
+    def _order_case(self, limit):
+        def via_serializer():
+            orders = models.Order.objects.prefetch_related(
+                Prefetch(
+                    "items",
+                    queryset=models.OrderItem.objects.order_by("id"),
+                )
+            ).select_related("customer", "customer__user").order_by("-created_at", "-id")[:limit]
+            return serializers.OrderSerializer(orders, many=True).data
+
+        def via_projection():
+            rows = models.Order.objects.order_by("-created_at", "-id").values(
+                *projections.ORDER_VALUES
+            )[:limit]
+            return projections.order_rows(rows)
+
+        return via_serializer, via_projection
+
+    def _cart_case(self, limit):
+        cart_ids = list(models.Cart.objects.order_by("id").values_list("id", flat=True)[:limit])
+
+        def via_serializer():
+            carts = models.Cart.objects.filter(id__in=cart_ids).prefetch_related(
+                Prefetch(
+                    "items",
+                    queryset=models.CartItem.objects.select_related("flower").order_by("id"),
+                )
+            ).order_by("id")
+            return [serializers.CartSerializer(cart).data for cart in carts]
+
+        def via_projection():
+            carts = models.Cart.objects.filter(id__in=cart_ids).order_by("id")
+            return [projections.cart_data(cart) for cart in carts]
+
+        return via_serializer, via_projection
+
+    @staticmethod
+    def _time(fn, repeat):
+        fn()  # warm up querysets / connection
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        return best
@@ -0,0 +1,50 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from flowerapp.catalog_import import DEFAULT_BATCH_SIZE, import_flowers
+
+
+class Command(BaseCommand):
+    help = "Bulk create/update flowers from a CSV or JSON Lines file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSON Lines file ('-' for stdin)")
+        parser.add_argument(
+            "--format",
+            dest="input_format",
+            choices=["csv", "jsonl"],
+            help="Input format (default: from the file extension, else jsonl)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Rows per transaction (default: {DEFAULT_BATCH_SIZE})",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        input_format = options["input_format"] or ("csv" if path.endswith(".csv") else "jsonl")
+        batch_size = max(1, options["batch_size"])
+
+        if path == "-":
+            report = import_flowers(sys.stdin.buffer, input_format, batch_size)
+        else:
+            try:
+                with open(path, "rb") as lines:
+                    report = import_flowers(lines, input_format, batch_size)
+            except OSError as exc:
+                raise CommandError(f"Cannot read {path}: {exc}")
+
+        for error in report["errors"]:
+            self.stderr.write(f"line {error['line']}: {json.dumps(error['errors'])}")
+
+        style = self.style.SUCCESS if not report["failed"] else self.style.WARNING
+        self.stdout.write(
+            style(
+                f"{report['created']} created, {report['updated']} updated, "
+                f"{report['failed']} failed in {report['batches']} batches."
+            )
+        )
@@ -0,0 +1,64 @@
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from flowerapp import models
+from flowerapp.rollups import DAYS_PER_BATCH, LAG, WATERMARK, order_days, rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the daily sales rollups from the raw orders. Run once without "
+        "--since/--until to seed history (the beat task only follows changes), "
+        "or over a range to repair it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="First order date to rebuild (YYYY-MM-DD)")
+        parser.add_argument("--until", help="Last order date to rebuild (YYYY-MM-DD)")
+        parser.add_argument(
+            "--batch-days",
+            type=int,
+            default=DAYS_PER_BATCH,
+            help=f"Days per transaction (default: {DAYS_PER_BATCH})",
+        )
+
+    def handle(self, *args, **options):
+        since = self._date(options["since"], "--since")
+        until = self._date(options["until"], "--until")
+
+        # a full rebuild covers everything before this, so the beat task can
+        # resume from here instead of starting over
+        high = timezone.now() - LAG
+
+        orders = models.Order.objects.all()
+        if since:
+            orders = orders.filter(created_at__gte=self._midnight(since))
+        if until:
+            orders = orders.filter(created_at__lt=self._midnight(until + timedelta(days=1)))
+        days = rebuild(order_days(orders), max(1, options["batch_days"]))
+
+        if not since and not until:
+            mark, _ = models.RollupWatermark.objects.get_or_create(name=WATERMARK)
+            if not mark.watermark or mark.watermark < high:
+                mark.watermark = high
+                mark.save(update_fields=["watermark", "updated_at"])
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(days)} days."))
+
+    @staticmethod
+    def _midnight(day):
+        return timezone.make_aware(datetime.combine(day, time.min))
+
+    def _date(self, value, option):
+        if not value:
+            return None
+        try:
+            day = parse_date(value)
+        except ValueError:
+            day = None
+        if not day:
+            raise CommandError(f"{option} must be YYYY-MM-DD")
+        return day
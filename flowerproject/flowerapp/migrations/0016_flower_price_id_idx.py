@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flowerapp', '0015_fcmtoken'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='flower',
+            index=models.Index(fields=['price', 'id'], name='flower_price_id_idx'),
+        ),
+    ]
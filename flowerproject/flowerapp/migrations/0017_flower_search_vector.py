@@ -0,0 +1,78 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:04
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+# search_vector is built in the database so bulk_create / bulk_update /
+# queryset.update() keep it fresh too. Weights: name A, category B,
+# description C, light requirement D.
+SEARCH_VECTOR_SQL = """
+CREATE OR REPLACE FUNCTION flowerapp_flower_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(
+            (SELECT c.name FROM flowerapp_category c WHERE c.id = NEW.category_id), ''
+        )), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(NEW.light_requirement, '')), 'D');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER flowerapp_flower_search_vector_trg
+    BEFORE INSERT OR UPDATE OF name, description, light_requirement, category_id
+    ON flowerapp_flower
+    FOR EACH ROW EXECUTE FUNCTION flowerapp_flower_search_vector();
+
+-- renaming a category re-indexes its flowers
+CREATE OR REPLACE FUNCTION flowerapp_category_search_vector() RETURNS trigger AS $$
+BEGIN
+    UPDATE flowerapp_flower SET name = name WHERE category_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER flowerapp_category_search_vector_trg
+    AFTER UPDATE OF name ON flowerapp_category
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE FUNCTION flowerapp_category_search_vector();
+
+-- backfill existing rows
+UPDATE flowerapp_flower SET name = name;
+"""
+
+DROP_SEARCH_VECTOR_SQL = """
+DROP TRIGGER IF EXISTS flowerapp_category_search_vector_trg ON flowerapp_category;
+DROP FUNCTION IF EXISTS flowerapp_category_search_vector();
+DROP TRIGGER IF EXISTS flowerapp_flower_search_vector_trg ON flowerapp_flower;
+DROP FUNCTION IF EXISTS flowerapp_flower_search_vector();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flowerapp', '0016_flower_price_id_idx'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='flower',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_SQL, DROP_SEARCH_VECTOR_SQL),
+        migrations.AddIndex(
+            model_name='flower',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='flower_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='flower',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='flower_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
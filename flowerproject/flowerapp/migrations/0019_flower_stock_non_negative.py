@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flowerapp', '0018_order_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='flower',
+            constraint=models.CheckConstraint(condition=models.Q(('stock__gte', 0)), name='flower_stock_non_negative'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flowerapp', '0019_flower_stock_non_negative'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='flower',
+            name='reserved_stock',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='StockHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('flower', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_holds', to='flowerapp.flower')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_holds', to='flowerapp.order')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['expires_at'], name='stockhold_expires_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:10
+
+from django.db import migrations, models
+
+
+def clear_duplicate_keys(apps, schema_editor):
+    """Keep the key on the first order of each duplicate pair so the constraint can apply."""
+    Order = apps.get_model('flowerapp', 'Order')
+    duplicates = (
+        Order.objects.exclude(idempotency_key=None)
+        .values('customer_id', 'idempotency_key')
+        .annotate(first_id=models.Min('id'), total=models.Count('id'))
+        .filter(total__gt=1)
+    )
+    for row in duplicates:
+        Order.objects.filter(
+            customer_id=row['customer_id'],
+            idempotency_key=row['idempotency_key'],
+        ).exclude(id=row['first_id']).update(idempotency_key=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flowerapp', '0020_stockhold'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_duplicate_keys, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='order',
+            constraint=models.UniqueConstraint(fields=('customer', 'idempotency_key'), name='order_customer_idempotency_uniq'),
+        ),
+    ]
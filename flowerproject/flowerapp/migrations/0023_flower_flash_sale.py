@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flowerapp', '0022_refund'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='flower',
+            name='flash_sale',
+            field=models.BooleanField(default=False),
+        ),
+    ]
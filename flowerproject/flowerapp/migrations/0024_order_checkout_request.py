@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flowerapp', '0023_flower_flash_sale'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='checkout_request',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('rejected', 'Rejected'), ('payment_pending', 'Payment Pending'), ('payment_failed', 'Payment Failed'), ('confirmed', 'Confirmed'), ('processing', 'Processing'), ('shipped', 'Shipped'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled'), ('refunded', 'Refunded')], default='payment_pending', max_length=20),
+        ),
+    ]
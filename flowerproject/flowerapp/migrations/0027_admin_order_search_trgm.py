@@ -0,0 +1,50 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:50
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+# auth_user isn't ours to declare indexes on. Same expression Django emits
+# for username__icontains: UPPER(username::text) LIKE UPPER('%..%').
+USERNAME_TRGM_SQL = (
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS flowerapp_user_username_trgm_idx '
+    'ON auth_user USING gin ((UPPER(username::text)) gin_trgm_ops)'
+)
+USERNAME_TRGM_REVERSE_SQL = 'DROP INDEX CONCURRENTLY IF EXISTS flowerapp_user_username_trgm_idx'
+
+
+class Migration(migrations.Migration):
+
+    # CONCURRENTLY: orders stays writable while the indexes build
+    atomic = False
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('flowerapp', '0026_outboxevent'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='flower',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='flower_name_upper_trgm_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='customer',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('phone_number'), name='gin_trgm_ops'), name='customer_phone_trgm_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='customer',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('pincode'), name='gin_trgm_ops'), name='customer_pincode_trgm_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='order',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('razorpay_order_id'), name='gin_trgm_ops'), name='order_rp_order_trgm_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='order',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('razorpay_payment_id'), name='gin_trgm_ops'), name='order_rp_payment_trgm_idx'),
+        ),
+        migrations.RunSQL(USERNAME_TRGM_SQL, USERNAME_TRGM_REVERSE_SQL),
+    ]
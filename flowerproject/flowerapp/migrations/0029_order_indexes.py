@@ -0,0 +1,57 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:05
+
+from django.db import migrations, models
+
+
+# Declared on Order.Meta but never migrated. IF NOT EXISTS: databases that
+# picked them up from an untracked migration are left as they are.
+ORDER_INDEXES = [
+    ('order_created_idx',       '("created_at" DESC)',                models.Index(fields=['-created_at'], name='order_created_idx')),
+    ('order_amount_idx',        '("total_amount")',                   models.Index(fields=['total_amount'], name='order_amount_idx')),
+    ('order_razorpay_idx',      '("razorpay_order_id")',              models.Index(fields=['razorpay_order_id'], name='order_razorpay_idx')),
+    ('order_status_date_idx',   '("status", "created_at" DESC)',      models.Index(fields=['status', '-created_at'], name='order_status_date_idx')),
+    ('order_customer_date_idx', '("customer_id", "created_at" DESC)', models.Index(fields=['customer', '-created_at'], name='order_customer_date_idx')),
+]
+
+# Redundant, dropped from Order.Meta — gone wherever they were built
+DROPPED_INDEXES = ['order_status_idx', 'order_payment_status_idx']
+
+
+class Migration(migrations.Migration):
+
+    # CONCURRENTLY: orders stays writable while the indexes build
+    atomic = False
+
+    dependencies = [
+        ('flowerapp', '0028_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" ON "flowerapp_order" {columns}',
+                    f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"',
+                )
+                for name, columns, _ in ORDER_INDEXES
+            ],
+            state_operations=[
+                migrations.AddIndex(model_name='order', index=index)
+                for _, _, index in ORDER_INDEXES
+            ],
+        ),
+        *[
+            migrations.RunSQL(
+                f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"',
+                migrations.RunSQL.noop,
+            )
+            for name in DROPPED_INDEXES
+        ],
+        # order_customer_date_idx leads with customer_id — FK lookups and
+        # cascades use it, so the FK's own index only costs writes
+        migrations.AlterField(
+            model_name='order',
+            name='customer',
+            field=models.ForeignKey(db_index=False, on_delete=models.deletion.CASCADE, related_name='orders', to='flowerapp.customer'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # existing rows are filled by `manage.py backfill_order_snapshots`
+
+    dependencies = [
+        ('flowerapp', '0029_order_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='item_summary',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='flower_image',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='flower_name',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='orderitem',
+            name='flower',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='flowerapp.flower'),
+        ),
+        migrations.AlterField(
+            model_name='dailysalesrollup',
+            name='flower',
+            field=models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='flowerapp.flower'),
+        ),
+    ]
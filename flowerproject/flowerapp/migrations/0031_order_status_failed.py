@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 22:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flowerapp', '0030_order_item_snapshots'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('rejected', 'Rejected'), ('failed', 'Failed'), ('payment_pending', 'Payment Pending'), ('payment_failed', 'Payment Failed'), ('confirmed', 'Confirmed'), ('processing', 'Processing'), ('shipped', 'Shipped'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled'), ('refunded', 'Refunded')], default='payment_pending', max_length=20),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 22:30
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    # CONCURRENTLY: order items stay writable while the index builds.
+    # The admin ?flower_name= search now matches OrderItem.flower_name, so
+    # the UPPER(name) index on flowers has no reader left.
+    atomic = False
+
+    dependencies = [
+        ('flowerapp', '0031_order_status_failed'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='orderitem',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('flower_name'), name='gin_trgm_ops'), name='orderitem_name_trgm_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='flower',
+            name='flower_name_upper_trgm_idx',
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 23:40
+
+from django.db import migrations, models
+
+
+# CHECK (stock >= 0) repeated the PositiveIntegerField check. The invariant the
+# guarded UPDATEs rely on is reserved_stock <= stock (available never < 0).
+# Rows an admin already edited below their holds are clamped first.
+CLAMP_SQL = 'UPDATE flowerapp_flower SET reserved_stock = stock WHERE reserved_stock > stock'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flowerapp', '0032_orderitem_name_trgm_idx'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CLAMP_SQL, migrations.RunSQL.noop),
+        migrations.RemoveConstraint(
+            model_name='flower',
+            name='flower_stock_non_negative',
+        ),
+        migrations.AddConstraint(
+            model_name='flower',
+            constraint=models.CheckConstraint(condition=models.Q(('reserved_stock__lte', models.F('stock'))), name='flower_reserved_within_stock'),
+        ),
+    ]
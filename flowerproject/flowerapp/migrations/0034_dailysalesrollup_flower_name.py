@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-18 23:55
+
+from django.db import migrations, models
+
+
+# Rows of live flowers take the current name; rows already NULL can't be told
+# apart here — rebuild_sales_rollups over their days splits them by name.
+BACKFILL_SQL = '''
+UPDATE flowerapp_dailysalesrollup r SET flower_name = f.name
+FROM flowerapp_flower f WHERE f.id = r.flower_id
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flowerapp', '0033_flower_reserved_within_stock'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailysalesrollup',
+            name='flower_name',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.8 on 2026-10-19 00:10
+
+from django.db import migrations, models
+
+
+# The admin keyset pages order by (created_at, id) / (total_amount, id), with
+# id as the tiebreaker — the indexes now end in id too. Built under new names
+# so the old ones keep serving until they are dropped.
+KEYSET_INDEXES = [
+    ('order_created_id_idx',     '("created_at", "id")',                  models.Index(fields=['created_at', 'id'], name='order_created_id_idx')),
+    ('order_amount_id_idx',      '("total_amount", "id")',                models.Index(fields=['total_amount', 'id'], name='order_amount_id_idx')),
+    ('order_status_date_id_idx', '("status", "created_at" DESC, "id" DESC)', models.Index(fields=['status', '-created_at', '-id'], name='order_status_date_id_idx')),
+]
+
+# the 0029 definitions, rebuilt on the way back
+REPLACED_INDEXES = [
+    ('order_created_idx',     '("created_at" DESC)'),
+    ('order_amount_idx',      '("total_amount")'),
+    ('order_status_date_idx', '("status", "created_at" DESC)'),
+]
+
+
+class Migration(migrations.Migration):
+
+    # CONCURRENTLY: orders stays writable while the indexes build
+    atomic = False
+
+    dependencies = [
+        ('flowerapp', '0034_dailysalesrollup_flower_name'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" ON "flowerapp_order" {columns}',
+                    f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"',
+                )
+                for name, columns, _ in KEYSET_INDEXES
+            ],
+            state_operations=[
+                migrations.AddIndex(model_name='order', index=index)
+                for _, _, index in KEYSET_INDEXES
+            ],
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"',
+                    f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" ON "flowerapp_order" {columns}',
+                )
+                for name, columns in REPLACED_INDEXES
+            ],
+            state_operations=[
+                migrations.RemoveIndex(model_name='order', name=name)
+                for name, _ in REPLACED_INDEXES
+            ],
+        ),
+    ]
@@ -1,7 +1,11 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models.functions import Upper
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
 import uuid
 # Create your models here.
 
@@ -54,6 +58,11 @@ class Flower(models.Model):
         default=0.00
     )
     stock = models.PositiveIntegerField(default=0)
+    # sum of active StockHold quantities — kept in step by stock.py,
+    # so available stock is one subtraction, not an aggregate
+    reserved_stock = models.PositiveIntegerField(default=0, editable=False)
+    # checkout is gated in Redis first (see flashsale.py)
+    flash_sale = models.BooleanField(default=False)
     image = models.ImageField(
         upload_to='flowers/',
         blank=True,
@@ -68,6 +77,9 @@ class Flower(models.Model):
     light_requirement = models.CharField(max_length=150, default='Bright Indirect')
     water_frequency = models.CharField(max_length=80, default='Weekly')
     temperature = models.CharField(max_length=70, default='18–30°C')
+    # maintained by a DB trigger (migration 0017) from name, category name,
+    # description and light_requirement — never set it from Python
+    search_vector = SearchVectorField(null=True, editable=False)
     class Meta:
         indexes = [
             # filter by category frequently
@@ -79,6 +91,12 @@ class Flower(models.Model):
                 name='flower_price_idx'
             ),
 
+            # keyset pagination seeks on (price, id)
+            models.Index(
+                fields=['price', 'id'],
+                name='flower_price_id_idx'
+            ),
+
             # filter in_stock
             # you probably filter stock > 0
             models.Index(
@@ -91,11 +109,38 @@ class Flower(models.Model):
                 fields=['name'],
                 name='flower_name_idx'
             ),
+
+            # full-text search
+            GinIndex(
+                fields=['search_vector'],
+                name='flower_search_idx'
+            ),
+
+            # typo-tolerant name search (pg_trgm)
+            GinIndex(
+                fields=['name'],
+                opclasses=['gin_trgm_ops'],
+                name='flower_name_trgm_idx'
+            ),
+        ]
+        constraints = [
+            # last line of defence against overselling: holds never exceed
+            # the shelf, so available stock can't go negative — checkout
+            # reserves with a guarded UPDATE (see stock.py)
+            models.CheckConstraint(
+                condition=models.Q(reserved_stock__lte=models.F('stock')),
+                name='flower_reserved_within_stock'
+            ),
         ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def available_stock(self):
+        # admins may lower stock below what is held
+        return max(self.stock - self.reserved_stock, 0)
+
 class Customer(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     phone_number = models.CharField(max_length=15, blank=True, null=True)
@@ -117,6 +162,16 @@ class Customer(models.Model):
                 fields=['phone_number'],
                 name='customer_phone_idx'
             ),
+
+            # admin order search (icontains → UPPER(col) LIKE '%..%')
+            GinIndex(
+                OpClass(Upper('phone_number'), name='gin_trgm_ops'),
+                name='customer_phone_trgm_idx'
+            ),
+            GinIndex(
+                OpClass(Upper('pincode'), name='gin_trgm_ops'),
+                name='customer_pincode_trgm_idx'
+            ),
         ]
 
     def __str__(self):
@@ -125,6 +180,9 @@ class Customer(models.Model):
 class Order(models.Model):
     # Defining choices within the model class
     STATUS_CHOICES = (
+        ('queued',          'Queued'),           # async checkout, not processed yet
+        ('rejected',        'Rejected'),         # async checkout, out of stock
+        ('failed',          'Failed'),           # async checkout, request unreadable
         ('payment_pending', 'Payment Pending'),  
         ('payment_failed',  'Payment Failed'),   
         ('confirmed',       'Confirmed'),        
@@ -135,9 +193,13 @@ class Order(models.Model):
         ('refunded',        'Refunded'),        
     )
     idempotency_key = models.CharField(max_length=100, null=True, blank=True, editable=False)
+    # async checkout: the basket + contact details the worker places the order
+    # from, and the rejection reason if it couldn't (see checkout.py)
+    checkout_request = models.JSONField(null=True, blank=True, editable=False)
 
 
-    customer = models.ForeignKey('Customer', on_delete=models.CASCADE, related_name='orders')
+    # no index of its own: order_customer_date_idx leads with customer
+    customer = models.ForeignKey('Customer', on_delete=models.CASCADE, related_name='orders', db_index=False)
     order_date = models.DateTimeField(auto_now_add=True)
     PAYMENT_METHOD_CHOICES = [
     ('cod',    'Cash on Delivery'),
@@ -147,6 +209,7 @@ class Order(models.Model):
         ('pending',  'Pending'),
         ('paid',     'Paid'),
         ('failed',   'Failed'),
+        ('refunded', 'Refunded'),
     ]
 
     payment_method      = models.CharField(max_length=10, choices=PAYMENT_METHOD_CHOICES, default='cod')
@@ -161,33 +224,27 @@ class Order(models.Model):
         default='payment_pending'
     )
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0.00) 
+    # list rows: units and "Rose ×2, Lily ×1", written with the items
+    item_count = models.PositiveIntegerField(default=0)
+    item_summary = models.CharField(max_length=255, blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
+    # bumped on every write — include it in update_fields!
+    updated_at = models.DateTimeField(auto_now=True)
     # ... other fields
     class Meta:
         ordering = ['-created_at'] 
         indexes = [
-            # admin filters by status
+            # order by date always — id: the keyset pages seek on (created_at, id),
+            # and one index scans both ways
             models.Index(
-                fields=['status'],
-                name='order_status_idx'
+                fields=['created_at', 'id'],
+                name='order_created_id_idx'
             ),
 
-            # webhook updates payment_status
+            # filter by amount range, keyset pages on (total_amount, id)
             models.Index(
-                fields=['payment_status'],
-                name='order_payment_status_idx'
-            ),
-
-            # order by date always
-            models.Index(
-                fields=['-created_at'],
-                name='order_created_idx'
-            ),
-
-            # filter by amount range
-            models.Index(
-                fields=['total_amount'],
-                name='order_amount_idx'
+                fields=['total_amount', 'id'],
+                name='order_amount_id_idx'
             ),
 
             # razorpay webhook lookup
@@ -197,18 +254,15 @@ class Order(models.Model):
                 name='order_razorpay_idx'
             ),
 
-            # idempotency check
-            # make unique too!
-            models.Index(
-                fields=['idempotency_key'],
-                name='order_idempotency_idx'
-            ),
+            # every index here is paid for by each checkout / webhook write.
+            # Deliberately absent: status alone (order_status_date_id_idx leads
+            # with it) and payment_status (never filtered on its own).
 
             # composite — admin filters
             # status + date together
             models.Index(
-                fields=['status', '-created_at'],
-                name='order_status_date_idx'
+                fields=['status', '-created_at', '-id'],
+                name='order_status_date_id_idx'
             ),
 
             # customer orders by date
@@ -217,6 +271,29 @@ class Order(models.Model):
                 fields=['customer', '-created_at'],
                 name='order_customer_date_idx'
             ),
+
+            # sales rollups pick up changed orders since their watermark
+            models.Index(
+                fields=['updated_at'],
+                name='order_updated_idx'
+            ),
+
+            # admin search by (partial) Razorpay id
+            GinIndex(
+                OpClass(Upper('razorpay_order_id'), name='gin_trgm_ops'),
+                name='order_rp_order_trgm_idx'
+            ),
+            GinIndex(
+                OpClass(Upper('razorpay_payment_id'), name='gin_trgm_ops'),
+                name='order_rp_payment_trgm_idx'
+            ),
+        ]
+        constraints = [
+            # idempotency backstop — also serves the (customer, key) lookup
+            models.UniqueConstraint(
+                fields=['customer', 'idempotency_key'],
+                name='order_customer_idempotency_uniq'
+            ),
         ]
         
     
@@ -228,7 +305,12 @@ class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
     
     # Foreign Key linking the item to the specific flower product
-    flower = models.ForeignKey(Flower, on_delete=models.CASCADE)
+    # SET_NULL: deleting a flower keeps the order history (see snapshots.py)
+    flower = models.ForeignKey(Flower, null=True, on_delete=models.SET_NULL)
+
+    # the flower as it was at purchase — order pages render from these, no join
+    flower_name = models.CharField(max_length=100, blank=True, default='')
+    flower_image = models.CharField(max_length=100, blank=True, default='')
     
     quantity = models.IntegerField(default=1)
     
@@ -238,8 +320,230 @@ class OrderItem(models.Model):
     def get_total_price(self):
         return self.quantity * self.unit_price
 
+    class Meta:
+        indexes = [
+            # admin order search: flower_name__icontains is UPPER(..) LIKE '%..%'
+            GinIndex(
+                OpClass(Upper('flower_name'), name='gin_trgm_ops'),
+                name='orderitem_name_trgm_idx'
+            ),
+        ]
+
     def __str__(self):
-        return f"{self.quantity} x {self.flower.name}"
+        return f"{self.quantity} x {self.flower_name}"
+
+
+class Refund(models.Model):
+    """
+    A refund owed for a cancelled online order. Created inside the cancel
+    transaction, sent to Razorpay afterwards by tasks.process_refund.
+    """
+    STATUS_CHOICES = (
+        ('pending',   'Pending'),
+        ('processed', 'Processed'),
+        ('failed',    'Failed'),
+    )
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='refunds')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    razorpay_refund_id = models.CharField(max_length=100, blank=True, null=True, unique=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # support looks for stuck / failed refunds
+            models.Index(
+                fields=['status'],
+                name='refund_status_idx'
+            ),
+        ]
+
+    @property
+    def receipt(self):
+        # sent to Razorpay so a retry can find a refund that already went through
+        return f"refund_{self.id}"
+
+    def __str__(self):
+        return f"Refund #{self.id} for order #{self.order_id} - {self.status}"
+
+
+class StockHold(models.Model):
+    """
+    Stock set aside for an online order until it is paid or the hold expires.
+    Flower.reserved_stock is the sum of these — always change both together
+    (see stock.py).
+    """
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='stock_holds')
+    flower = models.ForeignKey(Flower, on_delete=models.CASCADE, related_name='stock_holds')
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # sweeper scans expired holds
+            models.Index(
+                fields=['expires_at'],
+                name='stockhold_expires_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x flower {self.flower_id} for order {self.order_id}"
+
+
+class WebhookEvent(models.Model):
+    """
+    A Razorpay webhook delivery, stored as received and applied later by
+    tasks.process_webhook_events (see webhooks.py). The unique event_id drops
+    Razorpay's retries of the same event at insert time.
+    """
+    STATUS_CHOICES = (
+        ('pending',   'Pending'),
+        ('processed', 'Processed'),
+        ('skipped',   'Skipped'),
+        ('failed',    'Failed'),
+    )
+    event_id = models.CharField(max_length=100)
+    event = models.CharField(max_length=50)
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    last_error = models.TextField(blank=True, default='')
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # worker picks up pending events oldest first
+            models.Index(
+                fields=['status', 'id'],
+                name='webhookevent_status_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['event_id'],
+                name='webhookevent_event_id_uniq'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.event} {self.event_id} - {self.status}"
+
+
+class OutboxEvent(models.Model):
+    """
+    A side effect of an order write (email, push, WebSocket, refund), inserted
+    in the same transaction and delivered after commit by
+    tasks.dispatch_outbox (see outbox.py).
+    """
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sent',    'Sent'),
+        ('failed',  'Failed'),
+    )
+    topic = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    # next attempt not before this — pushed back after each failure
+    available_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # dispatcher picks up due events, backlog stats
+            models.Index(
+                fields=['status', 'available_at'],
+                name='outbox_status_available_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} #{self.id} - {self.status}"
+
+
+class DailySalesRollup(models.Model):
+    """
+    Item sales per day x flower x delivery pincode, kept up to date by
+    tasks.refresh_sales_rollups (see rollups.py). Cancelled/refunded lines
+    are counted apart, so a late cancellation moves revenue out of the day
+    the order was placed. No FK constraints — history outlives a deleted flower.
+    """
+    day = models.DateField()
+    # null: lines whose flower was deleted before the day was (re)built
+    flower = models.ForeignKey(
+        Flower, null=True, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+'
+    )
+    category = models.ForeignKey(
+        Category, null=True, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+'
+    )
+    # OrderItem.flower_name snapshot — names the row once the flower is gone;
+    # lines of deleted flowers get one row per name, not one NULL bucket
+    flower_name = models.CharField(max_length=100, blank=True, default='')
+    pincode = models.CharField(max_length=10, blank=True, default='')
+    orders = models.PositiveIntegerField(default=0)
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    cancelled_quantity = models.PositiveIntegerField(default=0)
+    cancelled_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        indexes = [
+            # top flowers / series within a category
+            models.Index(
+                fields=['category', 'day'],
+                name='salesrollup_category_day_idx'
+            ),
+        ]
+        constraints = [
+            # also serves date-range scans (day leads)
+            models.UniqueConstraint(
+                fields=['day', 'flower', 'pincode'],
+                name='salesrollup_day_flower_pin_uniq'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} flower {self.flower_id} [{self.pincode}]: {self.quantity}"
+
+
+class DailyOrderRollup(models.Model):
+    """Order totals per day x delivery pincode — see DailySalesRollup."""
+    day = models.DateField()
+    pincode = models.CharField(max_length=10, blank=True, default='')
+    orders = models.PositiveIntegerField(default=0)
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    cancelled_orders = models.PositiveIntegerField(default=0)
+    cancelled_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    refunded_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'pincode'],
+                name='orderrollup_day_pin_uniq'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} [{self.pincode}]: {self.orders} orders"
+
+
+class RollupWatermark(models.Model):
+    """How far (Order.updated_at) a rollup has caught up. One row per rollup."""
+    name = models.CharField(max_length=50, primary_key=True)
+    watermark = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.watermark}"
 	
 
 class Cart(models.Model):
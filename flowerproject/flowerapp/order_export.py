@@ -0,0 +1,85 @@
+"""
+Streaming order export (GET /api/v1/orders/export/, manage.py export_orders).
+
+Same filters as the admin order list (filters.filter_admin_orders). Orders
+are read with values().iterator(chunk_size) — a server-side cursor on
+Postgres — and rendered a chunk at a time with the order_rows() projection,
+so each chunk costs one items query and memory stays at one chunk however
+many orders match. Output is CSV (one row per order, items summarised in one
+column) or NDJSON (one OrderSerializer-shaped object per line).
+"""
+import csv
+import json
+from itertools import islice
+
+from flowerapp import models
+from .filters import filter_admin_orders
+from .projections import ORDER_FIELDS, order_rows, order_values
+
+DEFAULT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = {
+    'csv':    ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+# same whitelist as the admin list; exports default to oldest first
+ORDERINGS = ('created_at', '-created_at', 'total_amount', '-total_amount')
+DEFAULT_ORDERING = 'created_at'
+
+
+def export_queryset(params):
+    """Filtered, ordered orders for an export — params as on the admin list."""
+    ordering = params.get('ordering') or DEFAULT_ORDERING
+    if ordering not in ORDERINGS:
+        ordering = DEFAULT_ORDERING
+    tiebreak = '-id' if ordering.startswith('-') else 'id'
+    return filter_admin_orders(models.Order.objects.all(), params).order_by(ordering, tiebreak)
+
+
+def iter_orders(queryset, fields=ORDER_FIELDS, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield rendered orders, reading chunk_size rows at a time."""
+    rows = queryset.values(*order_values(fields)).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        # ✅ one items query per chunk, not per order
+        yield from order_rows(chunk, fields=fields)
+
+
+def _items_summary(items):
+    return '; '.join(
+        f"{item['flower_name']} x{item['quantity']} @ {item['unit_price']}"
+        for item in items
+    )
+
+
+class _Echo:
+    """csv.writer target that hands each line back instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(orders, fields=ORDER_FIELDS):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for order in orders:
+        yield writer.writerow([
+            _items_summary(order[name]) if name == 'items' else order.get(name)
+            for name in fields
+        ])
+
+
+def iter_ndjson(orders):
+    for order in orders:
+        yield json.dumps(order, ensure_ascii=False) + '\n'
+
+
+def iter_export(params, export_format='csv', fields=ORDER_FIELDS, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Lines of the export, ready to stream."""
+    orders = iter_orders(export_queryset(params), fields, chunk_size)
+    if export_format == 'ndjson':
+        return iter_ndjson(orders)
+    return iter_csv(orders, fields)
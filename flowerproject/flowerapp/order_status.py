@@ -0,0 +1,59 @@
+"""
+Bulk order status changes for dispatch (POST /api/v1/orders/bulk-status/).
+
+One conditional UPDATE ... WHERE id IN (...) AND status IN (<allowed from>)
+RETURNING id moves every order that is still in a state it may leave. An
+order another admin already shipped, or one cancelled meanwhile, is simply
+not in the RETURNING set, so the response reports exactly what changed.
+The changed ids get ONE outbox event, delivered as one notification job
+(tasks.notify_order_status_batch) instead of a task per order.
+
+Cancellation and refunds are not bulk transitions: they give stock back and
+refund payments (OrderCancelAPIView).
+"""
+from django.db import connection, transaction
+from django.utils import timezone
+
+from flowerapp import models
+from . import outbox
+
+# target status → statuses an order may move to it from
+TRANSITIONS = {
+    'processing': ('confirmed',),
+    'shipped':    ('confirmed', 'processing'),
+    'delivered':  ('shipped',),
+}
+
+MAX_BULK_ORDERS = 500
+
+
+def _placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def bulk_transition(order_ids, new_status):
+    """Move the orders to new_status where TRANSITIONS allows. Returns the changed ids, sorted."""
+    ids           = sorted(set(order_ids))
+    from_statuses = TRANSITIONS[new_status]
+    if not ids:
+        return []
+
+    table = models.Order._meta.db_table
+    now   = connection.ops.adapt_datetimefield_value(timezone.now())
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} SET status = %s, updated_at = %s '
+                f'WHERE id IN ({_placeholders(ids)}) '
+                f'AND status IN ({_placeholders(from_statuses)}) '
+                f'RETURNING id',
+                [new_status, now, *ids, *from_statuses],
+            )
+            changed = sorted(order_id for (order_id,) in cursor.fetchall())
+
+        if changed:
+            # ✅ one event → one batched email / push / WebSocket job
+            outbox.publish([
+                ('order_status_batch', {'order_ids': changed, 'status': new_status}),
+            ])
+    return changed
@@ -0,0 +1,191 @@
+"""
+Transactional outbox for order side effects.
+
+Checkout, the webhook worker and cancel write one OutboxEvent per side effect
+inside their own transaction, so an event exists exactly when the order
+change committed — a process dying right after commit can no longer lose the
+confirmation email or the admin push. tasks.dispatch_outbox drains due
+events in batches (SKIP LOCKED, so dispatchers run side by side) and hands
+them to Celery, FCM and Channels.
+
+Delivery is at least once: a handler that raises is retried with backoff up
+to MAX_ATTEMPTS, and a dispatcher dying mid-batch leaves its events pending.
+Handlers must tolerate repeats. Each event is one action, so a retry never
+repeats an unrelated one.
+"""
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from flowerapp import models
+from .firebase import send_order_notification_to_all
+from .tasks import (
+    notify_customer_order_status, notify_low_stock, notify_order_status_batch,
+    notify_stock_updates, process_refund, send_order_cancellation_email,
+    send_order_confirmation_email,
+)
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE   = 100
+MAX_ATTEMPTS = 8
+BACKOFF      = 5       # seconds, doubled per attempt
+MAX_BACKOFF  = 60 * 60
+# dispatch_outbox logs a warning once the oldest pending event is this old
+BACKLOG_WARN_SECONDS = 5 * 60
+
+HANDLERS = {}
+
+
+def handler(topic):
+    def register(func):
+        HANDLERS[topic] = func
+        return func
+    return register
+
+
+@handler('order_confirmation_email')
+def _order_confirmation_email(payload):
+    send_order_confirmation_email.delay(payload['order_id'])
+
+
+@handler('order_cancellation_email')
+def _order_cancellation_email(payload):
+    send_order_cancellation_email.delay(payload['order_id'])
+
+
+@handler('admin_order_push')
+def _admin_order_push(payload):
+    order = models.Order.objects.filter(id=payload['order_id']).first()
+    if order:
+        send_order_notification_to_all(order)
+
+
+@handler('order_status_push')
+def _order_status_push(payload):
+    # the status at the time of the change, not whatever it is now
+    notify_customer_order_status(models.Order(id=payload['order_id'], status=payload['status']))
+
+
+@handler('order_status_batch')
+def _order_status_batch(payload):
+    # one job for the whole bulk transition (order_status.py)
+    notify_order_status_batch.delay(payload['order_ids'], payload['status'])
+
+
+@handler('stock_broadcast')
+def _stock_broadcast(payload):
+    notify_stock_updates(payload['flowers'])
+
+
+@handler('low_stock_alert')
+def _low_stock_alert(payload):
+    notify_low_stock.delay(payload['flowers'])
+
+
+@handler('refund')
+def _refund(payload):
+    process_refund.delay(payload['refund_id'])
+
+
+def _kick():
+    from .tasks import dispatch_outbox
+    dispatch_outbox.delay()
+
+
+def publish(events):
+    """
+    Record [(topic, payload), ...] in the current transaction. The dispatcher
+    is nudged after commit; the beat entry picks up anything the nudge misses.
+    """
+    if not events:
+        return
+    models.OutboxEvent.objects.bulk_create([
+        models.OutboxEvent(topic=topic, payload=payload)
+        for topic, payload in events
+    ])
+    # robust: a broker hiccup must not fail a request that already committed
+    transaction.on_commit(_kick, robust=True)
+
+
+def stock_events(flowers, alert=True):
+    """Broadcast new stock levels (stock.stock_levels()) and, on deductions, alert low ones."""
+    if not flowers:
+        return []
+    events = [('stock_broadcast', {'flowers': flowers})]
+    if alert:
+        events.append(('low_stock_alert', {'flowers': flowers}))
+    return events
+
+
+def order_confirmed_events(order_ids):
+    return [
+        event
+        for order_id in order_ids
+        for event in (
+            ('order_confirmation_email', {'order_id': order_id}),
+            ('admin_order_push',         {'order_id': order_id}),
+        )
+    ]
+
+
+def _retry_at(now, attempts):
+    return now + timedelta(seconds=min(BACKOFF * 2 ** (attempts - 1), MAX_BACKOFF))
+
+
+def dispatch(batch_size=BATCH_SIZE):
+    """Deliver up to batch_size due events. Returns how many were attempted."""
+    now = timezone.now()
+    with transaction.atomic():
+        events = list(
+            models.OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', available_at__lte=now)
+            .order_by('id')[:batch_size]
+        )
+        for event in events:
+            event.attempts += 1
+            try:
+                HANDLERS[event.topic](event.payload)
+            except Exception as exc:
+                logger.exception('Outbox event %s (%s) failed', event.id, event.topic)
+                event.last_error = f'{exc.__class__.__name__}: {exc}'
+                if event.attempts >= MAX_ATTEMPTS:
+                    event.status = 'failed'
+                else:
+                    event.available_at = _retry_at(now, event.attempts)
+            else:
+                event.status     = 'sent'
+                event.sent_at    = timezone.now()
+                event.last_error = ''
+
+        models.OutboxEvent.objects.bulk_update(
+            events, ['status', 'attempts', 'last_error', 'available_at', 'sent_at']
+        )
+    return len(events)
+
+
+def backlog():
+    """Backlog metric: what is waiting, how long the oldest has waited, what gave up."""
+    now   = timezone.now()
+    stats = models.OutboxEvent.objects.filter(status__in=('pending', 'failed')).aggregate(
+        pending=Count('id', filter=Q(status='pending')),
+        due=Count('id', filter=Q(status='pending', available_at__lte=now)),
+        retrying=Count('id', filter=Q(status='pending', attempts__gt=0)),
+        failed=Count('id', filter=Q(status='failed')),
+        oldest=Min('created_at', filter=Q(status='pending')),
+    )
+    oldest = stats.pop('oldest')
+    stats['oldest_pending_seconds'] = round((now - oldest).total_seconds(), 1) if oldest else 0
+    return stats
+
+
+def purge_sent(older_than):
+    """Delete delivered events older than the given timedelta. Returns how many."""
+    deleted, _ = models.OutboxEvent.objects.filter(
+        status='sent',
+        sent_at__lt=timezone.now() - older_than,
+    ).delete()
+    return deleted
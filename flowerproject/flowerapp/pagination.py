@@ -1,4 +1,12 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class FlowerPagination(PageNumberPagination):
@@ -11,4 +19,179 @@ class FlowerPagination(PageNumberPagination):
 class OrderPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
-    max_page_size = 50
\ No newline at end of file
+    max_page_size = 50
+
+
+class KeysetPagination(BasePagination):
+    """
+    Seek pagination: WHERE (key) > (last key seen) ORDER BY key LIMIT n.
+    No OFFSET scan and no COUNT(*) unless the client asks for it (?count=true).
+
+    `orderings` maps the ?ordering= value to the key columns.
+    The last column must be unique (id) so the key is a total order.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    count_query_param = 'count'
+    orderings = {'id': ('id',)}
+    default_ordering = 'id'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.fields = self.get_ordering_fields(request)
+        position, reverse = self.decode_cursor(request)
+        if position is not None:
+            position = self.coerce_position(queryset.model, position)
+
+        self.count = None
+        if self.wants_count(request):
+            self.count = self.get_count(queryset)
+
+        fields = self.fields
+        if reverse:
+            fields = tuple(self._flip(f) for f in fields)
+        queryset = queryset.order_by(*fields)
+        if position is not None:
+            queryset = queryset.filter(self.seek_filter(fields, position))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # walking backwards we came from the next page, so it always exists
+        if reverse:
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+
+        self.next_position = self.previous_position = None
+        if rows and has_next:
+            self.next_position = self.position_of(rows[-1])
+        if rows and has_previous:
+            self.previous_position = self.position_of(rows[0])
+        return rows
+
+    def get_paginated_response(self, data):
+        payload = {
+            'next':     self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results':  data,
+        }
+        if self.count is not None:
+            payload = {'count': self.count, **payload}
+        return Response(payload)
+
+    # -------- params --------
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering_fields(self, request):
+        ordering = request.query_params.get(self.ordering_query_param, self.default_ordering)
+        return self.orderings.get(ordering, self.orderings[self.default_ordering])
+
+    def wants_count(self, request):
+        return request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'exact')
+
+    def get_count(self, queryset):
+        return queryset.count()
+
+    # -------- seek --------
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def seek_filter(self, fields, position):
+        """
+        Row comparison (a, b) > (x, y) spelled as
+            a >= x AND (a > x OR (a = x AND b > y))
+        The leading range on the first column lets its btree index do the seek.
+        """
+        seek = Q()
+        for i, field in enumerate(fields):
+            name = field.lstrip('-')
+            op = 'lt' if field.startswith('-') else 'gt'
+            equal = {f.lstrip('-'): position[j] for j, f in enumerate(fields[:i])}
+            seek |= Q(**equal, **{f'{name}__{op}': position[i]})
+
+        first = fields[0]
+        bound = 'lte' if first.startswith('-') else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{bound}': position[0]}) & seek
+
+    def position_of(self, row):
+        values = []
+        for field in self.fields:
+            name  = field.lstrip('-')
+            value = row[name] if isinstance(row, dict) else getattr(row, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else str(value))
+        return values
+
+    # -------- cursor --------
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            cursor = json.loads(urlsafe_b64decode(padded.encode('ascii')))
+            position, reverse = cursor['p'], bool(cursor.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.fields):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def coerce_position(self, model, position):
+        """
+        Cursor values → the key columns' types (Decimal, datetime, int), so a
+        tampered cursor is an invalid cursor, not a database error.
+        """
+        try:
+            return [
+                model._meta.get_field(field.lstrip('-')).clean(value, None)
+                for field, value in zip(self.fields, position)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position, reverse):
+        cursor = json.dumps({'p': position, 'r': int(reverse)}, separators=(',', ':'))
+        encoded = urlsafe_b64encode(cursor.encode('ascii')).decode('ascii').rstrip('=')
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+
+class FlowerCursorPagination(KeysetPagination):
+    page_size = 10
+    max_page_size = 50
+    orderings = {
+        'id':     ('id',),
+        'price':  ('price', 'id'),
+        '-price': ('-price', '-id'),
+    }
+    default_ordering = 'id'
@@ -0,0 +1,190 @@
+"""
+Payment gateway used by checkout and refunds.
+
+One pooled HTTP session per process with strict connect/read timeouts,
+instead of a new razorpay.Client (and TLS handshake) per request. The
+implementation comes from settings.PAYMENT_GATEWAY / ASYNC_PAYMENT_GATEWAY,
+so local runs and load tests can use FakeRazorpayGateway.
+
+Amounts are in paise, like the Razorpay API.
+"""
+import itertools
+import threading
+from functools import lru_cache
+
+import httpx
+import razorpay
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+
+RAZORPAY_API = 'https://api.razorpay.com/v1'
+
+
+class PaymentGatewayError(Exception):
+    """Gateway unreachable, timed out or rejected the call."""
+
+
+def _order_payload(amount, currency, receipt):
+    data = {'amount': amount, 'currency': currency, 'payment_capture': 1}
+    if receipt:
+        data['receipt'] = receipt
+    return data
+
+
+def _refund_payload(amount, receipt):
+    data = {'amount': amount}
+    if receipt:
+        data['receipt'] = receipt
+    return data
+
+
+def _matching_refund(refunds, receipt):
+    for refund in refunds.get('items', []):
+        if refund.get('receipt') == receipt:
+            return refund
+    return None
+
+
+class RazorpayGateway:
+    """Blocking client for WSGI views and Celery tasks."""
+
+    def __init__(self):
+        session = requests.Session()
+        session.mount('https://', HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=settings.RAZORPAY_POOL_SIZE,
+        ))
+        self.client  = razorpay.Client(
+            session=session,
+            auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET),
+        )
+        self.timeout = (settings.RAZORPAY_CONNECT_TIMEOUT, settings.RAZORPAY_READ_TIMEOUT)
+
+    def _call(self, method, *args):
+        try:
+            return method(*args, timeout=self.timeout)
+        except (
+            requests.RequestException,
+            razorpay.errors.BadRequestError,
+            razorpay.errors.GatewayError,
+            razorpay.errors.ServerError,
+            ValueError,  # non-JSON error body
+        ) as exc:
+            raise PaymentGatewayError(str(exc) or exc.__class__.__name__) from exc
+
+    def create_order(self, amount, currency='INR', receipt=None):
+        return self._call(self.client.order.create, _order_payload(amount, currency, receipt))
+
+    def refund(self, payment_id, amount, receipt=None):
+        return self._call(self.client.payment.refund, payment_id, _refund_payload(amount, receipt))
+
+    def find_refund(self, payment_id, receipt):
+        """The refund created earlier with this receipt, or None."""
+        refunds = self._call(self.client.payment.fetch_multiple_refund, payment_id)
+        return _matching_refund(refunds, receipt)
+
+
+class AsyncRazorpayGateway:
+    """Non-blocking client for ASGI views — same methods, awaitable."""
+
+    def __init__(self):
+        self.client = httpx.AsyncClient(
+            base_url=RAZORPAY_API,
+            auth=(settings.RAZORPAY_KEY_ID or '', settings.RAZORPAY_KEY_SECRET or ''),
+            timeout=httpx.Timeout(
+                settings.RAZORPAY_READ_TIMEOUT,
+                connect=settings.RAZORPAY_CONNECT_TIMEOUT,
+            ),
+            limits=httpx.Limits(max_connections=settings.RAZORPAY_POOL_SIZE),
+        )
+
+    async def _call(self, method, path, **kwargs):
+        try:
+            response = await self.client.request(method, path, **kwargs)
+            data     = response.json()
+        except (httpx.HTTPError, ValueError) as exc:
+            raise PaymentGatewayError(str(exc) or exc.__class__.__name__) from exc
+        if response.status_code >= 400:
+            error = data.get('error', {}) if isinstance(data, dict) else {}
+            raise PaymentGatewayError(error.get('description') or f'HTTP {response.status_code}')
+        return data
+
+    async def create_order(self, amount, currency='INR', receipt=None):
+        return await self._call('POST', '/orders', json=_order_payload(amount, currency, receipt))
+
+    async def refund(self, payment_id, amount, receipt=None):
+        return await self._call(
+            'POST', f'/payments/{payment_id}/refund', json=_refund_payload(amount, receipt)
+        )
+
+    async def find_refund(self, payment_id, receipt):
+        refunds = await self._call('GET', f'/payments/{payment_id}/refunds')
+        return _matching_refund(refunds, receipt)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+class FakeRazorpayGateway:
+    """In-memory gateway for local runs, tests and load tests. Never fails."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self):
+        self.lock    = threading.Lock()
+        self.orders  = {}
+        self.refunds = {}
+
+    def _next_id(self, prefix):
+        return f'{prefix}_fake{next(self._ids):010d}'
+
+    def create_order(self, amount, currency='INR', receipt=None):
+        with self.lock:
+            order = {'id': self._next_id('order'), 'status': 'created',
+                     **_order_payload(amount, currency, receipt)}
+            self.orders[order['id']] = order
+            return order
+
+    def refund(self, payment_id, amount, receipt=None):
+        with self.lock:
+            refund = {'id': self._next_id('rfnd'), 'payment_id': payment_id,
+                      'status': 'processed', **_refund_payload(amount, receipt)}
+            self.refunds[refund['id']] = refund
+            return refund
+
+    def find_refund(self, payment_id, receipt):
+        with self.lock:
+            items = [r for r in self.refunds.values() if r['payment_id'] == payment_id]
+        return _matching_refund({'items': items}, receipt)
+
+
+class AsyncFakeRazorpayGateway(FakeRazorpayGateway):
+
+    async def create_order(self, amount, currency='INR', receipt=None):
+        return super().create_order(amount, currency, receipt)
+
+    async def refund(self, payment_id, amount, receipt=None):
+        return super().refund(payment_id, amount, receipt)
+
+    async def find_refund(self, payment_id, receipt):
+        return super().find_refund(payment_id, receipt)
+
+    async def aclose(self):
+        pass
+
+
+@lru_cache(maxsize=None)
+def get_gateway():
+    """Process-wide gateway — its connection pool is reused across requests."""
+    return import_string(settings.PAYMENT_GATEWAY)()
+
+
+@lru_cache(maxsize=None)
+def get_async_gateway():
+    return import_string(settings.ASYNC_PAYMENT_GATEWAY)()
+
+
+def to_paise(amount):
+    return int(round(amount * 100))
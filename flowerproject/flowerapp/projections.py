@@ -0,0 +1,271 @@
+"""
+Read-only fast path for the hot list endpoints.
+
+Pulls exactly the columns FlowerSerializer / OrderSerializer / CartSerializer
+render via values(), and builds the same dicts without model instances or
+per-field serializer dispatch. Output must stay identical to the serializers —
+ProjectionParityTests (tests.py) pin that, `manage.py bench_projections`
+re-checks it on real data and times both.
+
+Every projection takes an optional `fields` tuple (see select_fields) so
+?fields= / ?exclude= trim the SELECT list, not just the JSON.
+"""
+from collections import defaultdict
+
+from rest_framework import serializers
+
+from flowerapp import models
+
+CLOUDINARY_BASE = 'https://res.cloudinary.com/dkofkn26y/image/upload/'
+
+# same formatting as the serializer fields they replace
+_money    = serializers.DecimalField(max_digits=10, decimal_places=2).to_representation
+_datetime = serializers.DateTimeField().to_representation
+_storage  = models.Flower._meta.get_field('image').storage
+
+# renderer result meaning "leave the key out", like DRF's SkipField
+SKIP = object()
+
+
+def image_url(name, request=None):
+    """Flower.image as DRF's ImageField renders it."""
+    if not name:
+        return None
+    url = _storage.url(name)
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+def flower_image(name):
+    """The *_image SerializerMethodField used across the serializers."""
+    if not name:
+        return None
+    if name.startswith('http'):
+        return name
+    return f"{CLOUDINARY_BASE}{name}"
+
+
+# -------- sparse fieldsets --------
+
+def _split(value):
+    return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+
+def select_fields(params, available):
+    """
+    ?fields=a,b keeps only those, ?exclude=c drops those.
+    Unknown names are ignored, `id` is always kept, serializer order is kept.
+    """
+    fields   = tuple(available)
+    wanted   = _split(params.get('fields'))
+    excluded = _split(params.get('exclude'))
+    if wanted:
+        fields = tuple(f for f in fields if f in wanted or f == 'id')
+    if excluded:
+        fields = tuple(f for f in fields if f not in excluded or f == 'id')
+    return fields
+
+
+def _columns(column_map, fields, always=()):
+    columns = list(always)
+    for field in fields:
+        for column in column_map[field]:
+            if column not in columns:
+                columns.append(column)
+    return tuple(columns)
+
+
+def only_queryset(queryset, column_map, fields):
+    """
+    For the serializer paths (detail views): .only() the requested columns
+    and select_related just the relations they traverse.
+    """
+    columns = _columns(column_map, fields, always=('id',))
+    related = {column.rsplit('__', 1)[0] for column in columns if '__' in column}
+    if related:
+        queryset = queryset.select_related(*related)
+    return queryset.only(*columns)
+
+
+def _render(row, renderers):
+    item = {}
+    for name, render in renderers:
+        value = render(row)
+        if value is not SKIP:
+            item[name] = value
+    return item
+
+
+# -------- flowers --------
+
+# output field → columns it reads, in FlowerSerializer field order
+FLOWER_COLUMNS = {
+    'id':                ('id',),
+    'name':              ('name',),
+    'description':       ('description',),
+    'price':             ('price',),
+    'stock':             ('stock',),
+    'available_stock':   ('stock', 'reserved_stock'),
+    'flash_sale':        ('flash_sale',),
+    'image':             ('image',),
+    'flower_image':      ('image',),
+    'category':          ('category_id',),
+    'category_name':     ('category_id', 'category__name'),
+    'light_requirement': ('light_requirement',),
+    'water_frequency':   ('water_frequency',),
+    'temperature':       ('temperature',),
+}
+FLOWER_FIELDS = tuple(FLOWER_COLUMNS)
+
+
+def flower_values(fields=FLOWER_FIELDS):
+    # id + price always: the keyset paginator seeks on them
+    return _columns(FLOWER_COLUMNS, fields, always=('id', 'price'))
+
+
+FLOWER_VALUES = flower_values()
+
+
+def flower_rows(rows, request=None, fields=FLOWER_FIELDS):
+    """rows: Flower values(*flower_values(fields)) → FlowerSerializer output."""
+    renderers = {
+        'id':                lambda row: row['id'],
+        'name':              lambda row: row['name'],
+        'description':       lambda row: row['description'],
+        'price':             lambda row: _money(row['price']),
+        'stock':             lambda row: row['stock'],
+        'available_stock':   lambda row: max(row['stock'] - row['reserved_stock'], 0),
+        'flash_sale':        lambda row: row['flash_sale'],
+        'image':             lambda row: image_url(row['image'], request),
+        'flower_image':      lambda row: flower_image(row['image']),
+        'category':          lambda row: row['category_id'],
+        # serializer skips category_name when there is no category
+        'category_name':     lambda row: SKIP if row['category_id'] is None else row['category__name'],
+        'light_requirement': lambda row: row['light_requirement'],
+        'water_frequency':   lambda row: row['water_frequency'],
+        'temperature':       lambda row: row['temperature'],
+    }
+    selected = [(name, renderers[name]) for name in fields]
+    return [_render(row, selected) for row in rows]
+
+
+# -------- orders --------
+
+ORDER_COLUMNS = {
+    'id':                  ('id',),
+    'customer':            ('customer_id',),
+    'customer_username':   ('customer__user__username',),
+    'customer_phone':      ('customer__phone_number',),
+    'customer_address':    ('customer__address',),
+    'customer_city':       ('customer__city',),
+    'customer_state':      ('customer__state',),
+    'customer_pincode':    ('customer__pincode',),
+    'order_date':          ('order_date',),
+    'status':              ('status',),
+    'payment_method':      ('payment_method',),
+    'payment_status':      ('payment_status',),
+    'total_amount':        ('total_amount',),
+    'items':               (),      # second query, only when asked for
+    'item_count':          ('item_count',),
+    'item_summary':        ('item_summary',),
+    'created_at':          ('created_at',),
+    'razorpay_payment_id': ('razorpay_payment_id',),
+}
+ORDER_FIELDS = tuple(ORDER_COLUMNS)
+
+
+def order_values(fields=ORDER_FIELDS):
+    # id + sort keys always: the keyset / page orderings and cursors read them
+    return _columns(ORDER_COLUMNS, fields, always=('id', 'created_at', 'total_amount'))
+
+
+ORDER_VALUES = order_values()
+
+# name / image are the purchase-time snapshot (snapshots.py) — no flower join
+ORDER_ITEM_VALUES = (
+    'order_id', 'flower_id', 'flower_name', 'flower_image',
+    'quantity', 'unit_price',
+)
+
+
+def order_items_by_order(order_ids):
+    """One query, on order items alone, for the items of every order on the page."""
+    items = defaultdict(list)
+    rows  = models.OrderItem.objects.filter(
+        order_id__in=order_ids
+    ).order_by('id').values_list(*ORDER_ITEM_VALUES)
+    for order_id, flower_id, name, image, quantity, unit_price in rows:
+        items[order_id].append({
+            'flower':       flower_id,
+            'flower_name':  name,
+            'flower_image': flower_image(image),
+            'quantity':     quantity,
+            'unit_price':   _money(unit_price),
+        })
+    return items
+
+
+def order_rows(rows, fields=ORDER_FIELDS):
+    """rows: Order values(*order_values(fields)) → OrderSerializer output."""
+    rows  = list(rows)
+    items = {}
+    if 'items' in fields:
+        items = order_items_by_order([row['id'] for row in rows])
+
+    renderers = {
+        'id':                  lambda row: row['id'],
+        'customer':            lambda row: row['customer_id'],
+        'customer_username':   lambda row: row['customer__user__username'],
+        'customer_phone':      lambda row: row['customer__phone_number'],
+        'customer_address':    lambda row: row['customer__address'],
+        'customer_city':       lambda row: row['customer__city'],
+        'customer_state':      lambda row: row['customer__state'],
+        'customer_pincode':    lambda row: row['customer__pincode'],
+        'order_date':          lambda row: _datetime(row['order_date']),
+        'status':              lambda row: row['status'],
+        'payment_method':      lambda row: row['payment_method'],
+        'payment_status':      lambda row: row['payment_status'],
+        'total_amount':        lambda row: _money(row['total_amount']),
+        'items':               lambda row: items.get(row['id'], []),
+        'item_count':          lambda row: row['item_count'],
+        'item_summary':        lambda row: row['item_summary'],
+        'created_at':          lambda row: _datetime(row['created_at']),
+        'razorpay_payment_id': lambda row: row['razorpay_payment_id'],
+    }
+    selected = [(name, renderers[name]) for name in fields]
+    return [_render(row, selected) for row in rows]
+
+
+# -------- cart --------
+
+CART_FIELDS = ('id', 'items', 'grand_total')
+
+CART_ITEM_VALUES = (
+    'id', 'flower_id', 'flower__name', 'flower__image', 'flower__price', 'quantity',
+)
+
+
+def cart_data(cart, fields=CART_FIELDS):
+    """Cart → CartSerializer output, one query for the items (if needed)."""
+    items = []
+    grand_total = 0
+    if 'items' in fields or 'grand_total' in fields:
+        rows = models.CartItem.objects.filter(
+            cart=cart
+        ).order_by('id').values_list(*CART_ITEM_VALUES)
+        for item_id, flower_id, name, image, price, quantity in rows:
+            total = quantity * price
+            grand_total += total
+            items.append({
+                'id':           item_id,
+                'flower':       flower_id,
+                'flower_name':  name,
+                'flower_image': flower_image(image),
+                'unit_price':   _money(price),
+                'quantity':     quantity,
+                'total_price':  total,
+            })
+
+    data = {'id': cart.id, 'items': items, 'grand_total': grand_total}
+    return {name: data[name] for name in fields}
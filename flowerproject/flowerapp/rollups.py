@@ -0,0 +1,338 @@
+"""
+Daily sales rollups (DailySalesRollup, DailyOrderRollup) behind the admin
+analytics API.
+
+tasks.refresh_sales_rollups runs from beat. Each run looks only at orders
+whose updated_at moved past the stored watermark, and rebuilds the days
+those orders were placed on from the raw rows. A day is small, a rebuild is
+idempotent, and late transitions (cancellation, refund, payment failure)
+need no delta bookkeeping — each of them bumps updated_at, so the order's
+day is simply rebuilt with the order in its new state.
+
+The watermark stops LAG short of now: updated_at is stamped before commit,
+so a transaction still in flight can commit a timestamp just below it. A
+write transaction that stays open longer than LAG can still commit an
+updated_at below the watermark — that order is missed until its day is
+rebuilt by hand.
+
+manage.py rebuild_sales_rollups re-derives any range from scratch, and is
+how history gets seeded: with no watermark yet (first run, or the row was
+lost) refresh() only starts the watermark at now - LAG rather than
+rebuilding every day ever sold in one transaction.
+
+Pincode and category are the customer's and flower's current ones, not a
+snapshot taken when the order was placed. The flower name is the order line's
+snapshot: lines of a deleted flower (flower_id NULL) are kept apart by it.
+"""
+import logging
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import (
+    Case, CharField, Count, DecimalField, ExpressionWrapper, F, Max, Q, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from flowerapp import models
+
+logger = logging.getLogger(__name__)
+
+WATERMARK = 'daily_sales'
+LAG = timedelta(minutes=2)
+# days rebuilt per statement pair
+DAYS_PER_BATCH = 31
+
+SOLD_STATUSES      = ('confirmed', 'processing', 'shipped', 'delivered')
+CANCELLED_STATUSES = ('cancelled', 'refunded')
+
+ZERO = Decimal('0.00')
+
+INTERVALS = {
+    'day':   None,
+    'week':  TruncWeek,
+    'month': TruncMonth,
+}
+TOP_BY = ('revenue', 'quantity')
+
+
+def _money(value):
+    return f'{value or ZERO:.2f}'
+
+
+def _ranges(days):
+    """Consecutive dates → [(first, last)], so a month is one range, not 30."""
+    ranges = []
+    for day in sorted(days):
+        if ranges and day == ranges[-1][1] + timedelta(days=1):
+            ranges[-1][1] = day
+        else:
+            ranges.append([day, day])
+    return ranges
+
+
+def _placed_on(days, prefix=''):
+    """Orders created on these local dates — created_at ranges, index-friendly."""
+    placed = Q()
+    for first, last in _ranges(days):
+        start = timezone.make_aware(datetime.combine(first, time.min))
+        end   = timezone.make_aware(datetime.combine(last + timedelta(days=1), time.min))
+        placed |= Q(**{f'{prefix}created_at__gte': start, f'{prefix}created_at__lt': end})
+    return placed
+
+
+def _deleted_flower_name(name_field):
+    """Grouping key: '' for live flowers, the name snapshot once flower_id is NULL."""
+    return Case(
+        When(flower_id__isnull=True, then=F(name_field)),
+        default=Value(''),
+        output_field=CharField(),
+    )
+
+
+def _item_rows(days):
+    sold      = Q(order__status__in=SOLD_STATUSES)
+    cancelled = Q(order__status__in=CANCELLED_STATUSES)
+    line_total = ExpressionWrapper(
+        F('quantity') * F('unit_price'),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+    return (
+        models.OrderItem.objects
+        .filter(_placed_on(days, 'order__'), order__status__in=SOLD_STATUSES + CANCELLED_STATUSES)
+        .values(
+            'flower_id',
+            day=TruncDate('order__created_at'),
+            category_id_=F('flower__category_id'),
+            pincode=Coalesce('order__customer__pincode', Value('')),
+            deleted_name=_deleted_flower_name('flower_name'),
+        )
+        .annotate(
+            name=Max('flower_name'),
+            sold_orders=Count('order_id', distinct=True, filter=sold),
+            sold_quantity=Coalesce(Sum('quantity', filter=sold), 0),
+            sold_revenue=Coalesce(Sum(line_total, filter=sold), ZERO),
+            lost_quantity=Coalesce(Sum('quantity', filter=cancelled), 0),
+            lost_revenue=Coalesce(Sum(line_total, filter=cancelled), ZERO),
+        )
+        .order_by()
+    )
+
+
+def _order_rows(days):
+    sold      = Q(status__in=SOLD_STATUSES)
+    cancelled = Q(status__in=CANCELLED_STATUSES)
+    return (
+        models.Order.objects
+        .filter(_placed_on(days), status__in=SOLD_STATUSES + CANCELLED_STATUSES)
+        .values(
+            day=TruncDate('created_at'),
+            pincode=Coalesce('customer__pincode', Value('')),
+        )
+        .annotate(
+            sold_orders=Count('id', filter=sold),
+            sold_revenue=Coalesce(Sum('total_amount', filter=sold), ZERO),
+            lost_orders=Count('id', filter=cancelled),
+            lost_revenue=Coalesce(Sum('total_amount', filter=cancelled), ZERO),
+            refunded=Coalesce(Sum('total_amount', filter=Q(payment_status='refunded')), ZERO),
+        )
+        .order_by()
+    )
+
+
+def rebuild_days(days):
+    """
+    Recompute both rollups for these local dates: two GROUP BY queries, then
+    the days' rows are replaced. Run inside a transaction. Returns rows written.
+    """
+    days = sorted(set(days))
+    if not days:
+        return 0
+
+    sales = [
+        models.DailySalesRollup(
+            day=row['day'],
+            flower_id=row['flower_id'],
+            category_id=row['category_id_'],
+            flower_name=row['name'],
+            pincode=row['pincode'],
+            orders=row['sold_orders'],
+            quantity=row['sold_quantity'],
+            revenue=row['sold_revenue'],
+            cancelled_quantity=row['lost_quantity'],
+            cancelled_revenue=row['lost_revenue'],
+        )
+        for row in _item_rows(days)
+    ]
+
+    # units per (day, pincode) fall out of the item rows — no third query
+    quantities = {}
+    for sale in sales:
+        key = (sale.day, sale.pincode)
+        quantities[key] = quantities.get(key, 0) + sale.quantity
+
+    orders = [
+        models.DailyOrderRollup(
+            day=row['day'],
+            pincode=row['pincode'],
+            orders=row['sold_orders'],
+            quantity=quantities.get((row['day'], row['pincode']), 0),
+            revenue=row['sold_revenue'],
+            cancelled_orders=row['lost_orders'],
+            cancelled_revenue=row['lost_revenue'],
+            refunded_amount=row['refunded'],
+        )
+        for row in _order_rows(days)
+    ]
+
+    models.DailySalesRollup.objects.filter(day__in=days).delete()
+    models.DailyOrderRollup.objects.filter(day__in=days).delete()
+    models.DailySalesRollup.objects.bulk_create(sales, batch_size=1000)
+    models.DailyOrderRollup.objects.bulk_create(orders, batch_size=1000)
+    return len(sales) + len(orders)
+
+
+def rebuild(days, batch_days=DAYS_PER_BATCH):
+    """rebuild_days() over many dates, one transaction per batch_days."""
+    days = sorted(set(days))
+    for start in range(0, len(days), batch_days):
+        with transaction.atomic():
+            rebuild_days(days[start:start + batch_days])
+    return days
+
+
+def order_days(orders):
+    """The local dates these orders were placed on."""
+    return set(
+        orders.annotate(day=TruncDate('created_at'))
+        .order_by('day').values_list('day', flat=True).distinct()
+    )
+
+
+def refresh(batch_days=DAYS_PER_BATCH):
+    """
+    Rebuild the days touched by orders changed since the watermark, then move
+    it. Runs are serialised on the watermark row. Returns the days rebuilt.
+    Without a watermark it only sets one — seed history with
+    rebuild_sales_rollups.
+    """
+    high = timezone.now() - LAG
+    with transaction.atomic():
+        models.RollupWatermark.objects.get_or_create(name=WATERMARK)
+        mark = models.RollupWatermark.objects.select_for_update().get(name=WATERMARK)
+        if mark.watermark is None:
+            logger.warning(
+                'No %s watermark, starting at %s — run rebuild_sales_rollups '
+                'for the orders before it', WATERMARK, high,
+            )
+            mark.watermark = high
+            mark.save(update_fields=['watermark', 'updated_at'])
+            return []
+        if mark.watermark >= high:
+            # another run got here first
+            return []
+
+        # ✅ order_updated_idx range — only what changed since last run
+        changed = models.Order.objects.filter(
+            updated_at__gt=mark.watermark, updated_at__lte=high,
+        )
+        days = sorted(order_days(changed))
+
+        for start in range(0, len(days), batch_days):
+            rebuild_days(days[start:start + batch_days])
+
+        mark.watermark = high
+        mark.save(update_fields=['watermark', 'updated_at'])
+    return days
+
+
+def watermark():
+    return models.RollupWatermark.objects.filter(name=WATERMARK).values_list(
+        'watermark', flat=True
+    ).first()
+
+
+def sales_series(date_from, date_to, interval='day', flower=None, category=None, pincode=None):
+    """
+    Totals per day / week / month. Filtered by flower or category the
+    figures come from the item rollup (units and line revenue); otherwise
+    from the order rollup (order counts and order totals).
+    """
+    by_items = flower is not None or category is not None
+    rollup   = models.DailySalesRollup if by_items else models.DailyOrderRollup
+    rows = rollup.objects.filter(day__gte=date_from, day__lte=date_to)
+    if flower is not None:
+        rows = rows.filter(flower_id=flower)
+    if category is not None:
+        rows = rows.filter(category_id=category)
+    if pincode:
+        rows = rows.filter(pincode=pincode)
+
+    trunc  = INTERVALS[interval]
+    period = trunc('day') if trunc else F('day')
+    if by_items:
+        measures = dict(
+            total_quantity=Sum('quantity'),
+            total_revenue=Sum('revenue'),
+            total_cancelled_quantity=Sum('cancelled_quantity'),
+            total_cancelled_revenue=Sum('cancelled_revenue'),
+        )
+    else:
+        measures = dict(
+            total_orders=Sum('orders'),
+            total_quantity=Sum('quantity'),
+            total_revenue=Sum('revenue'),
+            total_cancelled_orders=Sum('cancelled_orders'),
+            total_cancelled_revenue=Sum('cancelled_revenue'),
+            total_refunded_amount=Sum('refunded_amount'),
+        )
+
+    series = []
+    for row in rows.values(period_=period).annotate(**measures).order_by('period_'):
+        point = {'period': row['period_'].isoformat()}
+        for name in measures:
+            key = name[len('total_'):]
+            value = row[name]
+            point[key] = _money(value) if 'revenue' in key or 'amount' in key else (value or 0)
+        series.append(point)
+    return series
+
+
+def top_flowers(date_from, date_to, by='revenue', limit=10, category=None, pincode=None):
+    """
+    Best-selling flowers in the range, by revenue or units. Flowers deleted
+    before their days were rebuilt rank by name, with `flower` None.
+    """
+    rows = models.DailySalesRollup.objects.filter(day__gte=date_from, day__lte=date_to)
+    if category is not None:
+        rows = rows.filter(category_id=category)
+    if pincode:
+        rows = rows.filter(pincode=pincode)
+
+    top = list(
+        rows.values('flower_id', deleted_name=_deleted_flower_name('flower_name'))
+        .annotate(
+            snapshot=Max('flower_name'),
+            total_quantity=Sum('quantity'),
+            total_revenue=Sum('revenue'),
+            total_orders=Sum('orders'),
+        )
+        .filter(**{f'total_{by}__gt': 0})
+        .order_by(f'-total_{by}', 'flower_id', 'deleted_name')[:limit]
+    )
+    # current names for the top N; the snapshot for flowers deleted since
+    names = dict(
+        models.Flower.objects.filter(id__in=[row['flower_id'] for row in top])
+        .values_list('id', 'name')
+    )
+    return [
+        {
+            'flower':   row['flower_id'],
+            'name':     names.get(row['flower_id'], row['snapshot'] or None),
+            'orders':   row['total_orders'],
+            'quantity': row['total_quantity'],
+            'revenue':  _money(row['total_revenue']),
+        }
+        for row in top
+    ]
@@ -5,6 +5,20 @@ from django.contrib.auth.password_validation import validate_password
 import os
 
 
+class SparseFieldsMixin:
+    """
+    Pass fields=(...) to render only those fields, e.g. the output of
+    projections.select_fields(request.GET, ...) for ?fields= / ?exclude=.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
 class LoginSerializer(serializers.Serializer):
     username = serializers.CharField()
     password = serializers.CharField(write_only=True)
@@ -14,15 +28,25 @@ class CategorySerializer(serializers.ModelSerializer):
 		model =models.Category
 		fields= '__all__'
 
-class FlowerSerializer(serializers.ModelSerializer):
+class FlowerSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     flower_image = serializers.SerializerMethodField()
+    # stock minus holds of unpaid online orders — what customers can buy
+    available_stock = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = models.Flower
-        fields = ['id', 'name', 'description', 'price', 'stock', 'image', 'flower_image', 'category', 'category_name','light_requirement', 'water_frequency', 'temperature']
+        fields = ['id', 'name', 'description', 'price', 'stock', 'available_stock', 'flash_sale', 'image', 'flower_image', 'category', 'category_name','light_requirement', 'water_frequency', 'temperature']
         read_only_fields = ['id']
 
+    def validate_stock(self, value):
+        # flower_reserved_within_stock: the shelf can't drop under active holds
+        if self.instance is not None and value < self.instance.reserved_stock:
+            raise serializers.ValidationError(
+                f'{self.instance.reserved_stock} are held by unpaid orders.'
+            )
+        return value
+
     def get_flower_image(self, obj):
         if not obj.image:
             return None
@@ -46,12 +70,13 @@ class CustomerSerializer(serializers.ModelSerializer):
 
 class OrderItemSerializer(serializers.ModelSerializer):
     # Use the FlowerSerializer (or a lighter version) for better readability
-    flower_name  = serializers.CharField(source='flower.name', read_only=True)
+    # purchase-time snapshot, not the flower's current name / image
+    flower_name  = serializers.CharField(read_only=True)
     flower_image = serializers.SerializerMethodField()  
     def get_flower_image(self, obj):
-        if not obj.flower.image:
+        if not obj.flower_image:
             return None
-        image_name = str(obj.flower.image)
+        image_name = obj.flower_image
         if image_name.startswith('http'):
             return image_name
         return f"https://res.cloudinary.com/dkofkn26y/image/upload/{image_name}"
@@ -63,7 +88,7 @@ class OrderItemSerializer(serializers.ModelSerializer):
         read_only_fields = ['unit_price']
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     items            = OrderItemSerializer(many=True, read_only=True)
     customer_username = serializers.CharField(source='customer.user.username', read_only=True)
     customer_phone   = serializers.CharField(source='customer.phone_number', read_only=True)
@@ -79,10 +104,10 @@ class OrderSerializer(serializers.ModelSerializer):
             'customer_phone', 'customer_address', 'customer_city', 
             'customer_state', 'customer_pincode',  
             'order_date', 'status', 'payment_method',
-            'payment_status', 'total_amount', 'items','created_at',
+            'payment_status', 'total_amount', 'items', 'item_count', 'item_summary', 'created_at',
             'razorpay_payment_id',  # 👈 add this
         ]
-        read_only_fields = ['total_amount', 'order_date', 'customer']
+        read_only_fields = ['total_amount', 'item_count', 'item_summary', 'order_date', 'customer']
 
 
 # serializers.py
@@ -135,7 +160,7 @@ class CartItemSerializer(serializers.ModelSerializer):
         return obj.get_total_price()
 
 
-class CartSerializer(serializers.ModelSerializer):
+class CartSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     items       = CartItemSerializer(many=True, read_only=True)
     grand_total = serializers.SerializerMethodField()
 
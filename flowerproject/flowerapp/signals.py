@@ -0,0 +1,23 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .catalog_cache import bump_catalog_version
+from .flashsale import sync_flowers_safely
+from .models import Category, Flower
+
+
+@receiver(post_save, sender=Flower)
+@receiver(post_delete, sender=Flower)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_catalog_cache(sender, **kwargs):
+    # bump only once the change is visible to other connections
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=Flower)
+@receiver(post_delete, sender=Flower)
+def sync_flash_sale(sender, instance, **kwargs):
+    # flag toggled / restocked → re-mirror the flash-sale count
+    transaction.on_commit(lambda: sync_flowers_safely([instance.id]))
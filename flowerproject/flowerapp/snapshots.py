@@ -0,0 +1,50 @@
+"""
+Order item snapshots: what the customer bought, as it was when they bought it.
+
+Each OrderItem keeps the flower's name and image reference, and its Order a
+short summary (units + "Rose ×2, Lily ×1"). Order lists and details render
+from those without joining flowers, and deleting a flower no longer takes
+order history with it (OrderItem.flower is SET_NULL).
+
+Every place that creates order items goes through order_items() +
+summary(). Orders placed before the snapshot columns existed are filled by
+`manage.py backfill_order_snapshots`.
+"""
+from flowerapp import models
+
+SUMMARY_LENGTH = models.Order._meta.get_field('item_summary').max_length
+
+
+def order_items(order, basket, flowers):
+    """
+    OrderItems for basket {flower_id: qty}, priced and named from flowers
+    {flower_id: {'name', 'image', 'price'}} — lock_flowers() rows.
+    """
+    return [
+        models.OrderItem(
+            order=order,
+            flower_id=fl_id,
+            flower_name=flowers[fl_id]['name'],
+            flower_image=flowers[fl_id]['image'] or '',
+            quantity=qty,
+            unit_price=flowers[fl_id]['price'],
+        )
+        for fl_id, qty in basket.items()
+    ]
+
+
+def summary(lines):
+    """[(flower_name, qty), ...] → {'item_count', 'item_summary'} for Order."""
+    lines = list(lines)
+    text  = ', '.join(f'{name} ×{qty}' for name, qty in lines)
+    if len(text) > SUMMARY_LENGTH:
+        text = text[:SUMMARY_LENGTH - 1] + '…'
+    return {
+        'item_count':   sum(qty for _, qty in lines),
+        'item_summary': text,
+    }
+
+
+def basket_summary(basket, flowers):
+    """summary() of a basket about to become order_items()."""
+    return summary((flowers[fl_id]['name'], qty) for fl_id, qty in basket.items())
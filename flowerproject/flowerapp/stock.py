@@ -0,0 +1,249 @@
+"""
+Set-based stock reservation for checkout.
+
+Every flower in the basket is locked with ONE `SELECT ... FOR UPDATE` in id
+order — concurrent baskets always take their locks in the same order, so
+they can't deadlock — and changed with ONE `UPDATE ... FROM (VALUES ...)`
+guarded by available stock. The flower_reserved_within_stock CHECK
+constraint (reserved_stock <= stock) backs the guard.
+
+Available stock = stock - reserved_stock. reserved_stock is the sum of the
+active StockHold rows for online orders awaiting payment: a hold bumps it,
+capture turns it into a real deduction, expiry / payment failure gives it back.
+
+Every statement RETURNs the new levels, so callers feed the low-stock and
+WebSocket notifications from stock_levels() without re-reading flowers.
+
+Everything here must be called inside transaction.atomic().
+"""
+from django.conf import settings
+from django.db import connection
+from django.db.models import Sum
+from django.utils import timezone
+
+from flowerapp import models
+
+# guard shared by every statement that takes stock
+AVAILABLE_GUARD = 'f.stock - f.reserved_stock >= v.qty'
+
+
+class InsufficientStock(Exception):
+    """Raised with every flower that couldn't cover its quantity."""
+
+    def __init__(self, shortages):
+        self.shortages = shortages
+        names = ', '.join(s['flower_name'] for s in shortages)
+        super().__init__(f'{names} out of stock!')
+
+    def as_response_data(self):
+        return {'error': str(self), 'out_of_stock': self.shortages}
+
+
+def _available(row):
+    return max(row['stock'] - row['reserved_stock'], 0)
+
+
+def _shortage(flower_id, row, requested):
+    return {
+        'flower_id':   flower_id,
+        'flower_name': row['name'],
+        'requested':   requested,
+        'available':   _available(row),
+    }
+
+
+def _update_from_values(assignments, items, guard=None):
+    """
+    UPDATE flowers SET <assignments> FROM (VALUES (id, qty), ...) in one
+    statement. Returns {flower_id: {'id', 'name', 'stock', 'reserved_stock'}}
+    for updated rows. Nothing to change → {} without a statement.
+    """
+    if not items:
+        return {}
+    values = ', '.join(['(%s, %s)'] * len(items))
+    params = [value for item in items for value in item]
+    table  = models.Flower._meta.db_table
+    where  = 'f.id = v.id' + (f' AND {guard}' if guard else '')
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {table} AS f SET {assignments} '
+            f'FROM (VALUES {values}) AS v(id, qty) '
+            f'WHERE {where} '
+            f'RETURNING f.id, f.name, f.stock, f.reserved_stock',
+            params,
+        )
+        return {
+            flower_id: {'id': flower_id, 'name': name, 'stock': stock, 'reserved_stock': reserved}
+            for flower_id, name, stock, reserved in cursor.fetchall()
+        }
+
+
+def _apply_guarded(assignments, flower_counts, locked):
+    items   = sorted(flower_counts.items())
+    updated = _update_from_values(assignments, items, guard=AVAILABLE_GUARD)
+
+    # rows are locked, so this only trips if something bypassed the lock
+    shortages = [
+        _shortage(fl_id, locked[fl_id], qty)
+        for fl_id, qty in items
+        if fl_id not in updated
+    ]
+    if shortages:
+        raise InsufficientStock(shortages)
+
+    for fl_id, row in updated.items():
+        locked[fl_id]['stock']          = row['stock']
+        locked[fl_id]['reserved_stock'] = row['reserved_stock']
+    return locked
+
+
+def stock_levels(rows):
+    """
+    {'id', 'name', 'stock'} per changed flower, in id order — JSON-safe
+    payload for notify_stock_updates / notify_low_stock.
+    """
+    return [
+        {'id': row['id'], 'name': row['name'], 'stock': row['stock']}
+        for row in sorted(rows.values(), key=lambda row: row['id'])
+    ]
+
+
+def lock_flowers(flower_ids):
+    """
+    Lock the given flowers in id order.
+    Returns {flower_id: {'id', 'name', 'image', 'price', 'stock', 'reserved_stock'}}.
+    """
+    flower_ids = list(flower_ids)
+    if not flower_ids:
+        return {}
+    rows = models.Flower.objects.select_for_update().filter(
+        id__in=flower_ids
+    ).order_by('id').values('id', 'name', 'image', 'price', 'stock', 'reserved_stock')
+    return {row['id']: row for row in rows}
+
+
+def check_stock(flower_counts):
+    """
+    Lock and verify available stock for {flower_id: qty} without changing it.
+    Returns the locked rows. Raises Flower.DoesNotExist for unknown ids and
+    InsufficientStock listing every short flower.
+    """
+    locked = lock_flowers(flower_counts.keys())
+    if len(locked) != len(flower_counts):
+        raise models.Flower.DoesNotExist('Flower not found')
+
+    shortages = [
+        _shortage(fl_id, locked[fl_id], qty)
+        for fl_id, qty in sorted(flower_counts.items())
+        if _available(locked[fl_id]) < qty
+    ]
+    if shortages:
+        raise InsufficientStock(shortages)
+    return locked
+
+
+def reserve_stock(flower_counts):
+    """
+    Lock, verify and deduct the whole basket (COD checkout).
+    Returns the locked rows with the new stock values.
+    """
+    locked = check_stock(flower_counts)
+    return deduct_locked(flower_counts, locked)
+
+
+def deduct_locked(flower_counts, locked):
+    """Deduct {flower_id: qty} from rows already locked by lock_flowers()."""
+    return _apply_guarded('stock = f.stock - v.qty', flower_counts, locked)
+
+
+def place_holds(order, flower_counts, ttl=None):
+    """
+    Set the basket aside for an online order until it is paid or `ttl`
+    (default settings.STOCK_HOLD_TTL) runs out.
+    """
+    locked = check_stock(flower_counts)
+    _apply_guarded('reserved_stock = f.reserved_stock + v.qty', flower_counts, locked)
+
+    expires_at = timezone.now() + (ttl or settings.STOCK_HOLD_TTL)
+    models.StockHold.objects.bulk_create([
+        models.StockHold(
+            order=order,
+            flower_id=fl_id,
+            quantity=qty,
+            expires_at=expires_at,
+        )
+        for fl_id, qty in flower_counts.items()
+    ])
+    return locked
+
+
+def _held_counts(order_ids):
+    rows = models.StockHold.objects.filter(
+        order_id__in=order_ids
+    ).values('flower_id').annotate(qty=Sum('quantity')).order_by('flower_id')
+    return {row['flower_id']: row['qty'] for row in rows}
+
+
+def convert_holds(order_ids):
+    """
+    Payment captured: the held quantities of these orders become a real
+    deduction, in one statement. Returns (levels, ids of orders that still
+    had holds) — orders missing from the set were already released.
+    """
+    held = set(
+        models.StockHold.objects.filter(order_id__in=order_ids)
+        .values_list('order_id', flat=True).distinct()
+    )
+    counts = _held_counts(held)
+    if not counts:
+        return {}, held
+
+    lock_flowers(counts.keys())
+    # GREATEST: an admin may have lowered stock under the hold meanwhile
+    levels = _update_from_values(
+        'stock = GREATEST(f.stock - v.qty, 0), '
+        'reserved_stock = GREATEST(f.reserved_stock - v.qty, 0)',
+        sorted(counts.items()),
+    )
+    models.StockHold.objects.filter(order_id__in=held).delete()
+    return levels, held
+
+
+def release_holds(order_ids):
+    """Give the held stock of these orders back. Returns flowers touched."""
+    counts = _held_counts(order_ids)
+    if not counts:
+        return 0
+
+    lock_flowers(counts.keys())
+    _update_from_values(
+        'reserved_stock = GREATEST(f.reserved_stock - v.qty, 0)',
+        sorted(counts.items()),
+    )
+    models.StockHold.objects.filter(order_id__in=order_ids).delete()
+    return len(counts)
+
+
+def deduct_stock(flower_counts):
+    """
+    Capture without a hold (it expired first): the customer has paid, so the
+    order is confirmed and stock is clamped at 0 as before. Holds of other
+    orders are clamped to what is left — those orders are oversold either
+    way, and convert / release already floor at 0. Returns the levels.
+    """
+    lock_flowers(flower_counts.keys())
+    return _update_from_values(
+        'stock = GREATEST(f.stock - v.qty, 0), '
+        'reserved_stock = LEAST(f.reserved_stock, GREATEST(f.stock - v.qty, 0))',
+        sorted(flower_counts.items()),
+    )
+
+
+def restore_stock(flower_counts):
+    """Put a cancelled order's {flower_id: qty} back on the shelf. Returns the levels."""
+    lock_flowers(flower_counts.keys())
+    return _update_from_values(
+        'stock = f.stock + v.qty',
+        sorted(flower_counts.items()),
+    )
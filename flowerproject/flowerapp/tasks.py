@@ -3,13 +3,17 @@ from django.conf import settings
 from .models import Order
 import boto3
 from botocore.exceptions import ClientError
+import logging
 import os
+import requests
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 from .firebase import send_push_notification
 from .firebase import send_fcm_to_admin
 from django.db.models import F
 
+logger = logging.getLogger(__name__)
+
 # ─────────────────────────────────────────────
 # ADD THESE 2 FUNCTIONS TO YOUR tasks.py file
 # ─────────────────────────────────────────────
@@ -56,6 +60,32 @@ def notify_stock_update(flower):
     )
 
 
+def notify_stock_updates(flowers):
+    """
+    ONE broadcast for many stock changes (bulk import / batch jobs).
+    flowers: iterable of {'id', 'name', 'stock'} dicts.
+    """
+    channel_layer = get_channel_layer()
+    async_to_sync(channel_layer.group_send)(
+        "stock_updates",
+        {
+            "type": "stock_update",
+            "data": {
+                "type": "stock_update_batch",
+                "flowers": [
+                    {
+                        "flower_id": flower["id"],
+                        "flower_name": flower["name"],
+                        "stock": flower["stock"],
+                        "low_stock": flower["stock"] <= 5,
+                    }
+                    for flower in flowers
+                ],
+            }
+        }
+    )
+
+
 def get_status_message(status):
     """Human-friendly message for each order status"""
     messages = {
@@ -67,6 +97,9 @@ def get_status_message(status):
         "delivered":       "🌿 Delivered! Enjoy your plants.",
         "cancelled":       "❌ Order cancelled.",
         "refunded":        "💰 Refund initiated (5-7 business days).",
+        "queued":          "⏳ Placing your order...",
+        "rejected":        "❌ Sorry, some items sold out before we could place your order.",
+        "failed":          "❌ Sorry, we couldn't place your order. Please try again.",
     }
     return messages.get(status, f"Status updated: {status}")
 
@@ -145,17 +178,11 @@ Thank you for shopping with Bloom Heaven.
         raise self.retry(exc=exc, countdown=10)
 
 
-@shared_task(bind=True, max_retries=3)
-def send_status_update_email(self, order_id, new_status):
-    try:
-        order = Order.objects.select_related("customer__user").get(id=order_id)
-        user_email = order.customer.user.email
-        if not user_email:
-            return "No email found"
-
-        if new_status == 'shipped':
-            subject = f'Your Order #{order.id} is on the way! 🚚'
-            message = f"""Hi {order.customer.user.username},
+def status_update_email(order, new_status):
+    """(subject, message) for a status the customer is emailed about, else None."""
+    if new_status == 'shipped':
+        subject = f'Your Order #{order.id} is on the way! 🚚'
+        message = f"""Hi {order.customer.user.username},
 
 Great news! Your plants have been shipped and are on their way to you 🚚
 
@@ -169,9 +196,9 @@ For any queries call us at +91 88486 22015.
 Thank you for shopping with Bloom Heaven 🌸
 """
 
-        elif new_status == 'delivered':
-            subject = f'Your Order #{order.id} has been Delivered! 🌿'
-            message = f"""Hi {order.customer.user.username},
+    elif new_status == 'delivered':
+        subject = f'Your Order #{order.id} has been Delivered! 🌿'
+        message = f"""Hi {order.customer.user.username},
 
 Your plants have arrived! We hope you love them 🌿
 
@@ -185,9 +212,24 @@ If you have any issues with your order, contact us within 24 hours:
 Thank you for shopping with Bloom Heaven 🌸
 """
 
-        else:
+    else:
+        return None
+    return subject, message
+
+
+@shared_task(bind=True, max_retries=3)
+def send_status_update_email(self, order_id, new_status):
+    try:
+        order = Order.objects.select_related("customer__user").get(id=order_id)
+        user_email = order.customer.user.email
+        if not user_email:
+            return "No email found"
+
+        email = status_update_email(order, new_status)
+        if email is None:
             return f"No email needed for status: {new_status}"
 
+        subject, message = email
         send_email(
             to_email=user_email,
             subject=subject,
@@ -199,6 +241,50 @@ Thank you for shopping with Bloom Heaven 🌸
         raise self.retry(exc=exc, countdown=10)
 
 
+@shared_task(bind=True, max_retries=3)
+def notify_order_status_batch(self, order_ids, new_status):
+    """
+    Customer notifications for a bulk status change (order_status.py):
+    WebSocket, push and email for every order, from one orders query and one
+    FCM token query. Orders whose notification failed are retried alone.
+    """
+    from .models import FCMToken
+
+    orders = list(
+        Order.objects.select_related("customer__user").filter(id__in=order_ids).order_by("id")
+    )
+    tokens = {}
+    for user_id, token in FCMToken.objects.filter(
+        user_id__in={order.customer.user_id for order in orders}
+    ).values_list("user_id", "token"):
+        tokens.setdefault(user_id, []).append(token)
+
+    failed = []
+    for order in orders:
+        # the status this batch set, even if the order has moved on since
+        order.status = new_status
+        try:
+            notify_customer_order_status(order)
+            for token in tokens.get(order.customer.user_id, []):
+                send_push_notification(
+                    fcm_token=token,
+                    title=f"Order #{order.id}",
+                    body=get_status_message(new_status),
+                    data={"order_id": str(order.id), "type": "status_update", "status": new_status},
+                )
+            email = status_update_email(order, new_status)
+            if email and order.customer.user.email:
+                subject, message = email
+                send_email(to_email=order.customer.user.email, subject=subject, message=message)
+        except Exception:
+            logger.exception("Status notification for order %s failed", order.id)
+            failed.append(order.id)
+
+    if failed:
+        raise self.retry(args=[failed, new_status], countdown=30 * 2 ** self.request.retries)
+    return len(orders)
+
+
 def get_ses_client():
     return boto3.client(
         'ses',
@@ -253,7 +339,7 @@ def notify_if_low_stock(order_id):
     except Order.DoesNotExist:
         return
 
-    for item in order.items.select_related('flower').all():
+    for item in order.items.filter(flower__isnull=False).select_related('flower'):
         
         # ✅ just refresh and check
         item.flower.refresh_from_db()
@@ -266,4 +352,214 @@ def notify_if_low_stock(order_id):
             send_fcm_to_admin(
                 f'{item.flower.name} low stock! '
                 f'Only {item.flower.stock} left!'
-            )
\ No newline at end of file
+            )
+
+@shared_task
+def notify_low_stock(flowers):
+    """
+    Admin alert for flowers that ran low. flowers: {'id', 'name', 'stock'}
+    dicts straight from the stock UPDATE's RETURNING — no re-query.
+    """
+    for flower in flowers:
+        if flower['stock'] == 0:
+            send_fcm_to_admin(
+                f'{flower["name"]} out of stock!'
+            )
+        elif flower['stock'] <= 5:
+            send_fcm_to_admin(
+                f'{flower["name"]} low stock! '
+                f'Only {flower["stock"]} left!'
+            )
+
+
+@shared_task
+def release_expired_holds(batch_size=500):
+    """
+    Celery beat: release stock held by online orders whose payment window
+    ran out and mark those orders payment_failed, one batch per transaction.
+    """
+    from django.db import transaction
+    from django.utils import timezone
+    from .models import StockHold
+    from .stock import release_holds
+    from .catalog_cache import bump_catalog_version
+
+    released = 0
+    while True:
+        now = timezone.now()
+        with transaction.atomic():
+            # skip_locked: orders the webhook is confirming right now
+            order_ids = list(
+                Order.objects.select_for_update(skip_locked=True).filter(
+                    status='payment_pending',
+                    id__in=StockHold.objects.filter(
+                        expires_at__lte=now
+                    ).values('order_id'),
+                ).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not order_ids:
+                break
+
+            release_holds(order_ids)
+            Order.objects.filter(id__in=order_ids).update(
+                status='payment_failed',
+                payment_status='failed',
+                updated_at=now,
+            )
+            transaction.on_commit(bump_catalog_version)
+
+        released += len(order_ids)
+        if len(order_ids) < batch_size:
+            break
+
+    return released
+
+
+@shared_task(bind=True, max_retries=5)
+def process_refund(self, refund_id):
+    """
+    Send a cancelled order's refund to Razorpay, outside any DB lock.
+    Retries with backoff; after the last attempt the refund is marked failed
+    and the admin is told.
+    """
+    from django.db import transaction
+    from django.utils import timezone
+    from .models import Refund
+    from .payments import PaymentGatewayError, get_gateway, to_paise
+
+    try:
+        refund = Refund.objects.select_related('order').get(id=refund_id)
+    except Refund.DoesNotExist:
+        return
+    if refund.status != 'pending':
+        return
+
+    order   = refund.order
+    gateway = get_gateway()
+    try:
+        result = None
+        if refund.attempts:
+            # an earlier attempt may have reached Razorpay before timing out
+            result = gateway.find_refund(order.razorpay_payment_id, refund.receipt)
+        if result is None:
+            result = gateway.refund(
+                order.razorpay_payment_id,
+                to_paise(refund.amount),
+                receipt=refund.receipt,
+            )
+    except PaymentGatewayError as exc:
+        Refund.objects.filter(id=refund.id).update(
+            attempts=F('attempts') + 1,
+            last_error=str(exc),
+            updated_at=timezone.now(),
+        )
+        if self.request.retries >= self.max_retries:
+            Refund.objects.filter(id=refund.id).update(status='failed')
+            send_fcm_to_admin(f'Refund for order #{order.id} failed: {exc}')
+            return
+        raise self.retry(exc=exc, countdown=30 * 2 ** self.request.retries)
+
+    now = timezone.now()
+    with transaction.atomic():
+        Refund.objects.filter(id=refund.id).update(
+            status='processed',
+            razorpay_refund_id=result['id'],
+            attempts=F('attempts') + 1,
+            last_error='',
+            updated_at=now,
+        )
+        Order.objects.filter(id=order.id).update(
+            payment_status='refunded',
+            updated_at=now,
+        )
+
+
+@shared_task
+def reconcile_flash_sale_stock():
+    """Celery beat: keep the Redis flash-sale counts in step with Flower stock."""
+    from .flashsale import reconcile
+    return reconcile()
+
+
+@shared_task
+def process_checkouts(batch_size=200):
+    """
+    Place queued async-checkout orders. Routed to the `checkout` queue
+    (CELERY_TASK_ROUTES) so checkout peaks never wait behind emails.
+    """
+    from .checkout import process_batch
+
+    placed = 0
+    while True:
+        count   = process_batch(batch_size)
+        placed += count
+        if count < batch_size:
+            return placed
+
+
+@shared_task
+def process_webhook_events(batch_size=100):
+    """
+    Apply stored Razorpay webhook events (webhooks.py). Queued by the webhook
+    view; the beat entry drains anything it missed.
+    """
+    from .webhooks import process_batch
+
+    applied = 0
+    while True:
+        count    = process_batch(batch_size)
+        applied += count
+        if count < batch_size:
+            return applied
+
+
+@shared_task
+def dispatch_outbox(batch_size=100):
+    """
+    Deliver pending order side effects (outbox.py). Nudged after each
+    commit that writes events; the beat entry retries and catches up.
+    """
+    from .outbox import BACKLOG_WARN_SECONDS, backlog, dispatch
+
+    attempted = 0
+    while True:
+        count      = dispatch(batch_size)
+        attempted += count
+        if count < batch_size:
+            break
+
+    stats = backlog()
+    if stats['oldest_pending_seconds'] > BACKLOG_WARN_SECONDS:
+        logger.warning('Outbox backlog: %s', stats)
+    return attempted
+
+
+@shared_task
+def purge_outbox():
+    """Celery beat: drop delivered outbox events after OUTBOX_RETENTION."""
+    from .outbox import purge_sent
+    return purge_sent(settings.OUTBOX_RETENTION)
+
+
+@shared_task
+def refresh_sales_rollups():
+    """Celery beat: fold orders changed since the last run into the sales rollups."""
+    from .rollups import refresh
+    return len(refresh())
+
+
+@shared_task(bind=True, max_retries=5)
+def purge_catalog_cdn(self, keys):
+    """Purge CDN pages by surrogate key (Fastly-style: keys in the Surrogate-Key header)."""
+    try:
+        response = requests.post(
+            settings.CATALOG_CDN_PURGE_URL,
+            headers={
+                'Surrogate-Key': ' '.join(keys),
+                'Fastly-Key': settings.CATALOG_CDN_PURGE_TOKEN or '',
+            },
+            timeout=10,
+        )
+        response.raise_for_status()
+    except requests.RequestException as exc:
+        raise self.retry(exc=exc, countdown=10)
@@ -1,3 +1,487 @@
-from django.test import TestCase
+import json
+from contextlib import ExitStack, contextmanager
+from base64 import urlsafe_b64encode
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import redis
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models.query import QuerySet
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from kombu.exceptions import OperationalError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from flowerapp import models, projections, rollups, serializers
+from flowerapp.checkout import checkout_request, process_batch
+from flowerapp.paginator import estimated_count
+
+API = '/flowerapp/api/v1'
+
+
+@contextmanager
+def redis_down():
+    """Every cache call fails the way the Redis backend does when Redis is gone."""
+    down = redis.ConnectionError('Connection refused')
+    with ExitStack() as stack:
+        for name in ('get', 'add', 'set', 'delete', 'incr', 'get_or_set', 'get_many', 'set_many'):
+            stack.enter_context(mock.patch.object(cache, name, side_effect=down))
+        yield
+
+
+def make_superadmin(username='boss'):
+    user = User.objects.create_user(username, f'{username}@example.com', 'pass', is_staff=True)
+    user.profile.role = 'superadmin'
+    user.profile.save()
+    return user
+
+
+def make_customer(username='buyer', pincode='688524'):
+    user = User.objects.create_user(username, f'{username}@example.com', 'pass')
+    return models.Customer.objects.create(user=user, address='Main road', pincode=pincode)
+
+
+def make_flower(name='Rose', price='10.00', stock=10, **fields):
+    return models.Flower.objects.create(
+        name=name, description='Fresh', price=Decimal(price), stock=stock, **fields
+    )
+
+
+def make_order(customer, flowers=(), **fields):
+    order = models.Order.objects.create(customer=customer, total_amount=Decimal('100.00'), **fields)
+    for flower in flowers:
+        models.OrderItem.objects.create(
+            order=order, flower=flower, flower_name=flower.name,
+            flower_image=flower.image.name or '', quantity=2, unit_price=flower.price,
+        )
+    return order
+
+
+class EstimatedCountTests(TestCase):
+
+    def setUp(self):
+        customer = make_customer()
+        for _ in range(3):
+            make_order(customer)
+
+    def test_estimate_runs_against_the_database(self):
+        count = estimated_count(models.Order.objects.all())
+        self.assertIsInstance(count, int)
+        self.assertGreaterEqual(count, 0)
+
+    def test_reads_postgres_explain_output(self):
+        # Django joins the single EXPLAIN (FORMAT JSON) row into the bare object
+        output = json.dumps({'Plan': {'Node Type': 'Seq Scan', 'Plan Rows': 42}})
+        with mock.patch.object(connection, 'vendor', 'postgresql'), \
+                mock.patch.object(QuerySet, 'explain', return_value=output):
+            self.assertEqual(estimated_count(models.Order.objects.all()), 42)
+
+        output = json.dumps([{'Plan': {'Node Type': 'Seq Scan', 'Plan Rows': 7}}])
+        with mock.patch.object(connection, 'vendor', 'postgresql'), \
+                mock.patch.object(QuerySet, 'explain', return_value=output):
+            self.assertEqual(estimated_count(models.Order.objects.all()), 7)
+
+    def test_admin_order_list_default_count(self):
+        client = APIClient()
+        client.force_authenticate(make_superadmin())
+        response = client.get(f'{API}/orders/', {'pagination': 'cursor'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['count_estimated'])
+        self.assertEqual(len(response.data['results']), 3)
+
+
+class AsyncCheckoutTests(TestCase):
+
+    def setUp(self):
+        self.customer = make_customer()
+        self.flower = make_flower(stock=5)
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer.user)
+
+    def queue(self, request):
+        return models.Order.objects.create(
+            customer=self.customer, payment_method='cod', status='queued',
+            checkout_request=request,
+        )
+
+    def test_enqueue_rejects_bad_flower_ids(self):
+        for flowers in (['abc'], [0], [-3], [1.5], [True], 'abc', [2 ** 40]):
+            response = self.client.post(
+                f'{API}/buy-now/?mode=async',
+                {'idempotency_key': f'key-{flowers!r}', 'pincode': '688524', 'flowers': flowers},
+                format='json',
+            )
+            self.assertEqual(response.status_code, 400, flowers)
+        self.assertFalse(models.Order.objects.exists())
+
+    def test_bad_request_fails_alone(self):
+        contact = {'address': '', 'phone': '', 'city': '', 'pincode': ''}
+        bad = [
+            self.queue({'flowers': [['abc', 1]], 'contact': contact}),
+            self.queue({'flowers': [[self.flower.id, 0]], 'contact': contact}),
+            self.queue({'flowers': [[self.flower.id, -2]], 'contact': contact}),
+            self.queue({'contact': contact}),
+            self.queue(None),
+        ]
+        good = self.queue(checkout_request({self.flower.id: 2}, {}, {}))
+
+        self.assertEqual(process_batch(), len(bad) + 1)
+
+        for order in bad:
+            order.refresh_from_db()
+            self.assertEqual(order.status, 'failed')
+            self.assertEqual(order.checkout_request['result'], {'error': 'Invalid checkout request'})
+        good.refresh_from_db()
+        self.assertEqual(good.status, 'confirmed')
+        self.assertEqual(good.items.get().quantity, 2)
+        self.flower.refresh_from_db()
+        self.assertEqual(self.flower.stock, 3)
+        self.assertEqual(process_batch(), 0)
+
+
+class StockTests(TestCase):
+
+    def test_nothing_to_update(self):
+        from flowerapp import stock
+        self.assertEqual(stock.lock_flowers(set()), {})
+        self.assertEqual(stock.restore_stock({}), {})
+        self.assertEqual(stock.deduct_stock({}), {})
+        self.assertEqual(stock.release_holds([]), 0)
+
+    def test_cancel_order_whose_flowers_are_gone(self):
+        customer = make_customer()
+        flower = make_flower()
+        order = make_order(customer, [flower], status='confirmed')
+        flower.delete()
+
+        client = APIClient()
+        client.force_authenticate(customer.user)
+        response = client.post(f'{API}/orders/{order.id}/cancel/')
+        self.assertEqual(response.status_code, 200)
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'cancelled')
+        self.assertEqual(order.items.get().flower_name, 'Rose')
+
+    def test_stock_cannot_drop_under_holds(self):
+        flower = make_flower(stock=10)
+        models.Flower.objects.filter(id=flower.id).update(reserved_stock=4)
+
+        client = APIClient()
+        client.force_authenticate(make_superadmin())
+        response = client.put(f'{API}/flowers/{flower.id}/', {
+            'name': 'Rose', 'description': 'Fresh', 'price': '10.00', 'stock': 3,
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('stock', response.data)
+        flower.refresh_from_db()
+        self.assertEqual((flower.stock, flower.reserved_stock), (10, 4))
+
+    def test_capture_without_hold_keeps_holds_within_stock(self):
+        from flowerapp import stock
+        flower = make_flower(stock=5)
+        models.Flower.objects.filter(id=flower.id).update(reserved_stock=5)
+        with transaction.atomic():
+            levels = stock.deduct_stock({flower.id: 3})
+        self.assertEqual(levels[flower.id]['stock'], 2)
+        self.assertEqual(levels[flower.id]['reserved_stock'], 2)
+
+
+class AdminOrderSearchTests(TestCase):
+
+    def test_flower_name_matches_the_snapshot(self):
+        customer = make_customer()
+        rose, lily = make_flower('Rose'), make_flower('Lily')
+        kept = make_order(customer, [rose])
+        gone = make_order(customer, [lily])
+        rose.name = 'Red Rose'
+        rose.save()
+        lily.delete()
+
+        client = APIClient()
+        client.force_authenticate(make_superadmin())
+        for name, expected in (('rose', [kept.id]), ('lily', [gone.id]), ('red', [])):
+            response = client.get(f'{API}/orders/', {'flower_name': name})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([row['id'] for row in response.data['results']], expected, name)
+
+    def test_date_range_uses_local_days(self):
+        customer = make_customer()
+        placed = {}
+        for label, moment in (
+            ('before', datetime(2026, 3, 1, 23, 59)),
+            ('first',  datetime(2026, 3, 2, 0, 0)),
+            ('last',   datetime(2026, 3, 3, 23, 59)),
+            ('after',  datetime(2026, 3, 4, 0, 0)),
+        ):
+            order = make_order(customer, status='shipped')
+            models.Order.objects.filter(id=order.id).update(created_at=timezone.make_aware(moment))
+            placed[label] = order.id
+
+        client = APIClient()
+        client.force_authenticate(make_superadmin())
+        response = client.get(f'{API}/orders/', {
+            'date_from': '2026-03-02', 'date_to': '2026-03-03',
+            'status': 'SHIPPED', 'ordering': 'created_at',
+        })
+        self.assertEqual([row['id'] for row in response.data['results']], [placed['first'], placed['last']])
+
+        response = client.get(f'{API}/orders/', {'date_from': 'not-a-date', 'date_to': '2026-02-30'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 4)
+
+
+class KeysetPaginationTests(TestCase):
+
+    @staticmethod
+    def cursor(position, reverse=0):
+        raw = json.dumps({'p': position, 'r': reverse}).encode()
+        return urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def test_walks_every_flower(self):
+        for n in range(5):
+            make_flower(f'Flower {n}', price=str(10 + n % 2))
+        client = APIClient()
+        seen, url = [], f'{API}/flowers/?pagination=cursor&ordering=-price&page_size=2'
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(sorted(seen), sorted(models.Flower.objects.values_list('id', flat=True)))
+
+    def test_tampered_cursor_is_invalid(self):
+        client = APIClient()
+        admin = APIClient()
+        admin.force_authenticate(make_superadmin())
+        for ordering, position in (
+            ('price', ['abc', 1]),
+            ('price', ['NaN', 1]),
+            ('price', [None, 1]),
+            ('price', ['1.00', 'x']),
+            ('id', [2 ** 80]),
+        ):
+            response = client.get(f'{API}/flowers/', {'ordering': ordering, 'cursor': self.cursor(position)})
+            self.assertEqual(response.status_code, 404, position)
+        for position in (['yesterday', 1], [{'a': 1}, 1], ['2026-03-01T10:00:00+05:30', '1.5']):
+            response = admin.get(f'{API}/orders/', {'cursor': self.cursor(position)})
+            self.assertEqual(response.status_code, 404, position)
+
+
+class IdempotencyTests(TestCase):
+
+    def test_checkout_without_redis_falls_back_to_the_constraint(self):
+        customer = make_customer()
+        flower = make_flower(stock=5)
+        client = APIClient()
+        client.force_authenticate(customer.user)
+        body = {'idempotency_key': 'once', 'pincode': '688524', 'flowers': [flower.id, flower.id]}
+
+        # on_commit callbacks run too: the catalog bump after the checkout
+        # commits must not turn it into a 500
+        with redis_down(), self.assertLogs('flowerapp.idempotency', 'WARNING'):
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                first = client.post(f'{API}/buy-now/', body, format='json')
+            self.assertTrue(callbacks)
+            with self.captureOnCommitCallbacks(execute=True):
+                retry = client.post(f'{API}/buy-now/', body, format='json')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.data['order_id'], first.data['order_id'])
+        self.assertEqual(models.Order.objects.count(), 1)
+        flower.refresh_from_db()
+        self.assertEqual(flower.stock, 3)
+
+
+class CatalogCacheHeaderTests(TestCase):
+
+    def test_not_modified_carries_the_same_headers(self):
+        flowers = [make_flower(f'Flower {n}') for n in range(3)]
+        client = APIClient()
+        full = client.get(f'{API}/flowers/')
+        self.assertEqual(full.status_code, 200)
+
+        again = client.get(f'{API}/flowers/', HTTP_IF_NONE_MATCH=full['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again['Surrogate-Key'], full['Surrogate-Key'])
+        self.assertEqual(again['Cache-Control'], full['Cache-Control'])
+        for flower in flowers:
+            self.assertIn(f'flower-{flower.id}', full['Surrogate-Key'].split())
+        self.assertIn('s-maxage=0', full['Cache-Control'])
+
+    @override_settings(CATALOG_CDN_PURGE_URL='https://cdn.example.com/purge', CATALOG_CDN_MAX_AGE=300)
+    def test_cdn_caches_only_what_a_write_purges(self):
+        make_flower()
+        response = APIClient().get(f'{API}/flowers/')
+        self.assertIn('s-maxage=300', response['Cache-Control'])
+        self.assertIn('catalog', response['Surrogate-Key'].split())
+
+        with mock.patch('flowerapp.tasks.purge_catalog_cdn.delay') as purge:
+            with self.captureOnCommitCallbacks(execute=True):
+                make_flower('Lily')
+        purge.assert_called_with(['catalog'])
+
+
+class SalesRollupTests(TestCase):
+
+    def test_first_refresh_only_starts_the_watermark(self):
+        customer = make_customer()
+        order = make_order(customer, [make_flower()], status='confirmed')
+        models.Order.objects.filter(id=order.id).update(
+            updated_at=timezone.now() - timedelta(days=400)
+        )
+
+        with self.assertLogs('flowerapp.rollups', 'WARNING'):
+            self.assertEqual(rollups.refresh(), [])
+        self.assertIsNotNone(rollups.watermark())
+        self.assertFalse(models.DailySalesRollup.objects.exists())
+
+        # later changes are followed from there
+        models.RollupWatermark.objects.update(watermark=timezone.now() - timedelta(hours=1))
+        models.Order.objects.filter(id=order.id).update(
+            updated_at=timezone.now() - timedelta(minutes=30)
+        )
+        self.assertEqual(len(rollups.refresh()), 1)
+        self.assertEqual(models.DailySalesRollup.objects.get().quantity, 2)
+
+    def test_deleted_flowers_rank_by_their_snapshot_name(self):
+        customer = make_customer()
+        rose, lily, tulip = make_flower('Rose'), make_flower('Lily'), make_flower('Tulip')
+        make_order(customer, [rose, lily, tulip], status='confirmed')
+        models.OrderItem.objects.filter(flower=tulip).update(quantity=5)
+        today = timezone.localdate()
+        rollups.rebuild_days([today])
+
+        # deleted after the rebuild: the row keeps the old flower_id
+        rose_id = rose.id
+        rose.delete()
+        top = rollups.top_flowers(today, today, by='quantity')
+        self.assertIn((rose_id, 'Rose'), [(row['flower'], row['name']) for row in top])
+
+        # rebuilt after the deletes: flower_id NULL, one row per name
+        lily.delete()
+        tulip.delete()
+        rollups.rebuild_days([today])
+        top = rollups.top_flowers(today, today, by='quantity')
+        self.assertEqual(
+            [(row['flower'], row['name'], row['quantity']) for row in top],
+            [(None, 'Tulip', 5), (None, 'Lily', 2), (None, 'Rose', 2)],
+        )
+
+
+class CatalogCacheOutageTests(TestCase):
+
+    def test_catalog_builds_uncached(self):
+        flower = make_flower('Rose')
+        client = APIClient()
+        urls = [
+            f'{API}/flowers/',
+            f'{API}/flowers/?facets=1',
+            f'{API}/flowers/{flower.id}/',
+            f'{API}/flowers/facets/',
+        ]
+        if connection.vendor == 'postgresql':
+            urls.append(f'{API}/flowers/search/?q=rose')
+        with redis_down():
+            for url in urls:
+                response = client.get(url)
+                self.assertEqual(response.status_code, 200, url)
+
+            # no stale 304 while versions can't be read
+            etag = client.get(f'{API}/flowers/')['ETag']
+            self.assertEqual(client.get(f'{API}/flowers/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_bump_after_commit_never_raises(self):
+        with redis_down(), self.assertLogs('flowerapp.catalog_cache', 'ERROR'), \
+                self.captureOnCommitCallbacks(execute=True):
+            make_flower('Lily')
+
+
+class RazorpayWebhookTests(TestCase):
+
+    def test_stored_event_is_acked_when_the_broker_is_down(self):
+        body = {'event': 'payment.captured', 'payload': {}}
+        with mock.patch('flowerapp.views.process_webhook_events.delay',
+                        side_effect=OperationalError('broker down')), \
+                self.assertLogs('flowerapp.views', 'ERROR'):
+            response = APIClient().post(
+                '/flowerapp/webhook/razorpay/', body, format='json',
+                HTTP_X_RAZORPAY_EVENT_ID='evt_1',
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(models.WebhookEvent.objects.get().event_id, 'evt_1')
+
+
+class ProjectionParityTests(TestCase):
+    """values() projections must render exactly what the serializers do."""
+
+    SPARSE = [
+        {},
+        {'fields': 'name,price'},
+        {'fields': 'items,item_summary,grand_total,image,category_name'},
+        {'exclude': 'items,image,category_name,customer_username'},
+        {'fields': 'id', 'exclude': 'id'},
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        category = models.Category.objects.create(name='Indoor', descrition='Shade')
+        cls.flowers = [
+            make_flower('Rose', '12.50', stock=4, category=category, image='flowers/rose.jpg'),
+            make_flower('Lily', '8.00', stock=0, flash_sale=True, image='https://cdn.example.com/lily.png'),
+            make_flower('Fern', '3.10', stock=9),
+        ]
+        models.Flower.objects.filter(id=cls.flowers[0].id).update(reserved_stock=3)
+
+        for n, flowers in enumerate([cls.flowers, cls.flowers[1:], []]):
+            customer = make_customer(f'buyer{n}', pincode=None if n == 2 else '688524')
+            order = make_order(customer, flowers, status='confirmed', item_summary='Rose ×2')
+            cart = models.Cart.objects.create(customer=customer)
+            for flower in flowers:
+                models.CartItem.objects.create(cart=cart, flower=flower, quantity=3)
+        # snapshot outlives the flower
+        models.Flower.objects.create(name='Tulip', description='x', price=Decimal('1.00'))
+        gone = make_order(customer, [models.Flower.objects.get(name='Tulip')])
+        models.Flower.objects.filter(name='Tulip').delete()
+        cls.gone = gone
+
+    def assertSameJSON(self, expected, actual, params):
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(actual), renderer.render(expected), params)
+
+    def test_flowers(self):
+        for params in self.SPARSE:
+            fields = projections.select_fields(params, projections.FLOWER_FIELDS)
+            flowers = models.Flower.objects.select_related('category').order_by('id')
+            rows = models.Flower.objects.order_by('id').values(*projections.flower_values(fields))
+            self.assertSameJSON(
+                serializers.FlowerSerializer(flowers, many=True, fields=fields).data,
+                projections.flower_rows(rows, fields=fields),
+                params,
+            )
+
+    def test_orders(self):
+        for params in self.SPARSE:
+            fields = projections.select_fields(params, projections.ORDER_FIELDS)
+            orders = models.Order.objects.order_by('id')
+            rows = orders.values(*projections.order_values(fields))
+            self.assertSameJSON(
+                serializers.OrderSerializer(orders, many=True, fields=fields).data,
+                projections.order_rows(rows, fields=fields),
+                params,
+            )
+        self.assertIsNone(self.gone.items.get().flower)
+
+    def test_carts(self):
+        for params in self.SPARSE:
+            fields = projections.select_fields(params, projections.CART_FIELDS)
+            for cart in models.Cart.objects.order_by('id'):
+                self.assertSameJSON(
+                    serializers.CartSerializer(cart, fields=fields).data,
+                    projections.cart_data(cart, fields=fields),
+                    params,
+                )
@@ -1,6 +1,6 @@
 from django.urls import path
 from django.views.generic import TemplateView
-from .views import FlowerListCreateAPIView, flower_page,LoginAPIView,BuyNowAPIView,SignupAPIView,signup_page,login_page,OrderListAPIView,admin_orders_page,MeView,OrderDetailAPIView,CartAPIView,CartItemAPIView,CustomerOrderListAPIView,CreatePaymentOrderAPIView,RazorpayWebhookAPIView,GoogleLoginAPIView,OrderCancelAPIView,LogoutAPIView,FlowerDetailAPIView,flower_detail_page,admin_order_detail_page,SaveFCMTokenView
+from .views import FlowerListCreateAPIView, flower_page,LoginAPIView,BuyNowAPIView,SignupAPIView,signup_page,login_page,OrderListAPIView,OrderExportAPIView,OrderBulkStatusAPIView,admin_orders_page,MeView,OrderDetailAPIView,CartAPIView,CartItemAPIView,CustomerOrderListAPIView,CreatePaymentOrderAPIView,RazorpayWebhookAPIView,GoogleLoginAPIView,OrderCancelAPIView,LogoutAPIView,FlowerDetailAPIView,FlowerSearchAPIView,FlowerFacetsAPIView,FlowerBulkImportAPIView,OrderStatusAPIView,OutboxBacklogAPIView,SalesAnalyticsAPIView,TopFlowersAPIView,flower_detail_page,admin_order_detail_page,SaveFCMTokenView
 
 
 urlpatterns = [
@@ -13,14 +13,20 @@ urlpatterns = [
 
     # Flowers
     path('api/v1/flowers/',        FlowerListCreateAPIView.as_view()),
+    path('api/v1/flowers/search/', FlowerSearchAPIView.as_view()),
+    path('api/v1/flowers/facets/', FlowerFacetsAPIView.as_view()),
+    path('api/v1/flowers/bulk/',   FlowerBulkImportAPIView.as_view()),
     path('api/v1/flowers/<int:pk>/', FlowerDetailAPIView.as_view()),
 
     # Orders
     path('api/v1/orders/',         OrderListAPIView.as_view()),
+    path('api/v1/orders/export/',  OrderExportAPIView.as_view(), name='order-export'),
+    path('api/v1/orders/bulk-status/', OrderBulkStatusAPIView.as_view(), name='order-bulk-status'),
      path('api/v1/my-orders/',      CustomerOrderListAPIView.as_view()),
     path('admin/orders/<int:pk>/', admin_order_detail_page,      name='admin-order-detail'), 
     path('api/v1/orders/<int:pk>/', OrderDetailAPIView.as_view()),
-    path('api/v1/buy-now/',        BuyNowAPIView.as_view()),
+    path('api/v1/orders/<int:pk>/status/', OrderStatusAPIView.as_view(), name='order-status'),
+    path('api/v1/buy-now/',        BuyNowAPIView.as_view(), name='buy-now'),
 	path('api/v1/orders/<int:order_id>/cancel/', OrderCancelAPIView.as_view()),
 
     # Cart
@@ -28,7 +34,7 @@ urlpatterns = [
     path('api/v1/cart/<int:item_id>/', CartItemAPIView.as_view()),
 
     # Payment
-    path('api/v1/create-payment/', CreatePaymentOrderAPIView.as_view()),
+    path('api/v1/create-payment/', CreatePaymentOrderAPIView.as_view(), name='create-payment'),
     path('webhook/razorpay/',      RazorpayWebhookAPIView.as_view()),
 
     # Template pages
@@ -39,4 +45,7 @@ urlpatterns = [
     path('orders/',     TemplateView.as_view(template_name='orders.html')),
     path('admin/orders/', admin_orders_page, name='admin-orders-page'),
     path('api/v1/admin/save-fcm-token/', SaveFCMTokenView.as_view()),
+    path('api/v1/admin/outbox/',   OutboxBacklogAPIView.as_view()),
+    path('api/v1/admin/analytics/sales/',       SalesAnalyticsAPIView.as_view(), name='analytics-sales'),
+    path('api/v1/admin/analytics/top-flowers/', TopFlowersAPIView.as_view(), name='analytics-top-flowers'),
 ]
\ No newline at end of file
@@ -1,12 +1,16 @@
 # Django
 from django.conf import settings
 from django.contrib.auth import authenticate, login
-from django.db import transaction
-from django.db.models import Q, Sum, Prefetch
-from django.http import HttpResponse
+from django.db import IntegrityError, transaction
+from django.db.models import Q, Sum, Max, Count
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.http import HttpResponse, Http404, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 
-from collections import Counter
+from datetime import timedelta
 
 # DRF
 from rest_framework import status
@@ -17,52 +21,79 @@ from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
 from allauth.socialaccount.providers.oauth2.client import OAuth2Client
-from .firebase import send_order_notification_to_all
-from .tasks import notify_if_low_stock
 from django.db.models import F
 # Third party
 import json
-import razorpay
 import requests as python_requests
 
 
 # Local
 from flowerapp import models, serializers
+from . import catalog_cache, flashsale, order_status, outbox, projections, rollups
+from .catalog_import import import_flowers
+from .order_export import EXPORT_FORMATS, iter_export
+from .idempotency import run_once
+from .snapshots import basket_summary, order_items
+from .stock import InsufficientStock, reserve_stock, place_holds, restore_stock, stock_levels
 from .serializers import SignupSerializer, LoginSerializer,OrderSerializer
 from .permissions import IsSuperAdmin
-from .pagination import FlowerPagination, OrderPagination
-from .paginator import AdminOrderPagination
-from .tasks import send_order_confirmation_email,send_order_cancellation_email,send_status_update_email
+from .pagination import FlowerPagination, FlowerCursorPagination, OrderPagination
+from .filters import MIN_SEARCH_LENGTH, filter_admin_orders, filter_flowers, flower_facets
+from .conditional import (
+    make_etag, not_modified, with_validators,
+    catalog_cache_headers, private_cache_headers,
+)
+from .paginator import AdminOrderPagination, AdminOrderKeysetPagination
+from .tasks import send_status_update_email
+from .tasks import process_checkouts, process_webhook_events, get_status_message
+from .checkout import checkout_request, parse_basket
+from .payments import PaymentGatewayError, get_gateway, to_paise
+from .webhooks import record_event
 
 
 class FlowerListCreateAPIView(APIView):
     permission_classes = [AllowAny]
 	
     def get(self, request):
-        flowers = (
-            models.Flower.objects.select_related("category").order_by("id")
+        # ✅ validator from the catalog version — no query, no serializer
+        etag = make_etag('flowers', catalog_cache.get_catalog_version(), request.GET.urlencode())
+
+        # ✅ serialized pages cached per catalog version — a 304 reads the
+        # same cached page so it carries the same Surrogate-Key as the 200
+        data = catalog_cache.get_or_build(
+            catalog_cache.flower_list_key(request.GET),
+            lambda: self.build_page(request),
         )
-        category_id = request.GET.get("category")
-        price_range=request.GET.get('price')
-        if price_range:
-            try:
-                min_price,max_price=price_range.split("-")
-                min_price = int(min_price)
-                max_price=int(max_price)
-
-                if max_price:
-                    flowers=flowers.filter(price__gte=min_price,price__lte=max_price)
-                else:
-                    flowers=flowers.filter(price__gte=min_price)
-            except ValueError:
-                pass    
-
-        if category_id:
-            flowers = flowers.filter(category_id=category_id)
-        paginator = FlowerPagination()
+        flower_ids = [f['id'] for f in data['results']]
+
+        cached = not_modified(request, etag)
+        if cached:
+            return catalog_cache_headers(cached, flower_ids)
+        response = with_validators(Response(data), etag)
+        return catalog_cache_headers(response, flower_ids)
+
+    def build_page(self, request):
+        # ?fields= / ?exclude= → only those columns are selected
+        fields  = projections.select_fields(request.GET, projections.FLOWER_FIELDS)
+        flowers = filter_flowers(
+            models.Flower.objects.order_by("id"),
+            request.GET,
+        ).values(*projections.flower_values(fields))
+        # ?pagination=cursor → keyset pages, no OFFSET / COUNT(*)
+        # default stays page-number for the existing frontend
+        if request.GET.get('pagination') == 'cursor' or request.GET.get('cursor'):
+            paginator = FlowerCursorPagination()
+        else:
+            paginator = FlowerPagination()
         result_page = paginator.paginate_queryset(flowers, request)
-        serializer = serializers.FlowerSerializer(result_page, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        data = paginator.get_paginated_response(
+            projections.flower_rows(result_page, fields=fields)
+        ).data
+
+        # ?facets=1 → counts for the filter sidebar in the same response
+        if request.GET.get('facets') in ('1', 'true'):
+            data['facets'] = cached_flower_facets(request)
+        return data
 
     def post(self, request):
             serializer = serializers.FlowerSerializer(data=request.data)
@@ -71,24 +102,139 @@ class FlowerListCreateAPIView(APIView):
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class FlowerBulkImportAPIView(APIView):
+    """
+    POST CSV or JSON Lines, either as multipart `file` or as the raw body
+    (Content-Type: text/csv / application/x-ndjson). Rows with `id` update,
+    rows without create. Returns counts + per-row errors.
+    """
+    permission_classes = [IsSuperAdmin]
+
+    def post(self, request):
+        content_type = request.content_type or ''
+
+        if content_type.startswith('multipart/'):
+            upload = request.FILES.get('file')
+            if not upload:
+                return Response({'error': 'file is required'}, status=400)
+            lines    = upload
+            filename = upload.name.lower()
+        else:
+            # ✅ raw body is read line by line — never loaded whole
+            lines    = request.stream
+            filename = ''
+
+        input_format = request.query_params.get('input_format')
+        if not input_format:
+            is_csv = 'csv' in content_type or filename.endswith('.csv')
+            input_format = 'csv' if is_csv else 'jsonl'
+        if input_format not in ('csv', 'jsonl'):
+            return Response({'error': 'input_format must be csv or jsonl'}, status=400)
+        if lines is None:
+            return Response({'error': 'Empty body'}, status=400)
+
+        report = import_flowers(lines, input_format=input_format)
+        return Response(report, status=200)
+
+
+def cached_flower_facets(request):
+    return catalog_cache.get_or_build(
+        catalog_cache.flower_list_key(
+            request.GET, names=catalog_cache.FACET_CACHE_PARAMS, kind='facets'
+        ),
+        lambda: flower_facets(filter_flowers(models.Flower.objects.all(), request.GET)),
+    )
+
+
+class FlowerFacetsAPIView(APIView):
+    """Category / price band / in-stock counts for the current filters."""
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        return Response(cached_flower_facets(request))
+
+
+class FlowerSearchAPIView(APIView):
+    """
+    Ranked full-text search over name, category, description and light
+    requirement. Falls back to trigram similarity on the name for typos.
+    Accepts the same ?category= / ?price= filters as the flower list.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        term = request.GET.get('q', '').strip()
+        if not term:
+            return Response({'error': 'q is required'}, status=400)
+
+        data = catalog_cache.get_or_build(
+            catalog_cache.flower_list_key(
+                request.GET, names=catalog_cache.SEARCH_CACHE_PARAMS, kind='search'
+            ),
+            lambda: self.build_page(request, term),
+        )
+        return Response(data)
+
+    def build_page(self, request, term):
+        flowers = filter_flowers(models.Flower.objects.all(), request.GET)
+
+        query   = SearchQuery(term, config='english', search_type='websearch')
+        matches = flowers.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', 'id')
+
+        # ✅ nothing matched → "lavendar", "monstra" etc.
+        if not matches.exists():
+            matches = flowers.filter(name__trigram_word_similar=term).annotate(
+                similarity=TrigramWordSimilarity(term, 'name')
+            ).order_by('-similarity', 'id')
+
+        fields      = projections.select_fields(request.GET, projections.FLOWER_FIELDS)
+        paginator   = FlowerPagination()
+        result_page = paginator.paginate_queryset(
+            matches.values(*projections.flower_values(fields)), request
+        )
+        return paginator.get_paginated_response(
+            projections.flower_rows(result_page, fields=fields)
+        ).data
+
+
 class FlowerDetailAPIView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request, pk):
+        fields = projections.select_fields(request.GET, projections.FLOWER_FIELDS)
+        etag   = make_etag('flower', pk, catalog_cache.get_catalog_version(), ','.join(fields))
+        cached = not_modified(request, etag)
+        if cached:
+            return catalog_cache_headers(cached, [pk])
+
         try:
-            flower = models.Flower.objects.get(pk=pk)
-            serializer = serializers.FlowerSerializer(flower, context={'request': request})
-            return Response(serializer.data)
+            data = catalog_cache.get_or_build(
+                catalog_cache.flower_detail_key(pk, fields),
+                lambda: self.build_detail(request, pk, fields),
+            )
+            return catalog_cache_headers(with_validators(Response(data), etag), [pk])
         except models.Flower.DoesNotExist:
             return Response({'error': 'Flower not found'}, status=404)
 
+    def build_detail(self, request, pk, fields):
+        flower = projections.only_queryset(
+            models.Flower.objects.all(), projections.FLOWER_COLUMNS, fields
+        ).get(pk=pk)
+        serializer = serializers.FlowerSerializer(flower, fields=fields, context={'request': request})
+        return serializer.data
+
     def put(self, request, pk):
         try:
-            flower = models.Flower.objects.get(pk=pk)
-            serializer = serializers.FlowerSerializer(flower, data=request.data, context={'request': request})
-            if serializer.is_valid():
-                serializer.save()
-                return Response(serializer.data)
+            # locked: save() writes every column, reserved_stock included, and
+            # validate_stock checks the new stock against the current holds
+            with transaction.atomic():
+                flower = models.Flower.objects.select_for_update().get(pk=pk)
+                serializer = serializers.FlowerSerializer(flower, data=request.data, context={'request': request})
+                if serializer.is_valid():
+                    serializer.save()
+                    return Response(serializer.data)
             return Response(serializer.errors, status=400)
         except models.Flower.DoesNotExist:
             return Response({'error': 'Flower not found'}, status=404)
@@ -301,29 +447,66 @@ class BuyNowAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        user        = request.user
-        customer, _ = models.Customer.objects.get_or_create(user=user)
-
-        address         = request.data.get('address')
-        phone           = request.data.get('phone')
-        city            = request.data.get('city', '')
-        pincode         = request.data.get('pincode', '')
-        flower_ids      = request.data.get('flowers', [])
-        payment_method  = request.data.get('payment_method', 'cod')
         idempotency_key = request.data.get('idempotency_key')
+        if not idempotency_key:
+            return Response({'error': 'Idempotency key required'}, status=400)
+
+        # opt-in: ?mode=async or `Prefer: respond-async` → 202 + poll
+        wants_async = (
+            request.query_params.get('mode') == 'async'
+            or 'respond-async' in request.META.get('HTTP_PREFER', '')
+        )
+        handler = self.enqueue if wants_async else self.checkout
+
+        # ✅ retries are answered from Redis — no DB work at all
+        return run_once(request.user.id, idempotency_key, lambda: handler(request))
 
+    @staticmethod
+    def validate(request):
+        """Cheap request checks shared by both modes. Returns an error Response or None."""
         from .delivery_zones import is_delivery_allowed
-        if not is_delivery_allowed(pincode):
+        if not is_delivery_allowed(request.data.get('pincode', '')):
             return Response({
                 'error': 'Sorry! We deliver only to Cherthala Taluk, Alappuzha area.'
             }, status=400)
 
-        if not flower_ids:
+        if not request.data.get('flowers', []):
             return Response({'error': 'No flowers found'}, status=400)
-        if not idempotency_key:
-            return Response({'error': 'Idempotency key required'}, status=400)
-        if payment_method == 'online':
+        try:
+            parse_basket(request.data.get('flowers'))
+        except ValueError:
+            return Response({'error': 'flowers must be a list of flower ids'}, status=400)
+        for param, field in (('phone', 'phone_number'), ('city', 'city')):
+            max_length = models.Customer._meta.get_field(field).max_length
+            if len(str(request.data.get(param) or '')) > max_length:
+                return Response({'error': f'{param} is too long (max {max_length})'}, status=400)
+        if request.data.get('payment_method', 'cod') == 'online':
             return Response({'error': 'Use create-payment API for online orders'}, status=400)
+        return None
+
+    @staticmethod
+    def order_response(order):
+        return Response({
+            'order_id':       order.id,
+            'total':          order.total_amount,
+            'status':         order.status,
+            'payment_status': order.payment_status,
+            'payment_method': order.payment_method,
+        })
+
+    def checkout(self, request):
+        user        = request.user
+        customer, _ = models.Customer.objects.get_or_create(user=user)
+
+        address         = request.data.get('address')
+        phone           = request.data.get('phone')
+        city            = request.data.get('city', '')
+        pincode         = request.data.get('pincode', '')
+        idempotency_key = request.data.get('idempotency_key')
+
+        error = self.validate(request)
+        if error:
+            return error
 
         if address: customer.address      = address
         if phone:   customer.phone_number = phone
@@ -337,103 +520,156 @@ class BuyNowAPIView(APIView):
             'pincode', 'district', 'state'
         ])
 
+        # cache entry gone (evicted / expired) → fall back to the DB
         existing_order = models.Order.objects.filter(
             idempotency_key=idempotency_key,
             customer=customer
         ).first()
         if existing_order:
-            return Response({
-                'order_id':       existing_order.id,
-                'total':          existing_order.total_amount,
-                'status':         existing_order.status,
-                'payment_status': existing_order.payment_status,
-                'payment_method': existing_order.payment_method,
-            })
+            return self.order_response(existing_order)
 
-        flower_counts = Counter(flower_ids)
+        flower_counts = parse_basket(request.data['flowers'])
 
-        # ✅ validate flowers exist BEFORE transaction
-        flowers    = models.Flower.objects.filter(
-            id__in=flower_counts.keys()
-        )
-        flower_map = {f.id: f for f in flowers}
+        # ✅ flash-sale flowers: losers get 409 here, before any row lock
+        try:
+            taken = flashsale.take(flower_counts)
+        except flashsale.SoldOut as exc:
+            return Response(exc.as_response_data(), status=409)
 
-        # ✅ check all flowers exist before transaction
-        for fl_id in flower_counts.keys():
-            if fl_id not in flower_map:
-                return Response(
-                    {'error': 'Flower not found'},
-                    status=400
+        placed = False
+        try:
+            with transaction.atomic():
+                # ✅ one locking SELECT (id order → no deadlocks) + one guarded UPDATE
+                locked = reserve_stock(flower_counts)
+                total  = sum(
+                    locked[fl_id]['price'] * qty
+                    for fl_id, qty in flower_counts.items()
                 )
 
-        total = sum(
-            flower_map[fl_id].price * qty
-            for fl_id, qty in flower_counts.items()
-        )
-
-        with transaction.atomic():
-            order = models.Order.objects.create(
-                customer=customer,
-                payment_method='cod',
-                status='confirmed',
-                payment_status='pending',
-                total_amount=total,
-                idempotency_key=idempotency_key,
-            )
-
-            items = []
-            for fl_id, qty in flower_counts.items():
-                flower = models.Flower.objects.select_for_update().get(id=fl_id)
+                order = models.Order.objects.create(
+                    customer=customer,
+                    payment_method='cod',
+                    status='confirmed',
+                    payment_status='pending',
+                    total_amount=total,
+                    idempotency_key=idempotency_key,
+                    **basket_summary(flower_counts, locked),
+                )
 
-                if flower.stock < qty:
-                    raise ValidationError(f'{flower.name} is out of stock!')
-                items.append(models.OrderItem(
-                    order=order,
-                    flower=flower,
-                    quantity=qty,
-                    unit_price=flower.price
-                ))
-
-                # ✅ F expression — atomic stock deduct
-                # stock__gte=qty → only if enough stock
-                updated = models.Flower.objects.filter(
-                    id=fl_id,
-                    stock__gte=qty
-                ).update(
-                    stock=F('stock') - qty
+                # ✅ name / image snapshotted — order pages never join flowers
+                models.OrderItem.objects.bulk_create(order_items(order, flower_counts, locked))
+                models.CartItem.objects.filter(
+                    cart__customer=customer
+                ).delete()
+
+                transaction.on_commit(catalog_cache.bump_catalog_version)
+                # ✅ side effects commit with the order (outbox.py); stock
+                # levels come from reserve_stock's UPDATE
+                outbox.publish(
+                    outbox.order_confirmed_events([order.id])
+                    + outbox.stock_events(stock_levels({fl_id: locked[fl_id] for fl_id in flower_counts}))
                 )
+            placed = True
 
-                # ✅ raise inside transaction → rollback!
-                if updated == 0:
-                    raise ValidationError(
-                        f'{flower.name} is out of stock!'
-                    )
+        except models.Flower.DoesNotExist:
+            return Response({'error': 'Flower not found'}, status=400)
+        except InsufficientStock as exc:
+            return Response(exc.as_response_data(), status=400)
+        except IntegrityError:
+            # ✅ unique (customer, idempotency_key) — a concurrent retry won
+            existing_order = models.Order.objects.filter(
+                idempotency_key=idempotency_key,
+                customer=customer
+            ).first()
+            if not existing_order:
+                raise
+            return self.order_response(existing_order)
+        finally:
+            if not placed:
+                flashsale.give_back(taken)
+
+        return self.order_response(order)
+
+    def enqueue(self, request):
+        """
+        Async mode: store the basket on a `queued` order and hand it to the
+        checkout queue. Stock, items, cart and notifications happen in
+        tasks.process_checkouts.
+        """
+        error = self.validate(request)
+        if error:
+            return error
+
+        customer, _     = models.Customer.objects.get_or_create(user=request.user)
+        idempotency_key = request.data.get('idempotency_key')
+        flower_counts   = parse_basket(request.data['flowers'])
 
-            models.OrderItem.objects.bulk_create(items)
-            models.CartItem.objects.filter(
-                cart__customer=customer
-            ).delete()
+        # ✅ flash-sale losers still get their 409 right away
+        try:
+            taken = flashsale.take(flower_counts)
+        except flashsale.SoldOut as exc:
+            return Response(exc.as_response_data(), status=409)
 
-            transaction.on_commit(
-                lambda: send_order_confirmation_email.delay(order.id)
-            )
-            transaction.on_commit(
-                lambda: send_order_notification_to_all(order)
-            )
-            # ✅ removed deduct_stock_and_notify
-            # stock already deducted with F above!
-            # only notify now:
-            transaction.on_commit(
-                lambda: notify_if_low_stock.delay(order.id)
-            )
+        try:
+            with transaction.atomic():
+                order = models.Order.objects.create(
+                    customer=customer,
+                    payment_method='cod',
+                    status='queued',
+                    payment_status='pending',
+                    total_amount=0,
+                    idempotency_key=idempotency_key,
+                    checkout_request=checkout_request(flower_counts, request.data, taken),
+                )
+                transaction.on_commit(lambda: process_checkouts.delay())
+        except IntegrityError:
+            # ✅ unique (customer, idempotency_key) — this basket is already in
+            flashsale.give_back(taken)
+            existing_order = models.Order.objects.filter(
+                idempotency_key=idempotency_key,
+                customer=customer
+            ).first()
+            if not existing_order:
+                raise
+            return self.order_response(existing_order)
 
         return Response({
-            'order_id':       order.id,
-            'total':          total,
-            'status':         order.status,
-            'payment_status': order.payment_status,
-            'payment_method': order.payment_method,
-        })
+            'order_id':   order.id,
+            'status':     order.status,
+            'status_url': reverse('order-status', args=[order.id]),
+            'ws_url':     f'/ws/orders/{order.id}/',
+        }, status=202)
+
+class OrderStatusAPIView(APIView):
+    """Poll target for async checkout — one single-row read, never cached."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        row = models.Order.objects.filter(
+            pk=pk,
+            customer__user=request.user
+        ).values(
+            'id', 'status', 'payment_status', 'payment_method',
+            'total_amount', 'checkout_request',
+        ).first()
+        if not row:
+            return Response({'error': 'Order not found'}, status=404)
+
+        data = {
+            'order_id':       row['id'],
+            'status':         row['status'],
+            'payment_status': row['payment_status'],
+            'payment_method': row['payment_method'],
+            'total':          row['total_amount'],
+            'message':        get_status_message(row['status']),
+        }
+        if row['status'] in ('rejected', 'failed'):
+            data.update((row['checkout_request'] or {}).get('result', {}))
+
+        response = private_cache_headers(Response(data))
+        if row['status'] == 'queued':
+            response['Retry-After'] = '1'
+        return response
 
 class SignupAPIView(APIView):
     serializer_class = SignupSerializer
@@ -459,84 +695,146 @@ class OrderListAPIView(APIView):
 
     def get(self, request):
 
-        queryset = models.Order.objects.prefetch_related(
-            Prefetch(
-                'items',
-                queryset=models.OrderItem.objects.select_related('flower')
+        q = (request.query_params.get('q') or '').strip()
+        if q and len(q) < MIN_SEARCH_LENGTH and not q.isdigit():
+            return Response(
+                {'error': f'Search needs at least {MIN_SEARCH_LENGTH} characters'},
+                status=400
             )
-        ).select_related('customer','customer__user')
-
-       
 
-        # -------- Filters --------
+        ordering = request.query_params.get('ordering', '-created_at')
 
-        customer = request.query_params.get('customer')
-        status = request.query_params.get('status')
-        flower_name = request.query_params.get('flower_name')
+        # ✅ trigram-indexed filters, EXISTS for flower name — no DISTINCT
+        queryset = filter_admin_orders(models.Order.objects.all(), request.query_params)
 
-        date_from = request.query_params.get('date_from')
-        date_to = request.query_params.get('date_to')
+        # Safe ordering whitelist
+        allowed_ordering = [
+            'created_at',
+            '-created_at',
+            'total_amount',
+            '-total_amount'
+        ]
 
-        total_min = request.query_params.get('total_min')
-        total_max = request.query_params.get('total_max')
+        if ordering in allowed_ordering:
+            queryset = queryset.order_by(ordering)
 
-        ordering = request.query_params.get('ordering', '-created_at')
+        # Pagination
+        # ?pagination=cursor → keyset pages on (ordering, id) with an
+        # estimated count; page numbers stay the default for old clients
+        if request.query_params.get('pagination') == 'cursor' or request.query_params.get('cursor'):
+            paginator = AdminOrderKeysetPagination()
+        else:
+            paginator = AdminOrderPagination()
+        fields = projections.select_fields(request.query_params, projections.ORDER_FIELDS)
+        page = paginator.paginate_queryset(
+            queryset.values(*projections.order_values(fields)), request
+        )
 
-        filters = Q()
+        # ✅ values() projection — same output as OrderSerializer
+        return paginator.get_paginated_response(projections.order_rows(page, fields=fields))
 
-        if customer:
-            filters &= Q(customer__user__username__icontains=customer)
 
-        if status:
-            filters &= Q(status__iexact=status)
+class OrderExportAPIView(APIView):
+    """
+    Stream every order matching the admin list filters as CSV or NDJSON
+    (?export_format=csv|ndjson, ?fields= as on the list). Read through a
+    server-side cursor in chunks — memory stays flat for any date range.
+    """
+    permission_classes = [IsSuperAdmin]
 
-        if flower_name:
-            filters &= Q(items__flower__name__icontains=flower_name)
+    def get(self, request):
+        q = (request.query_params.get('q') or '').strip()
+        if q and len(q) < MIN_SEARCH_LENGTH and not q.isdigit():
+            return Response(
+                {'error': f'Search needs at least {MIN_SEARCH_LENGTH} characters'},
+                status=400
+            )
 
-        if date_from:
-            filters &= Q(created_at__date__gte=date_from)
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response({'error': 'export_format must be csv or ndjson'}, status=400)
 
-        if date_to:
-            filters &= Q(created_at__date__lte=date_to)
+        fields = projections.select_fields(request.query_params, projections.ORDER_FIELDS)
+        content_type, extension = EXPORT_FORMATS[export_format]
 
-        if total_min:
-            filters &= Q(total_amount__gte=total_min)
+        response = StreamingHttpResponse(
+            iter_export(request.query_params, export_format, fields),
+            content_type=content_type,
+        )
+        filename = f"orders-{timezone.now():%Y%m%d-%H%M%S}.{extension}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
 
-        if total_max:
-            filters &= Q(total_amount__lte=total_max)
 
-        queryset = queryset.filter(filters).distinct()
+class OrderBulkStatusAPIView(APIView):
+    """
+    POST {"ids": [...], "status": "shipped"} — move many orders in one
+    conditional UPDATE (order_status.py). Reports which ids changed and,
+    for the rest, the status that kept them from moving.
+    """
+    permission_classes = [IsSuperAdmin]
 
-        # Safe ordering whitelist
-        allowed_ordering = [
-            'created_at',
-            '-created_at',
-            'total_amount',
-            '-total_amount'
-        ]
+    def post(self, request):
+        new_status = (request.data.get('status') or '').lower()
+        if new_status not in order_status.TRANSITIONS:
+            allowed = sorted(order_status.TRANSITIONS)
+            return Response({'error': f'Invalid status. Choose from {allowed}'}, status=400)
 
-        if ordering in allowed_ordering:
-            queryset = queryset.order_by(ordering)
+        ids = request.data.get('ids')
+        if not isinstance(ids, list) or not ids:
+            return Response({'error': 'ids must be a non-empty list'}, status=400)
+        if len(ids) > order_status.MAX_BULK_ORDERS:
+            return Response(
+                {'error': f'At most {order_status.MAX_BULK_ORDERS} orders per request'},
+                status=400
+            )
+        try:
+            ids = sorted({int(order_id) for order_id in ids})
+        except (TypeError, ValueError):
+            return Response({'error': 'ids must be order ids'}, status=400)
 
-        # Pagination
-        paginator = AdminOrderPagination()
-        page = paginator.paginate_queryset(queryset, request)
+        updated = order_status.bulk_transition(ids, new_status)
 
-        serializer = serializers.OrderSerializer(page, many=True)
+        skipped = sorted(set(ids) - set(updated))
+        current = dict(
+            models.Order.objects.filter(id__in=skipped).values_list('id', 'status')
+        ) if skipped else {}
 
-        return paginator.get_paginated_response(serializer.data)
+        return Response({
+            'status':  new_status,
+            'updated': updated,
+            # status None: no such order
+            'skipped': [{'id': order_id, 'status': current.get(order_id)} for order_id in skipped],
+        })
 
 class OrderDetailAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, pk):
         if request.user.is_staff or request.user.is_superuser:
-            order = get_object_or_404(models.Order, pk=pk)
+            orders = models.Order.objects.filter(pk=pk)
         else:
-            order = get_object_or_404(models.Order, pk=pk, customer__user=request.user)
-
-        serializer = serializers.OrderSerializer(order)
-        return Response(serializer.data)
+            orders = models.Order.objects.filter(pk=pk, customer__user=request.user)
+
+        # ✅ validators from updated_at only — body rendered on a miss
+        updated_at = orders.values_list('updated_at', flat=True).first()
+        if updated_at is None:
+            raise Http404
+        etag   = make_etag('order', pk, updated_at.isoformat(), request.GET.urlencode())
+        cached = not_modified(request, etag, updated_at)
+        if cached:
+            return private_cache_headers(cached)
+
+        fields = projections.select_fields(request.query_params, projections.ORDER_FIELDS)
+        orders = projections.only_queryset(orders, projections.ORDER_COLUMNS, fields)
+        if 'items' in fields:
+            # ✅ items carry their own name / image — no flower join
+            orders = orders.prefetch_related('items')
+        order = get_object_or_404(orders)
+        serializer = serializers.OrderSerializer(order, fields=fields)
+        return private_cache_headers(
+            with_validators(Response(serializer.data), etag, updated_at)
+        )
 
     def patch(self, request, pk):
         if request.user.is_staff or request.user.is_superuser:
@@ -554,7 +852,7 @@ class OrderDetailAPIView(APIView):
             return Response({'error': f'Invalid status. Choose from {allowed}'}, status=400)
 
         order.status = new_status.lower()
-        order.save(update_fields=['status'])
+        order.save(update_fields=['status', 'updated_at'])
         if new_status.lower() in ('shipped', 'delivered'):
             send_status_update_email.delay(order.id, new_status.lower())
         return Response({'id': order.id, 'status': order.status})
@@ -584,12 +882,9 @@ class CartAPIView(APIView):
     def get(self, request):
         customer = get_object_or_404(models.Customer, user=request.user)
         
-        cart, _ = models.Cart.objects.prefetch_related(
-            Prefetch('items', queryset=models.CartItem.objects.select_related('flower'))
-        ).get_or_create(customer=customer)
-        
-        serializer = serializers.CartSerializer(cart)
-        return Response(serializer.data)
+        cart, _ = models.Cart.objects.get_or_create(customer=customer)
+        fields  = projections.select_fields(request.query_params, projections.CART_FIELDS)
+        return Response(projections.cart_data(cart, fields=fields))
 
     def post(self, request):
         cart      = self.get_cart(request)
@@ -631,9 +926,11 @@ class CartAPIView(APIView):
         # ✅ fresh stock check
         # re-fetch stock directly from DB
         # not from cached Python object
+        # held stock (unpaid online orders) is not for sale
         current_stock = models.Flower.objects.filter(
             id=flower_id
-        ).values_list('stock', flat=True).first()
+        ).values_list(F('stock') - F('reserved_stock'), flat=True).first()
+        current_stock = max(current_stock, 0)
 
         if current_stock < total_qty:
             return Response({
@@ -654,9 +951,8 @@ class CartAPIView(APIView):
             )
             created = True
 
-        serializer = serializers.CartSerializer(cart)
         return Response(
-            serializer.data,
+            projections.cart_data(cart),
             status=201 if created else 200
         )
 
@@ -681,9 +977,9 @@ class CartItemAPIView(APIView):
             item.delete()
             return Response({'message': 'Item removed'}, status=200)
 
-        if item.flower.stock < quantity:
+        if item.flower.available_stock < quantity:
             return Response(
-                {'error': f'Only {item.flower.stock} units available'},
+                {'error': f'Only {item.flower.available_stock} units available'},
                 status=400
             )
 
@@ -707,17 +1003,50 @@ class CustomerOrderListAPIView(APIView):
 
         orders = models.Order.objects.filter(
             customer=customer
-        ).prefetch_related(
-            Prefetch('items', queryset=models.OrderItem.objects.select_related('flower'))
         ).order_by('-created_at')
 
-        serializer = serializers.OrderSerializer(orders, many=True,context={'request': request})
-        return Response(serializer.data)
+        # ✅ count + newest updated_at catch new, changed and removed orders
+        stamp  = orders.aggregate(last=Max('updated_at'), total=Count('id'))
+        last   = stamp['last']
+        etag   = make_etag(
+            'my-orders', customer.id, stamp['total'],
+            last.isoformat() if last else '', request.GET.urlencode(),
+        )
+        cached = not_modified(request, etag, last)
+        if cached:
+            return private_cache_headers(cached)
+
+        fields = projections.select_fields(request.query_params, projections.ORDER_FIELDS)
+        data   = projections.order_rows(
+            orders.values(*projections.order_values(fields)), fields=fields
+        )
+        return private_cache_headers(
+            with_validators(Response(data), etag, last)
+        )
 
 class CreatePaymentOrderAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
+        idempotency_key = request.data.get('idempotency_key')
+        if not idempotency_key:
+            return Response({'error': 'Idempotency key required'}, status=400)
+        # ✅ retries are answered from Redis — no DB work at all
+        return run_once(request.user.id, idempotency_key, lambda: self.create_order(request))
+
+    @staticmethod
+    def existing_order_response(order):
+        return Response({
+            'razorpay_order_id': order.razorpay_order_id,
+            'django_order_id':   order.id,
+            'amount':            to_paise(order.total_amount),
+            'currency':          'INR',
+            'key_id':            settings.RAZORPAY_KEY_ID,
+            'payment_status':    order.payment_status,
+            'status':            order.status,
+        })
+
+    def create_order(self, request):
         user        = request.user
         customer, _ = models.Customer.objects.get_or_create(user=user)
 
@@ -733,8 +1062,10 @@ class CreatePaymentOrderAPIView(APIView):
             return Response({'error': 'Amount required'}, status=400)
         if not flower_ids:
             return Response({'error': 'No flowers found'}, status=400)
-        if not idempotency_key:
-            return Response({'error': 'Idempotency key required'}, status=400)
+        try:
+            flower_counts = parse_basket(flower_ids)
+        except ValueError:
+            return Response({'error': 'flowers must be a list of flower ids'}, status=400)
 
         if address: customer.address      = address
         if phone:   customer.phone_number = phone
@@ -745,22 +1076,14 @@ class CreatePaymentOrderAPIView(APIView):
             customer.state    = 'Kerala'
         customer.save()
 
+        # cache entry gone (evicted / expired) → fall back to the DB
         existing_order = models.Order.objects.filter(
             idempotency_key=idempotency_key,
             customer=customer
         ).first()
         if existing_order:
-            return Response({
-                'razorpay_order_id': existing_order.razorpay_order_id,
-                'django_order_id':   existing_order.id,
-                'amount':            int(float(existing_order.total_amount) * 100),
-                'currency':          'INR',
-                'key_id':            settings.RAZORPAY_KEY_ID,
-                'payment_status':    existing_order.payment_status,
-                'status':            existing_order.status,
-            })
-
-        flower_counts = Counter(flower_ids)
+            return self.existing_order_response(existing_order)
+
         flowers       = models.Flower.objects.filter(
             id__in=flower_counts.keys()
         )
@@ -773,10 +1096,10 @@ class CreatePaymentOrderAPIView(APIView):
                     {'error': 'Flower not found'},
                     status=400
                 )
-            if flower_map[fl_id].stock < qty:
+            if flower_map[fl_id].available_stock < qty:
                 return Response({
                     'error': f'{flower_map[fl_id].name} '
-                             f'only {flower_map[fl_id].stock} left'
+                             f'only {flower_map[fl_id].available_stock} left'
                 }, status=400)
 
         total = sum(
@@ -784,40 +1107,61 @@ class CreatePaymentOrderAPIView(APIView):
             for fl_id, qty in flower_counts.items()
         )
 
-        client = razorpay.Client(
-            auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
-        )
-        payment_order = client.order.create({
-            'amount':          int(float(total) * 100),
-            'currency':        'INR',
-            'payment_capture': 1
-        })
+        snapshot = {
+            fl_id: {'name': flower.name, 'image': flower.image.name, 'price': flower.price}
+            for fl_id, flower in flower_map.items()
+        }
 
-        with transaction.atomic():
-            order = models.Order.objects.create(
-                customer=customer,
-                payment_method='online',
-                status='payment_pending',
-                payment_status='pending',
-                razorpay_order_id=payment_order['id'],
-                total_amount=total,
-                idempotency_key=idempotency_key,
-            )
+        # ✅ flash-sale flowers: losers get 409 before Razorpay or any row lock
+        try:
+            taken = flashsale.take(flower_counts)
+        except flashsale.SoldOut as exc:
+            return Response(exc.as_response_data(), status=409)
 
-            items = []
-            for fl_id, qty in flower_counts.items():
-                flower = models.Flower.objects.select_for_update().get(id=fl_id)
+        placed = False
+        try:
+            # ✅ pooled session + timeouts, outside any transaction
+            payment_order = get_gateway().create_order(to_paise(total))
+
+            with transaction.atomic():
+                order = models.Order.objects.create(
+                    customer=customer,
+                    payment_method='online',
+                    status='payment_pending',
+                    payment_status='pending',
+                    razorpay_order_id=payment_order['id'],
+                    total_amount=total,
+                    idempotency_key=idempotency_key,
+                    **basket_summary(flower_counts, snapshot),
+                )
 
-                if flower.stock < qty:
-                    raise ValidationError(f'{flower.name} is out of stock!')
-                items.append(models.OrderItem(
-                    order=order,
-                    flower=flower,
-                    quantity=qty,
-                    unit_price=flower.price
-                ))
+                models.OrderItem.objects.bulk_create(order_items(order, flower_counts, snapshot))
 
-            models.OrderItem.objects.bulk_create(items)
+                # ✅ hold the basket until paid or STOCK_HOLD_TTL runs out
+                place_holds(order, flower_counts)
+                transaction.on_commit(catalog_cache.bump_catalog_version)
+            placed = True
+        except PaymentGatewayError:
+            return Response(
+                {'error': 'Payment gateway unavailable, please try again'},
+                status=502
+            )
+        except models.Flower.DoesNotExist:
+            return Response({'error': 'Flower not found'}, status=400)
+        except InsufficientStock as exc:
+            return Response(exc.as_response_data(), status=400)
+        except IntegrityError:
+            # ✅ unique (customer, idempotency_key) — a concurrent retry won
+            existing_order = models.Order.objects.filter(
+                idempotency_key=idempotency_key,
+                customer=customer
+            ).first()
+            if not existing_order:
+                raise
+            return self.existing_order_response(existing_order)
+        finally:
+            if not placed:
+                flashsale.give_back(taken)
 
         return Response({
             'razorpay_order_id': payment_order['id'],
@@ -832,105 +1176,18 @@ class RazorpayWebhookAPIView(APIView):
     permission_classes     = []
 
     def post(self, request):
-        payload = request.body
-        data    = json.loads(payload)
-        event   = data.get('event')
-
-        print("WEBHOOK EVENT:", event)
-
-        if event == 'payment.captured':
-            payment     = data['payload']['payment']['entity']
-            rp_order_id = payment['order_id']
-
-            try:
-                with transaction.atomic():
-                    # ✅ lock order row — prevent duplicate webhook processing
-                    order = models.Order.objects.select_for_update().select_related(
-                        'customer'
-                    ).get(razorpay_order_id=rp_order_id)
-
-                    # ✅ idempotency check — already processed? skip!
-                    if order.payment_status == 'paid':
-                        print("WEBHOOK ALREADY PROCESSED:", order.id)
-                        return Response({'status': 'ok'})
-
-                    order.status              = 'confirmed'
-                    order.payment_status      = 'paid'
-                    order.razorpay_payment_id = payment['id']
-
-                    order.save(update_fields=[
-                        'status',
-                        'payment_status',
-                        'razorpay_payment_id'
-                    ])
-
-                    # ✅ lock flower row + deduct stock atomically
-                    for item in order.items.select_related('flower').all():
-                        flower = models.Flower.objects.select_for_update().get(
-                            id=item.flower.id
-                        )
-
-                        if flower.stock >= item.quantity:
-                            flower.stock = F('stock') - item.quantity
-                            flower.save()
-                        else:
-                            # stock ran out between order creation + payment
-                            # still confirm order, just set stock to 0
-                            flower.stock = 0
-                            flower.save()
-
-                    models.CartItem.objects.filter(
-                        cart__customer=order.customer
-                    ).delete()
-
-                    print("ORDER CONFIRMED:", order.id)
-
-                    transaction.on_commit(
-                        lambda: send_order_confirmation_email.delay(order.id)
-                    )
-                    transaction.on_commit(
-                        lambda: send_order_notification_to_all(order)
-                    )
-                    transaction.on_commit(
-                        lambda: notify_if_low_stock.delay(order.id)
-                    )
-
-            except models.Order.DoesNotExist:
-                return Response(
-                    {'error': 'Order not found'},
-                    status=404
-                )
-
-        elif event == 'payment.failed':
-            payment     = data['payload']['payment']['entity']
-            rp_order_id = payment['order_id']
-
-            try:
-                with transaction.atomic():
-                    # ✅ lock order row here too
-                    order = models.Order.objects.select_for_update().get(
-                        razorpay_order_id=rp_order_id
-                    )
-
-                    # ✅ idempotency — already marked failed? skip!
-                    if order.payment_status == 'failed':
-                        print("WEBHOOK ALREADY PROCESSED:", order.id)
-                        return Response({'status': 'ok'})
-
-                    order.status         = 'payment_failed'
-                    order.payment_status = 'failed'
-                    order.save(update_fields=[
-                        'status',
-                        'payment_status'
-                    ])
-                    print("ORDER FAILED:", order.id)
-
-            except models.Order.DoesNotExist:
-                return Response(
-                    {'error': 'Order not found'},
-                    status=404
-                )
-
+        # ✅ store and ack — webhooks.process_batch applies it off the request
+        event = record_event(request.headers.get('X-Razorpay-Event-Id'), request.body)
+        if event is None:
+            return Response({'status': 'ok'})
+
+        logger.info('Razorpay webhook %s (%s) stored', event.event, event.event_id)
+        # record_event has committed; a broker error must not 500 the ack —
+        # the drain-webhook-events beat entry applies the event instead
+        try:
+            process_webhook_events.delay()
+        except Exception:
+            logger.exception('Could not enqueue webhook processing for %s', event.event_id)
         return Response({'status': 'ok'})
 
 class OrderCancelAPIView(APIView):
@@ -958,46 +1215,143 @@ class OrderCancelAPIView(APIView):
                     'error': f'Order cannot be cancelled. Current status: {order.status}'
                 }, status=400)
 
-            # ✅ restore stock atomically
-            for item in order.items.select_related('flower').all():
-                models.Flower.objects.filter(
-                    id=item.flower.id
-                ).update(
-                    stock=F('stock') + item.quantity
-                )
+            # ✅ restore stock atomically — one UPDATE for the whole order
+            levels = restore_stock(dict(
+                order.items.filter(flower__isnull=False)
+                .values_list('flower_id').annotate(qty=Sum('quantity')).order_by()
+            ))
 
             if order.payment_method == 'cod':
                 order.status = 'cancelled'
-                order.save(update_fields=['status'])
+                order.save(update_fields=['status', 'updated_at'])
 
             elif order.payment_method == 'online':
-                try:
-                    client = razorpay.Client(
-                        auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
-                    )
-                    client.payment.refund(
-                        order.razorpay_payment_id,
-                        {'amount': int(float(order.total_amount) * 100)}
-                    )
-                    order.status         = 'cancelled'
-                    order.payment_status = 'refunded'
-                    order.save(update_fields=['status', 'payment_status'])
-
-                except Exception:
-                    raise ValidationError('Refund failed, please contact support')
+                order.status = 'cancelled'
+                order.save(update_fields=['status', 'updated_at'])
+
+                # ✅ no Razorpay call while holding the lock —
+                # the refund is tracked and sent after commit
+                refund = models.Refund.objects.create(
+                    order=order,
+                    amount=order.total_amount,
+                )
+                outbox.publish([('refund', {'refund_id': refund.id})])
 
             # ✅ on_commit INSIDE atomic block
-            transaction.on_commit(
-                lambda: send_order_cancellation_email.delay(order.id)
+            transaction.on_commit(catalog_cache.bump_catalog_version)
+            outbox.publish(
+                [('order_cancellation_email', {'order_id': order.id})]
+                + outbox.stock_events(stock_levels(levels), alert=False)
             )
 
-        return Response({
+        data = {
             'message':        'Order cancelled successfully',
             'order_id':       order.id,
             'status':         order.status,
             'payment_status': order.payment_status,
             'payment_method': order.payment_method,
-        })
+        }
+        if order.payment_method == 'online':
+            data['refund_status'] = refund.status
+        return Response(data)
+
+class OutboxBacklogAPIView(APIView):
+    """Backlog metric for order side effects (outbox.py) — for dashboards / alerts."""
+    permission_classes = [IsSuperAdmin]
+
+    def get(self, request):
+        return Response(outbox.backlog())
+
+
+ANALYTICS_DEFAULT_DAYS = 30
+
+
+def analytics_filters(request):
+    """
+    Shared query params of the analytics views: date_from / date_to
+    (YYYY-MM-DD, default the last 30 days), category, pincode.
+    Raises ValueError with a message for the client.
+    """
+    params  = request.query_params
+    date_to = timezone.localdate()
+    if params.get('date_to'):
+        date_to = parse_date(params['date_to'])
+    date_from = date_to - timedelta(days=ANALYTICS_DEFAULT_DAYS - 1) if date_to else None
+    if params.get('date_from'):
+        date_from = parse_date(params['date_from'])
+    if not date_from or not date_to:
+        raise ValueError('date_from / date_to must be YYYY-MM-DD')
+    if date_from > date_to:
+        raise ValueError('date_from is after date_to')
+
+    category = params.get('category')
+    if category and not category.isdigit():
+        raise ValueError('category must be an id')
+
+    return {
+        'date_from': date_from,
+        'date_to':   date_to,
+        'category':  int(category) if category else None,
+        'pincode':   params.get('pincode') or None,
+    }
+
+
+def analytics_meta(filters):
+    as_of = rollups.watermark()
+    return {
+        'date_from': filters['date_from'].isoformat(),
+        'date_to':   filters['date_to'].isoformat(),
+        # rollups are complete up to here (tasks.refresh_sales_rollups)
+        'as_of':     as_of.isoformat() if as_of else None,
+    }
+
+
+class SalesAnalyticsAPIView(APIView):
+    """
+    Sales time series from the daily rollups (rollups.py) — never scans orders.
+    ?interval=day|week|month, ?flower= / ?category= switch to item figures.
+    """
+    permission_classes = [IsSuperAdmin]
+
+    def get(self, request):
+        try:
+            filters = analytics_filters(request)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=400)
+
+        interval = request.query_params.get('interval', 'day')
+        if interval not in rollups.INTERVALS:
+            return Response({'error': 'interval must be day, week or month'}, status=400)
+        flower = request.query_params.get('flower')
+        if flower and not flower.isdigit():
+            return Response({'error': 'flower must be an id'}, status=400)
+
+        series = rollups.sales_series(
+            interval=interval, flower=int(flower) if flower else None, **filters
+        )
+        return Response({**analytics_meta(filters), 'interval': interval, 'series': series})
+
+
+class TopFlowersAPIView(APIView):
+    """Top-N flowers by revenue or units (?by=, ?limit= up to 100) from the daily rollups."""
+    permission_classes = [IsSuperAdmin]
+
+    def get(self, request):
+        try:
+            filters = analytics_filters(request)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=400)
+
+        by = request.query_params.get('by', 'revenue')
+        if by not in rollups.TOP_BY:
+            return Response({'error': 'by must be revenue or quantity'}, status=400)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 100)
+        except ValueError:
+            return Response({'error': 'limit must be a number'}, status=400)
+
+        flowers = rollups.top_flowers(by=by, limit=limit, **filters)
+        return Response({**analytics_meta(filters), 'by': by, 'flowers': flowers})
 
 class SaveFCMTokenView(APIView):
     permission_classes = [IsAuthenticated]
@@ -0,0 +1,223 @@
+"""
+Razorpay webhook ingestion (POST /webhook/razorpay/).
+
+The view only stores the delivery as a WebhookEvent and answers 200. The
+unique event_id (X-Razorpay-Event-Id) turns Razorpay's retries into a failed
+INSERT, so retry bursts never queue on the order row lock.
+
+tasks.process_webhook_events applies pending events a batch at a time:
+events are collapsed to one outcome per Razorpay order, orders whose payment
+is already in that state are skipped BEFORE anything is locked, and the rest
+are locked in id order (orders, then their flowers) and updated together.
+"""
+import hashlib
+import json
+import logging
+
+from django.db import IntegrityError, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from flowerapp import models
+from . import outbox
+from .catalog_cache import bump_catalog_version
+from .stock import convert_holds, deduct_stock, lock_flowers, release_holds, stock_levels
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+
+CAPTURED = 'payment.captured'
+FAILED   = 'payment.failed'
+
+
+def record_event(event_id, body):
+    """
+    Store one delivery. Returns the event, or None when it was a duplicate
+    or not valid JSON.
+    """
+    try:
+        data = json.loads(body)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    # Razorpay always sends the header; fall back to the body for replays by hand
+    event_id = event_id or hashlib.sha256(body).hexdigest()
+    try:
+        with transaction.atomic():
+            return models.WebhookEvent.objects.create(
+                event_id=event_id,
+                event=str(data.get('event', ''))[:50],
+                payload=data,
+            )
+    except IntegrityError:
+        # Razorpay retrying an event we already have
+        return None
+
+
+def _payment(event):
+    """(razorpay_order_id, payment_id) of a payment.* event."""
+    entity = event.payload['payload']['payment']['entity']
+    return entity['order_id'], entity['id']
+
+
+def _collapse(events):
+    """
+    One outcome per Razorpay order: a capture beats any failed attempt.
+    Returns ({rp_order_id: (event, payment_id)}, skipped, failed).
+    """
+    outcomes = {}
+    skipped  = []
+    failed   = []
+    for event in events:
+        if event.event not in (CAPTURED, FAILED):
+            skipped.append(event)
+            continue
+        try:
+            rp_order_id, payment_id = _payment(event)
+        except (KeyError, TypeError):
+            event.last_error = 'Malformed payment payload'
+            failed.append(event)
+            continue
+
+        current = outcomes.get(rp_order_id)
+        if current is None or (event.event == CAPTURED and current[0].event != CAPTURED):
+            if current:
+                skipped.append(current[0])
+            outcomes[rp_order_id] = (event, payment_id)
+        else:
+            skipped.append(event)
+    return outcomes, skipped, failed
+
+
+def _applies(event, payment_status):
+    if event.event == CAPTURED:
+        return payment_status not in ('paid', 'refunded')
+    # a late failed attempt must not undo a capture
+    return payment_status == 'pending'
+
+
+def _confirm(orders, payments, now):
+    order_ids = [order.id for order in orders]
+    # lock every flower the batch touches up front, in id order
+    lock_flowers(set(
+        models.OrderItem.objects.filter(order_id__in=order_ids, flower__isnull=False)
+        .values_list('flower_id', flat=True)
+    ))
+
+    # ✅ held stock of the whole batch becomes a real deduction — one UPDATE
+    levels, held = convert_holds(order_ids)
+    expired = [order_id for order_id in order_ids if order_id not in held]
+    if expired:
+        # hold already expired — customer paid, so still confirm;
+        # stock is clamped at 0
+        counts = dict(
+            models.OrderItem.objects.filter(order_id__in=expired, flower__isnull=False)
+            .values_list('flower_id').annotate(qty=Sum('quantity')).order_by()
+        )
+        levels.update(deduct_stock(counts))
+
+    for order in orders:
+        order.status              = 'confirmed'
+        order.payment_status      = 'paid'
+        order.razorpay_payment_id = payments[order.id]
+        order.updated_at          = now
+    models.Order.objects.bulk_update(
+        orders, ['status', 'payment_status', 'razorpay_payment_id', 'updated_at']
+    )
+    models.CartItem.objects.filter(
+        cart__customer_id__in={order.customer_id for order in orders}
+    ).delete()
+
+    transaction.on_commit(bump_catalog_version)
+    outbox.publish(
+        outbox.order_confirmed_events(order_ids)
+        + outbox.stock_events(stock_levels(levels))
+    )
+
+
+def _fail(orders, now):
+    order_ids = [order.id for order in orders]
+    models.Order.objects.filter(id__in=order_ids).update(
+        status='payment_failed',
+        payment_status='failed',
+        updated_at=now,
+    )
+    # ✅ give the held stock back right away
+    if release_holds(order_ids):
+        transaction.on_commit(bump_catalog_version)
+
+
+def process_batch(batch_size=BATCH_SIZE):
+    """Apply up to batch_size pending events in one transaction. Returns how many."""
+    with transaction.atomic():
+        # skip_locked: several workers can drain side by side
+        events = list(
+            models.WebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(status='pending')
+            .order_by('id')[:batch_size]
+        )
+        if not events:
+            return 0
+
+        outcomes, skipped, failed = _collapse(events)
+
+        # ✅ duplicates out before any order lock
+        current = dict(
+            models.Order.objects.filter(
+                razorpay_order_id__in=outcomes.keys()
+            ).values_list('razorpay_order_id', 'payment_status')
+        )
+        for rp_order_id, (event, _) in list(outcomes.items()):
+            if rp_order_id not in current:
+                event.last_error = 'Order not found'
+                failed.append(event)
+                del outcomes[rp_order_id]
+            elif not _applies(event, current[rp_order_id]):
+                skipped.append(event)
+                del outcomes[rp_order_id]
+
+        orders = list(
+            models.Order.objects.select_for_update()
+            .filter(razorpay_order_id__in=outcomes.keys())
+            .order_by('id')
+        )
+        now       = timezone.now()
+        confirm   = []
+        fail      = []
+        payments  = {}
+        processed = []
+        for order in orders:
+            event, payment_id = outcomes[order.razorpay_order_id]
+            # fresh read under the lock
+            if not _applies(event, order.payment_status):
+                skipped.append(event)
+                continue
+            processed.append(event)
+            if event.event == CAPTURED:
+                payments[order.id] = payment_id
+                confirm.append(order)
+            else:
+                fail.append(order)
+
+        if confirm:
+            _confirm(confirm, payments, now)
+        if fail:
+            _fail(fail, now)
+
+        for status, group in (('processed', processed), ('skipped', skipped), ('failed', failed)):
+            for event in group:
+                event.status       = status
+                event.processed_at = now
+        models.WebhookEvent.objects.bulk_update(
+            events, ['status', 'last_error', 'processed_at']
+        )
+
+    if confirm or fail:
+        logger.info(
+            'Webhooks: %d confirmed, %d failed, %d skipped',
+            len(confirm), len(fail), len(skipped),
+        )
+    return len(events)
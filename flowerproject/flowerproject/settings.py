@@ -55,6 +55,7 @@ INSTALLED_APPS = [
     'cloudinary_storage',
     'django.contrib.staticfiles',
     'django.contrib.sites',
+    'django.contrib.postgres',
     'cloudinary',
     'corsheaders',
     'channels',
@@ -103,15 +104,36 @@ WSGI_APPLICATION = 'flowerproject.wsgi.application'
 
 ASGI_APPLICATION = 'flowerproject.asgi.application'
 
+REDIS_URL = os.getenv('REDIS_URL', 'redis://127.0.0.1:6379/0')
+
 CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels_redis.core.RedisChannelLayer",
         "CONFIG": {
-            "hosts": [os.getenv('REDIS_URL', 'redis://127.0.0.1:6379/0')],
+            "hosts": [REDIS_URL],
         },
     },
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+        "KEY_PREFIX": "flowershop",
+    },
+}
+
+# Catalog response cache (see flowerapp/catalog_cache.py)
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', 60 * 60))
+# Cache-Control on public catalog responses (browser / CDN seconds). The CDN
+# TTL only applies once a purge endpoint is set — without one shared caches
+# revalidate every request (see conditional.catalog_cache_headers)
+CATALOG_MAX_AGE = int(os.getenv('CATALOG_MAX_AGE', 60))
+CATALOG_CDN_MAX_AGE = int(os.getenv('CATALOG_CDN_MAX_AGE', 300))
+# surrogate-key purge endpoint, e.g. https://api.fastly.com/service/<id>/purge
+CATALOG_CDN_PURGE_URL = os.getenv('CATALOG_CDN_PURGE_URL')
+CATALOG_CDN_PURGE_TOKEN = os.getenv('CATALOG_CDN_PURGE_TOKEN')
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
@@ -208,6 +230,60 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # Celery
 CELERY_BROKER_URL = os.getenv('REDIS_URL', 'redis://127.0.0.1:6379/0')
 CELERY_RESULT_BACKEND = os.getenv('REDIS_URL', 'redis://127.0.0.1:6379/0')
+CELERY_BEAT_SCHEDULE = {
+    # give back stock held for online orders that were never paid
+    'release-expired-stock-holds': {
+        'task': 'flowerapp.tasks.release_expired_holds',
+        'schedule': 60.0,
+    },
+    # reset the Redis flash-sale counts from the database
+    'reconcile-flash-sale-stock': {
+        'task': 'flowerapp.tasks.reconcile_flash_sale_stock',
+        'schedule': 30.0,
+    },
+    # safety net for async checkouts whose enqueue message was lost
+    'drain-checkout-queue': {
+        'task': 'flowerapp.tasks.process_checkouts',
+        'schedule': 15.0,
+    },
+    # same for Razorpay webhook events
+    'drain-webhook-events': {
+        'task': 'flowerapp.tasks.process_webhook_events',
+        'schedule': 15.0,
+    },
+    # deliver order side effects (emails, pushes, refunds) from the outbox
+    'dispatch-outbox': {
+        'task': 'flowerapp.tasks.dispatch_outbox',
+        'schedule': 10.0,
+    },
+    'purge-outbox': {
+        'task': 'flowerapp.tasks.purge_outbox',
+        'schedule': 24 * 60 * 60.0,
+    },
+    # daily sales rollups behind the admin analytics API
+    'refresh-sales-rollups': {
+        'task': 'flowerapp.tasks.refresh_sales_rollups',
+        'schedule': 5 * 60.0,
+    },
+}
+# async checkout has its own queue. The deployed worker consumes both
+# (railway_worker.toml, run_celery.sh: -Q celery,checkout); dedicated
+# checkout workers can be added with: celery -A flowerproject worker -Q checkout
+CELERY_TASK_ROUTES = {
+    'flowerapp.tasks.process_checkouts': {'queue': 'checkout'},
+}
+
+# Checkout idempotency keys (Redis): a claim is dropped after
+# IDEMPOTENCY_CLAIM_TIMEOUT if its request never finishes; finished
+# responses are replayed for IDEMPOTENCY_TTL
+IDEMPOTENCY_CLAIM_TIMEOUT = int(os.getenv('IDEMPOTENCY_CLAIM_TIMEOUT', 60))
+IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', 24 * 60 * 60))
+
+# How long an unpaid online order keeps its stock
+STOCK_HOLD_TTL = timedelta(minutes=int(os.getenv('STOCK_HOLD_TTL_MINUTES', 15)))
+
+# Delivered outbox events are kept this long for debugging
+OUTBOX_RETENTION = timedelta(days=int(os.getenv('OUTBOX_RETENTION_DAYS', 7)))
 
 # Email
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -254,6 +330,13 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 RAZORPAY_KEY_ID = os.getenv('RAZORPAY_KEY_ID')
 RAZORPAY_KEY_SECRET = os.getenv('RAZORPAY_KEY_SECRET')
 RAZORPAY_WEBHOOK_SECRET = os.getenv('RAZORPAY_WEBHOOK_SECRET')
+# seconds — fail fast instead of pinning a worker on a slow gateway
+RAZORPAY_CONNECT_TIMEOUT = float(os.getenv('RAZORPAY_CONNECT_TIMEOUT', 3.05))
+RAZORPAY_READ_TIMEOUT = float(os.getenv('RAZORPAY_READ_TIMEOUT', 10))
+RAZORPAY_POOL_SIZE = int(os.getenv('RAZORPAY_POOL_SIZE', 10))
+# flowerapp.payments.FakeRazorpayGateway / AsyncFakeRazorpayGateway for local runs
+PAYMENT_GATEWAY = os.getenv('PAYMENT_GATEWAY', 'flowerapp.payments.RazorpayGateway')
+ASYNC_PAYMENT_GATEWAY = os.getenv('ASYNC_PAYMENT_GATEWAY', 'flowerapp.payments.AsyncRazorpayGateway')
 
 # Google OAuth
 GOOGLE_CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID')
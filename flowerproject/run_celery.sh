@@ -3,10 +3,10 @@
 # Activate virtualenv
 source /home/harish/venv/bin/activate
 
-# Start Celery worker
-celery -A flowerproject worker --loglevel=info &
-
-# Start Celery beat
+# Start Celery worker (default queue + the async checkout queue)
+celery -A flowerproject worker -Q celery,checkout --loglevel=info &
 
+# Start Celery beat (CELERY_BEAT_SCHEDULE: hold expiry, outbox, drains, rollups)
+celery -A flowerproject beat --loglevel=info &
 
 echo "Celery worker and beat started!"